@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "creation_blocks.sqlite"
+)
+
+
+class CreationBlockCache:
+    """
+    On-disk cache of contract creation blocks, and of every eth_getCode probe
+    made while searching for them.
+
+    Creation blocks never change, so a known contract needs no calls at all.
+    The probes make an interrupted search resumable: the window left to
+    search lies past the latest block seen without code and at or before the
+    earliest block seen with code.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        """
+        Opens (or creates) the cache.
+
+        Args:
+            path (str): The SQLite file, or ":memory:" for a throwaway cache.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS creation_blocks (
+                chain_id INTEGER NOT NULL,
+                address TEXT NOT NULL,
+                block_number INTEGER NOT NULL,
+                PRIMARY KEY (chain_id, address)
+            );
+            CREATE TABLE IF NOT EXISTS code_probes (
+                chain_id INTEGER NOT NULL,
+                address TEXT NOT NULL,
+                block_number INTEGER NOT NULL,
+                has_code INTEGER NOT NULL,
+                PRIMARY KEY (chain_id, address, block_number)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def creation_blocks(self, chain_id: int, contract_addresses: list) -> dict:
+        """
+        Gets the known creation blocks.
+
+        Args:
+            chain_id (int): The chain the contracts live on.
+            contract_addresses (list): The contracts' addresses.
+
+        Returns:
+            dict: The creation block of each given address that is cached.
+        """
+        creation_blocks = {}
+        with self._lock:
+            for address in contract_addresses:
+                row = self._conn.execute(
+                    "SELECT block_number FROM creation_blocks WHERE chain_id = ? AND address = ?",
+                    (chain_id, address.lower()),
+                ).fetchone()
+                if row is not None:
+                    creation_blocks[address] = row[0]
+        return creation_blocks
+
+    def store_creation_blocks(self, chain_id: int, creation_blocks: dict):
+        """
+        Records found creation blocks and drops the probes made to find them.
+
+        Args:
+            chain_id (int): The chain the contracts live on.
+            creation_blocks (dict): The creation block of each address.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO creation_blocks VALUES (?, ?, ?)",
+                [(chain_id, address.lower(), block) for address, block in creation_blocks.items()],
+            )
+            self._conn.executemany(
+                "DELETE FROM code_probes WHERE chain_id = ? AND address = ?",
+                [(chain_id, address.lower()) for address in creation_blocks],
+            )
+
+    def store_probes(self, chain_id: int, probes: list):
+        """
+        Records eth_getCode results. Only record successful calls: a failed
+        one says nothing about the code.
+
+        Args:
+            chain_id (int): The chain the contracts live on.
+            probes (list): (contract_address, block_number, has_code) triples.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO code_probes VALUES (?, ?, ?, ?)",
+                [
+                    (chain_id, address.lower(), block_number, int(has_code))
+                    for address, block_number, has_code in probes
+                ],
+            )
+
+    def search_windows(self, chain_id: int, contract_addresses: list, latest_block: int) -> dict:
+        """
+        Narrows each contract's search window by the probes made so far.
+
+        Args:
+            chain_id (int): The chain the contracts live on.
+            contract_addresses (list): The contracts' addresses.
+            latest_block (int): The end of the window of a contract without probes.
+
+        Returns:
+            dict: The (start_block, end_block) window left to search for each address.
+        """
+        windows = {}
+        with self._lock:
+            for address in contract_addresses:
+                key = (chain_id, address.lower())
+                (end_block,) = self._conn.execute(
+                    "SELECT MIN(block_number) FROM code_probes "
+                    "WHERE chain_id = ? AND address = ? AND has_code = 1",
+                    key,
+                ).fetchone()
+                end_block = latest_block if end_block is None else min(end_block, latest_block)
+                (last_empty,) = self._conn.execute(
+                    "SELECT MAX(block_number) FROM code_probes "
+                    "WHERE chain_id = ? AND address = ? AND has_code = 0 AND block_number < ?",
+                    (*key, end_block),
+                ).fetchone()
+                windows[address] = (0 if last_empty is None else last_empty + 1, end_block)
+        return windows
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
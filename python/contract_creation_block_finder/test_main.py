@@ -0,0 +1,514 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from web3 import Web3
+
+from creation_cache import CreationBlockCache
+from main import (
+    NO_CODE_ERROR,
+    ContractFinder,
+    NoCodeError,
+    _narrow_window,
+    _probe_blocks,
+    main,
+    read_addresses,
+)
+
+LATEST_BLOCK = 1_000_000
+CREATION_BLOCKS = {
+    "0x" + "11" * 20: 123_457,
+    "0x" + "22" * 20: 1,
+    "0x" + "33" * 20: LATEST_BLOCK,
+    "0x" + "44" * 20: 999_999,
+}
+
+
+class StubServer(ThreadingHTTPServer):
+    # Room for every concurrent probe to connect at once
+    request_queue_size = 64
+
+
+class StubNode:
+    """
+    Local JSON-RPC node where each contract has code from its creation block on.
+    It optionally serves ots_getContractCreator, and eth_getLogs for the
+    contracts given a first log block. eth_getCode fails for the (address, block)
+    pairs in failing_probes.
+    Counts HTTP round trips and calls per method.
+    """
+
+    def __init__(
+        self, creation_blocks, latest_block=LATEST_BLOCK, first_logs=None, creator_index=False
+    ):
+        self.creation_blocks = creation_blocks
+        self.latest_block = latest_block
+        self.first_logs = first_logs or {}
+        self.creator_index = creator_index
+        self.failing_probes = set()
+        self.round_trips = 0
+        self.calls = {}
+        self._lock = threading.Lock()
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                requests = payload if isinstance(payload, list) else [payload]
+                responses = [node.respond(request) for request in requests]
+                body = json.dumps(responses if isinstance(payload, list) else responses[0]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with node._lock:
+                    node.round_trips += 1
+
+        self._server = StubServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def result(self, method, params):
+        if method == "eth_blockNumber":
+            return hex(self.latest_block)
+        if method == "eth_chainId":
+            return "0x1"
+        if method == "web3_clientVersion":
+            return "stub/1.0"
+        if method == "eth_getCode":
+            address, block = params[0].lower(), params[1]
+            block_number = self.latest_block if block == "latest" else int(block, 16)
+            if (address, block_number) in self.failing_probes:
+                raise ValueError("header not found")
+            created = self.creation_blocks.get(address)
+            return "0x6080604052" if created is not None and block_number >= created else "0x"
+        if method == "ots_getContractCreator" and self.creator_index:
+            created = self.creation_blocks.get(params[0].lower())
+            return None if created is None else {"hash": hex(created), "creator": params[0]}
+        if method == "eth_getTransactionByHash":
+            return {"hash": params[0], "blockNumber": params[0]}
+        if method == "eth_getLogs":
+            first_log = self.first_logs.get(params[0]["address"].lower())
+            if first_log is None:
+                raise ValueError("query returned more than 10000 results")
+            return [{"blockNumber": hex(first_log + 5)}, {"blockNumber": hex(first_log)}]
+        raise KeyError(method)
+
+    def respond(self, request):
+        method = request["method"]
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        try:
+            response = {"result": self.result(method, request.get("params", []))}
+        except KeyError:
+            response = {"error": {"code": -32601, "message": f"method {method} not found"}}
+        except ValueError as e:
+            response = {"error": {"code": -32005, "message": str(e)}}
+        return {"jsonrpc": "2.0", "id": request["id"], **response}
+
+
+class TestContractFinder(unittest.TestCase):
+    """
+    Tests for finding creation blocks against a stub node.
+    Follows AAA pattern: Arrange, Act, Assert.
+    """
+
+    def setUp(self):
+        self.node = StubNode(CREATION_BLOCKS).__enter__()
+        self.addCleanup(self.node.__exit__)
+        self.finder = ContractFinder(self.node.url, cache_path=None)
+
+    def test_single_search_finds_creation_block(self):
+        # Act
+        creation_block = self.finder.find_creation_block("0x" + "11" * 20)
+
+        # Assert
+        self.assertEqual(creation_block, 123_457)
+
+    def test_batched_search_advances_in_lockstep(self):
+        # Arrange
+        round_trips_before = self.node.round_trips
+
+        # Act
+        creation_blocks = self.finder.find_creation_blocks(list(CREATION_BLOCKS))
+
+        # Assert
+        self.assertEqual(creation_blocks, CREATION_BLOCKS)
+        # Connecting, the failed creator lookup, the code check at the latest block,
+        # then one batch per bisection step for all four
+        self.assertLessEqual(self.node.round_trips - round_trips_before, 3 + 1 + 1 + 21)
+
+
+class TestKArySearch(unittest.TestCase):
+    """
+    Tests for the round-based search of single lookups.
+    """
+
+    def test_probes_split_the_window_evenly(self):
+        # Act
+        blocks = _probe_blocks(0, 100, 3)
+
+        # Assert
+        self.assertEqual(blocks, [25, 50, 75])
+        self.assertEqual(_probe_blocks(10, 12, 3), [10, 11])
+        self.assertEqual(_probe_blocks(0, 99, 1), [49])
+
+    def test_window_keeps_the_code_boundary(self):
+        # Act
+        window = _narrow_window(0, 100, [25, 50, 75], [False, True, True])
+
+        # Assert
+        self.assertEqual(window, (26, 50))
+        self.assertEqual(_narrow_window(0, 100, [25, 50, 75], [False] * 3), (76, 100))
+
+    def test_every_arity_finds_the_creation_block(self):
+        # Arrange
+        node = StubNode(CREATION_BLOCKS).__enter__()
+        self.addCleanup(node.__exit__)
+
+        for arity in (1, 3, 16):
+            finder = ContractFinder(
+                node.url,
+                use_creator_lookup=False,
+                use_log_bound=False,
+                search_arity=arity,
+                cache_path=None,
+            )
+            for address, expected in CREATION_BLOCKS.items():
+                # Act
+                creation_block = finder.find_creation_block(address)
+
+                # Assert
+                self.assertEqual(creation_block, expected, f"arity {arity}")
+
+
+class TestCheapLookups(unittest.TestCase):
+    """
+    Tests for the lookups tried before the binary search.
+    """
+
+    def make_finder(self, **node_options):
+        node = StubNode(CREATION_BLOCKS, **node_options).__enter__()
+        self.addCleanup(node.__exit__)
+        return node, ContractFinder(node.url, use_log_bound=True, search_arity=1, cache_path=None)
+
+    def test_creator_index_resolves_without_code_probes(self):
+        # Arrange
+        node, finder = self.make_finder(creator_index=True)
+
+        # Act
+        creation_blocks = finder.find_creation_blocks(list(CREATION_BLOCKS))
+
+        # Assert
+        self.assertEqual(creation_blocks, CREATION_BLOCKS)
+        self.assertNotIn("eth_getCode", node.calls)
+
+    def test_log_in_creation_block_settles_it_with_one_probe(self):
+        # Arrange
+        address = "0x" + "11" * 20
+        node, finder = self.make_finder(first_logs={address: CREATION_BLOCKS[address]})
+
+        # Act
+        creation_block = finder.find_creation_block(address)
+
+        # Assert
+        self.assertEqual(creation_block, CREATION_BLOCKS[address])
+        self.assertEqual(node.calls["eth_getCode"], 1)
+
+    def test_log_bound_is_off_by_default(self):
+        # Arrange
+        address = "0x" + "11" * 20
+        node = StubNode(CREATION_BLOCKS, first_logs={address: CREATION_BLOCKS[address]}).__enter__()
+        self.addCleanup(node.__exit__)
+        finder = ContractFinder(node.url, cache_path=None)
+
+        # Act
+        creation_block = finder.find_creation_block(address)
+
+        # Assert
+        self.assertEqual(creation_block, CREATION_BLOCKS[address])
+        self.assertNotIn("eth_getLogs", node.calls)
+
+    def test_later_first_log_narrows_the_search(self):
+        # Arrange
+        address = "0x" + "11" * 20
+        node, finder = self.make_finder(first_logs={address: CREATION_BLOCKS[address] + 100})
+
+        # Act
+        creation_block = finder.find_creation_block(address)
+
+        # Assert
+        self.assertEqual(creation_block, CREATION_BLOCKS[address])
+        self.assertLess(node.calls["eth_getCode"], 19)
+
+
+class TestCreationBlockCache(unittest.TestCase):
+    """
+    Tests for the on-disk cache of creation blocks and code probes.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_path = os.path.join(directory.name, "creation_blocks.sqlite")
+        self.node = StubNode(CREATION_BLOCKS).__enter__()
+        self.addCleanup(self.node.__exit__)
+
+    def make_finder(self, **options):
+        finder = ContractFinder(
+            self.node.url,
+            use_creator_lookup=False,
+            use_log_bound=False,
+            search_arity=1,
+            cache_path=self.cache_path,
+            **options,
+        )
+        self.addCleanup(finder.close)
+        return finder
+
+    def test_construction_does_not_connect(self):
+        # Act
+        finder = ContractFinder("http://127.0.0.1:1", cache_path=None)
+
+        # Assert
+        with self.assertRaises(ConnectionError):
+            finder.find_creation_block("0x" + "11" * 20)
+
+    def test_known_contract_resolves_without_calls(self):
+        # Arrange
+        address = "0x" + "11" * 20
+        self.make_finder().find_creation_block(address)
+        self.node.calls.clear()
+
+        # Act
+        finder = self.make_finder(chain_id=1)
+        creation_block = finder.find_creation_block(Web3.to_checksum_address(address))
+
+        # Assert
+        self.assertEqual(creation_block, CREATION_BLOCKS[address])
+        self.assertEqual(self.node.calls, {})
+
+    def test_interrupted_search_resumes_from_its_probes(self):
+        # Arrange
+        address = "0x" + "11" * 20
+        cache = CreationBlockCache(self.cache_path)
+        cache.store_probes(1, [(address, 100_000, False), (address, 200_000, True)])
+        cache.close()
+
+        # Act
+        creation_block = self.make_finder().find_creation_block(address)
+
+        # Assert
+        self.assertEqual(creation_block, CREATION_BLOCKS[address])
+        # A bisection of the 100,000 blocks left rather than the whole chain
+        self.assertLessEqual(self.node.calls["eth_getCode"], 17)
+
+    def test_failed_probe_aborts_the_search_without_caching_a_guess(self):
+        # Arrange
+        address = "0x" + "11" * 20
+        self.node.failing_probes = {(address, _probe_blocks(0, LATEST_BLOCK, 1)[0])}
+
+        # Act
+        with self.assertRaises(Exception):
+            self.make_finder().find_creation_block(address)
+        self.node.failing_probes = set()
+        creation_block = self.make_finder().find_creation_block(address)
+
+        # Assert
+        self.assertEqual(creation_block, CREATION_BLOCKS[address])
+
+    def test_failed_probe_leaves_only_its_address_unresolved_in_lockstep(self):
+        # Arrange
+        failing, healthy = "0x" + "11" * 20, "0x" + "22" * 20
+        self.node.failing_probes = {(failing, _probe_blocks(0, LATEST_BLOCK, 1)[0])}
+
+        # Act
+        creation_blocks = self.make_finder().find_creation_blocks([failing, healthy])
+
+        # Assert
+        self.assertEqual(creation_blocks, {failing: None, healthy: CREATION_BLOCKS[healthy]})
+        cache = CreationBlockCache(self.cache_path)
+        self.addCleanup(cache.close)
+        self.assertEqual(cache.creation_blocks(1, [failing, healthy]), {healthy: 1})
+
+    def test_address_without_code_is_neither_searched_nor_cached(self):
+        # Arrange
+        address = "0x" + "55" * 20
+
+        # Act
+        with self.assertRaises(NoCodeError):
+            self.make_finder().find_creation_block(address)
+
+        # Assert
+        self.assertEqual(self.node.calls["eth_getCode"], 1)
+        cache = CreationBlockCache(self.cache_path)
+        self.addCleanup(cache.close)
+        self.assertEqual(cache.creation_blocks(1, [address]), {})
+
+
+class TestBulkCli(unittest.TestCase):
+    """
+    Tests for reading addresses in bulk and streaming their creation blocks.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.node = StubNode(CREATION_BLOCKS).__enter__()
+        self.addCleanup(self.node.__exit__)
+
+    def run_cli(self, output_format, *options, addresses=tuple(CREATION_BLOCKS)):
+        input_path = os.path.join(self.directory, "addresses.txt")
+        output_path = os.path.join(self.directory, f"creation_blocks.{output_format}")
+        with open(input_path, "w") as f:
+            f.write("# from the indexer\n")
+            for address in addresses:
+                f.write(f"{address}\n{address.upper().replace('0X', '0x')}\n\n")
+        main(
+            [
+                input_path,
+                "--output",
+                output_path,
+                "--format",
+                output_format,
+                "--rpc-url",
+                self.node.url,
+                "--no-cache",
+                "--concurrency",
+                "2",
+                "--chunk-size",
+                "3",
+                *options,
+            ]
+        )
+        return output_path
+
+    def test_addresses_are_checksummed_once_each(self):
+        # Arrange
+        lines = [
+            "0x" + "ab" * 20,
+            " 0x" + "AB" * 20 + "\n",
+            "# comment",
+            "",
+            "0x12",
+            "0x" + "cd" * 20,
+        ]
+
+        # Act
+        addresses = list(read_addresses(lines))
+
+        # Assert
+        self.assertEqual(
+            addresses,
+            [
+                Web3.to_checksum_address("0x" + "ab" * 20),
+                Web3.to_checksum_address("0x" + "cd" * 20),
+            ],
+        )
+
+    def test_jsonl_holds_one_result_per_address(self):
+        # Act
+        with open(self.run_cli("jsonl")) as f:
+            records = [json.loads(line) for line in f]
+
+        # Assert
+        self.assertEqual(
+            {record["address"].lower(): record["creation_block"] for record in records},
+            CREATION_BLOCKS,
+        )
+        self.assertEqual(len(records), len(CREATION_BLOCKS))
+        self.assertTrue(all(record["error"] is None for record in records))
+
+    def test_search_options_reach_the_finder(self):
+        # Act
+        with mock.patch("main.ContractFinder", wraps=ContractFinder) as finder_class:
+            self.run_cli(
+                "jsonl",
+                "--no-creator-lookup",
+                "--log-bound",
+                "--search-arity",
+                "4",
+                "--chain-id",
+                "1",
+            )
+
+        # Assert
+        options = finder_class.call_args.kwargs
+        self.assertFalse(options["use_creator_lookup"])
+        self.assertTrue(options["use_log_bound"])
+        self.assertEqual(options["search_arity"], 4)
+        self.assertEqual(options["chain_id"], 1)
+        self.assertNotIn("ots_getContractCreator", self.node.calls)
+
+    def test_single_address_chunks_use_the_k_ary_search(self):
+        # Act
+        with open(self.run_cli("jsonl", "--chunk-size", "1", "--search-arity", "8")) as f:
+            records = [json.loads(line) for line in f]
+
+        # Assert
+        self.assertEqual(
+            {record["address"].lower(): record["creation_block"] for record in records},
+            CREATION_BLOCKS,
+        )
+
+    def test_address_without_code_is_reported_as_an_error(self):
+        # Arrange
+        account = "0x" + "55" * 20
+
+        for chunk_size in ("1", "3"):
+            # Act
+            output_path = self.run_cli(
+                "jsonl", "--chunk-size", chunk_size, addresses=(*CREATION_BLOCKS, account)
+            )
+            with open(output_path) as f:
+                records = {json.loads(line)["address"].lower(): json.loads(line) for line in f}
+
+            # Assert
+            self.assertEqual(
+                records.pop(account),
+                {
+                    "address": Web3.to_checksum_address(account),
+                    "creation_block": None,
+                    "error": NO_CODE_ERROR,
+                },
+                f"chunk size {chunk_size}",
+            )
+            self.assertEqual(
+                {address: record["creation_block"] for address, record in records.items()},
+                CREATION_BLOCKS,
+            )
+
+    def test_csv_has_header_and_one_row_per_address(self):
+        # Act
+        with open(self.run_cli("csv"), newline="") as f:
+            rows = list(csv.DictReader(f))
+
+        # Assert
+        self.assertEqual(
+            {row["address"].lower(): int(row["creation_block"]) for row in rows},
+            CREATION_BLOCKS,
+        )
+        self.assertEqual(len(rows), len(CREATION_BLOCKS))
+
+
+if __name__ == "__main__":
+    unittest.main()
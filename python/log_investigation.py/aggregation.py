@@ -0,0 +1,220 @@
+import heapq
+
+try:
+    import numpy as np
+except ImportError:  # Only the columnar engine needs numpy
+    np = None
+
+LIMB_BITS = 16  # Sub-limb width used for exact float64 bincount sums (< 2**37 rows per group)
+LIMB_MASK = (1 << LIMB_BITS) - 1
+
+
+def build_address_index(logs, event_arg: str, amount_arg: str, index=None) -> dict:
+    """
+    Single pass over decoded logs that maps every address seen to its
+    [count, total_amount]. Pass an existing index to fold more logs into it.
+
+    Logs are decoded event logs (web3 event data or equivalent dicts) whose
+    'args' hold the address and amount arguments.
+    """
+    index = {} if index is None else index
+    for log in logs:
+        args = log["args"]
+        entry = index.get(args[event_arg])
+        if entry is None:
+            index[args[event_arg]] = [1, args[amount_arg]]
+        else:
+            entry[0] += 1
+            entry[1] += args[amount_arg]
+    return index
+
+
+class EventAccumulator:
+    """
+    Running per-address totals for one event, folded in chunk by chunk as
+    logs arrive, so decoded logs never need to be kept around. Every address
+    is indexed, so any number of addresses and leaderboards can be answered
+    from the same pass.
+    """
+
+    def __init__(self, event_name: str, event_arg: str, amount_arg: str):
+        """
+        Args:
+            event_name: Name of the event being accumulated.
+            event_arg: Argument holding the address (e.g. 'hearter').
+            amount_arg: Argument holding the amount in wei (e.g. 'amount').
+        """
+        self.event_name = event_name
+        self.event_arg = event_arg
+        self.amount_arg = amount_arg
+        self.index = {}
+        self.log_count = 0
+
+    def add_logs(self, logs):
+        build_address_index(logs, self.event_arg, self.amount_arg, self.index)
+        self.log_count += len(logs)
+
+    def remove_logs(self, logs):
+        """Takes logs back out of the totals, e.g. after a chain reorg."""
+        for log in logs:
+            args = log["args"]
+            entry = self.index[args[self.event_arg]]
+            entry[0] -= 1
+            entry[1] -= args[self.amount_arg]
+            if entry[0] == 0:
+                del self.index[args[self.event_arg]]
+        self.log_count -= len(logs)
+
+    def to_state(self) -> dict:
+        return {"index": self.index, "log_count": self.log_count}
+
+    def load_state(self, state: dict):
+        self.index = {address: list(entry) for address, entry in state["index"].items()}
+        self.log_count = state["log_count"]
+
+    def result(self, address: str) -> dict:
+        """Returns {'count', 'total_amount'} so far for a checksummed address."""
+        count, total_amount = self.index.get(address, (0, 0))
+        return {"count": count, "total_amount": total_amount}
+
+    def top(self, n: int, by: str = "total_amount") -> list:
+        """
+        Leaderboard of the n addresses with the highest total_amount (or count),
+        as (address, {'count', 'total_amount'}) pairs.
+        """
+        position = 0 if by == "count" else 1
+        leaders = heapq.nlargest(
+            n, self.index.items(), key=lambda item: item[1][position]
+        )
+        return [
+            (address, {"count": count, "total_amount": total_amount})
+            for address, (count, total_amount) in leaders
+        ]
+
+
+def split_amounts(amounts):
+    """
+    Splits wei amounts (Python ints below 2**128) into high and low uint64 limbs.
+
+    Raises:
+        OverflowError: If an amount does not fit in 128 bits.
+    """
+    values = np.array(amounts, dtype=object)
+    low = (values & 0xFFFFFFFFFFFFFFFF).astype(np.uint64)
+    high = (values >> 64).astype(np.uint64)
+    return high, low
+
+
+def _grouped_sums(group_ids, high, low, n_groups):
+    """
+    Exact per-group sums of 128-bit amounts, returned as Python ints.
+    Each 64-bit limb is cut into 16-bit pieces so np.bincount's float64
+    accumulation cannot lose precision.
+    """
+    totals = np.zeros(n_groups, dtype=object)
+    for limb_shift, limb in ((0, low), (64, high)):
+        for piece_shift in range(0, 64, LIMB_BITS):
+            piece = ((limb >> np.uint64(piece_shift)) & np.uint64(LIMB_MASK)).astype(
+                np.float64
+            )
+            sums = np.bincount(group_ids, weights=piece, minlength=n_groups)
+            totals += sums.astype(np.int64).astype(object) << (limb_shift + piece_shift)
+    return totals.tolist()
+
+
+class ColumnarAggregator:
+    """
+    Vectorized analytics over the column arrays of one event (e.g. from
+    EventDecoder.decode_columns or a Parquet export): addresses are mapped to
+    dense integer ids and wei amounts to high/low uint64 limbs, and group-bys,
+    time series and percentiles are computed with NumPy ufuncs.
+    Requires numpy.
+    """
+
+    def __init__(self, addresses, amounts, block_numbers):
+        """
+        Args:
+            addresses: Address of each event (the event's address argument).
+            amounts: Wei amount of each event, as Python ints.
+            block_numbers: Block number of each event.
+        """
+        if np is None:
+            raise ImportError("Columnar aggregation needs numpy: pip install numpy")
+        # Dense ids in order of first appearance; a dict beats np.unique on strings
+        address_to_id = {}
+        self.address_ids = np.fromiter(
+            (address_to_id.setdefault(a, len(address_to_id)) for a in addresses),
+            dtype=np.int64,
+            count=len(addresses),
+        )
+        self.address_labels = list(address_to_id)
+        self.amount_high, self.amount_low = split_amounts(amounts)
+        self.block_numbers = np.asarray(block_numbers, dtype=np.int64)
+
+    @classmethod
+    def from_columns(cls, table: dict, event_arg: str, amount_arg: str):
+        """Builds an aggregator from one event's column table."""
+        return cls(table[event_arg], table[amount_arg], table["blockNumber"])
+
+    def __len__(self):
+        return len(self.block_numbers)
+
+    def group_by_address(self) -> dict:
+        """Returns {address: {'count', 'total_amount'}} for every address."""
+        n_groups = len(self.address_labels)
+        counts = np.bincount(self.address_ids, minlength=n_groups)
+        totals = _grouped_sums(
+            self.address_ids, self.amount_high, self.amount_low, n_groups
+        )
+        return {
+            address: {"count": int(count), "total_amount": total}
+            for address, count, total in zip(
+                self.address_labels, counts.tolist(), totals
+            )
+        }
+
+    def time_series(self, bucket_blocks: int, start_block: int = None) -> list:
+        """
+        Event count and total amount per bucket of bucket_blocks blocks,
+        as [(bucket_start_block, count, total_amount), ...].
+        """
+        if not len(self):
+            return []
+        if start_block is None:
+            start_block = int(self.block_numbers.min())
+        buckets = (self.block_numbers - start_block) // bucket_blocks
+        n_buckets = int(buckets.max()) + 1
+        counts = np.bincount(buckets, minlength=n_buckets)
+        totals = _grouped_sums(buckets, self.amount_high, self.amount_low, n_buckets)
+        return [
+            (start_block + bucket * bucket_blocks, int(count), total)
+            for bucket, (count, total) in enumerate(zip(counts.tolist(), totals))
+        ]
+
+    def value_series(self, bucket_blocks: int, prices, start_block: int = None) -> list:
+        """
+        Value of the amounts per bucket, in the same buckets as time_series,
+        with every event priced on its own: prices holds the price of one
+        whole token (10**18 units) for each row. Computed on float64.
+        """
+        if not len(self):
+            return []
+        if start_block is None:
+            start_block = int(self.block_numbers.min())
+        buckets = (self.block_numbers - start_block) // bucket_blocks
+        values = self._float_amounts() / 10**18 * np.asarray(prices, dtype=np.float64)
+        return np.bincount(buckets, weights=values, minlength=int(buckets.max()) + 1).tolist()
+
+    def percentiles(self, q=(50, 90, 99)) -> dict:
+        """
+        Amount percentiles in wei. Computed on float64, so they are
+        approximate (about 15 significant digits).
+        """
+        if not len(self):
+            return {}
+        return dict(zip(q, np.percentile(self._float_amounts(), q).tolist()))
+
+    def _float_amounts(self):
+        return self.amount_high.astype(np.float64) * 2.0**64 + self.amount_low.astype(
+            np.float64
+        )
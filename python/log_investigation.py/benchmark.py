@@ -0,0 +1,303 @@
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+from rich.align import Align
+from rich.console import Console
+from rich.table import Table
+from web3 import Web3
+
+from aggregation import ColumnarAggregator, EventAccumulator
+from decoder import EventDecoder
+from fake_node import DEFAULT_HEAD_BLOCK, FakeNode, SyntheticLogs
+from investigation import (
+    ABI,
+    CONTRACT_ADDRESS,
+    EVENT_CONFIGS,
+    MAX_BLOCK_RANGE_PER_REQUEST,
+    fetch_event_logs_in_chunks,
+    normalize_log,
+)
+from metrics import RunMetrics
+
+DEFAULT_BLOCKS = 50_000
+DEFAULT_REPEAT = 3  # Timed runs per benchmark; the best one is reported
+DEFAULT_TOLERANCE = 0.2  # Slowdown against the baseline reported as a regression
+MAX_IN_FLIGHT = 8
+
+# Fetch scenarios: FakeNode settings per fetch strategy to compare
+SCENARIOS = {
+    "baseline": {},
+    "latency": {"latency": 0.05},
+    "rate-limited": {"rate_limit_probability": 0.05},
+    "range-limited": {"max_block_range": 2_000},
+    "result-limited": {"max_results": 1_000},
+}
+# Throughput figures, higher is better; compared against a baseline run
+THROUGHPUT_KEYS = ("blocks_per_second", "logs_per_second")
+
+
+def _best_of(repeat: int, run):
+    """Calls run() repeat times and returns the result of the fastest call and its seconds."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        seconds = time.perf_counter() - started
+        if best is None or seconds < best[1]:
+            best = (result, seconds)
+    return best
+
+
+def _peak_memory_mb(run) -> float:
+    """Peak Python heap allocated by run(), in MB. Run apart from timing: tracing is slow."""
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_fetch(scenario: str, blocks: int, repeat: int) -> dict:
+    """
+    End-to-end fetch_event_logs_in_chunks (fetching, decoding and
+    aggregating every event) against a FakeNode set up per scenario.
+    Range sizes start from MAX_BLOCK_RANGE_PER_REQUEST on every run, and
+    neither the log cache nor the learned range sizes are touched.
+    """
+    event_configs = list(EVENT_CONFIGS.values())
+    event_names = [config["name"] for config in event_configs]
+    synthetic_logs = SyntheticLogs(CONTRACT_ADDRESS, ABI, event_names)
+    to_block = DEFAULT_HEAD_BLOCK - 1_000
+    from_block = to_block - blocks + 1
+
+    with FakeNode(synthetic_logs, **SCENARIOS[scenario]) as node:
+        contract = Web3().eth.contract(address=CONTRACT_ADDRESS, abi=ABI)
+
+        def run():
+            accumulators = {
+                config["name"]: EventAccumulator(
+                    config["name"], config["event_arg"], config["amount_arg"]
+                )
+                for config in event_configs
+            }
+            metrics = RunMetrics()
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, failed_ranges = fetch_event_logs_in_chunks(
+                    contract,
+                    event_names,
+                    from_block,
+                    to_block,
+                    MAX_BLOCK_RANGE_PER_REQUEST,
+                    [node.url],
+                    finalized_block=to_block,
+                    on_logs=lambda name, logs: accumulators[name].add_logs(logs),
+                    keep_logs=False,
+                    max_in_flight=MAX_IN_FLIGHT,
+                    metrics=metrics,
+                    range_sizes_path=None,
+                )
+            if failed_ranges:
+                raise RuntimeError(f"Scenario {scenario} left blocks unfetched: {failed_ranges}")
+            return metrics
+
+        metrics, seconds = _best_of(repeat, run)
+        peak_memory_mb = _peak_memory_mb(run)
+
+    summary = metrics.summary()
+    endpoint = summary["endpoints"][node.url]
+    return {
+        "benchmark": f"fetch/{scenario}",
+        "seconds": seconds,
+        "blocks_per_second": blocks / seconds,
+        "logs_per_second": summary["logs"] / seconds,
+        "logs": summary["logs"],
+        "requests": endpoint["requests"],
+        "rate_limited": endpoint["rate_limited"],
+        "splits": endpoint["splits"],
+        "peak_memory_mb": peak_memory_mb,
+    }
+
+
+def _raw_logs(blocks: int):
+    """
+    A decoder and the raw logs of every event over blocks, normalized the
+    way the fetch hands them to the decoder.
+    """
+    event_names = [config["name"] for config in EVENT_CONFIGS.values()]
+    synthetic_logs = SyntheticLogs(CONTRACT_ADDRESS, ABI, event_names)
+    raw_logs = [normalize_log(log) for log in synthetic_logs.logs(0, blocks - 1)]
+    return EventDecoder(ABI, event_names), raw_logs
+
+
+def benchmark_decode(blocks: int, repeat: int) -> dict:
+    """EventDecoder.decode over the logs of blocks blocks."""
+    decoder, raw_logs = _raw_logs(blocks)
+
+    def run():
+        return [decoder.decode(raw_log) for raw_log in raw_logs]
+
+    _, seconds = _best_of(repeat, run)
+    return {
+        "benchmark": "decode",
+        "seconds": seconds,
+        "blocks_per_second": blocks / seconds,
+        "logs_per_second": len(raw_logs) / seconds,
+        "logs": len(raw_logs),
+        "peak_memory_mb": _peak_memory_mb(run),
+    }
+
+
+def benchmark_aggregation(blocks: int, repeat: int) -> dict:
+    """
+    Per-address aggregation (EventAccumulator) plus the columnar time series
+    (ColumnarAggregator) over pre-decoded logs, the work the investigation
+    does after decoding.
+    """
+    decoder, raw_logs = _raw_logs(blocks)
+    decoded_by_event = {}
+    for raw_log in raw_logs:
+        decoded_log = decoder.decode(raw_log)
+        decoded_by_event.setdefault(decoded_log["event"], []).append(decoded_log)
+    configs = {config["name"]: config for config in EVENT_CONFIGS.values()}
+
+    def run():
+        for name, logs in decoded_by_event.items():
+            config = configs[name]
+            accumulator = EventAccumulator(name, config["event_arg"], config["amount_arg"])
+            accumulator.add_logs(logs)
+            accumulator.top(10)
+            aggregator = ColumnarAggregator(
+                [log["args"][config["event_arg"]] for log in logs],
+                [log["args"][config["amount_arg"]] for log in logs],
+                [log["blockNumber"] for log in logs],
+            )
+            aggregator.time_series(max(1, blocks // 100), 0)
+
+    _, seconds = _best_of(repeat, run)
+    return {
+        "benchmark": "aggregation",
+        "seconds": seconds,
+        "blocks_per_second": blocks / seconds,
+        "logs_per_second": len(raw_logs) / seconds,
+        "logs": len(raw_logs),
+        "peak_memory_mb": _peak_memory_mb(run),
+    }
+
+
+def run_benchmarks(scenarios, blocks: int = DEFAULT_BLOCKS, repeat: int = DEFAULT_REPEAT) -> list:
+    """Runs the decode and aggregation benchmarks and a fetch benchmark per scenario."""
+    results = [benchmark_decode(blocks, repeat), benchmark_aggregation(blocks, repeat)]
+    for scenario in scenarios:
+        print(f"Benchmarking fetch/{scenario}...", file=sys.stderr)
+        results.append(benchmark_fetch(scenario, blocks, repeat))
+    return results
+
+
+def find_regressions(results: list, baseline: list, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """
+    Compares throughput with a baseline run and returns a message for every
+    figure that dropped by more than tolerance (a fraction).
+    """
+    baseline_by_name = {result["benchmark"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_by_name.get(result["benchmark"])
+        if previous is None:
+            continue
+        for key in THROUGHPUT_KEYS:
+            if result[key] < previous[key] * (1 - tolerance):
+                regressions.append(
+                    f"{result['benchmark']} {key}: {result[key]:.0f} "
+                    f"(baseline {previous[key]:.0f}, {result[key] / previous[key] - 1:+.0%})"
+                )
+    return regressions
+
+
+def render_results(results: list, console=None):
+    console = console or Console()
+    table = Table(title="Benchmarks", show_lines=True, title_style="bold magenta")
+    table.add_column("Benchmark", style="cyan", no_wrap=True)
+    table.add_column("Seconds", style="green", justify="right")
+    table.add_column("Blocks/s", style="green", justify="right")
+    table.add_column("Logs/s", style="green", justify="right")
+    table.add_column("Requests", style="magenta", justify="right")
+    table.add_column("429s", style="yellow", justify="right")
+    table.add_column("Splits", style="yellow", justify="right")
+    table.add_column("Peak MB", style="magenta", justify="right")
+    for result in results:
+        table.add_row(
+            result["benchmark"],
+            f"{result['seconds']:.3f}",
+            f"{result['blocks_per_second']:.0f}",
+            f"{result['logs_per_second']:.0f}",
+            str(result.get("requests", "")),
+            str(result.get("rate_limited", "")),
+            str(result.get("splits", "")),
+            f"{result['peak_memory_mb']:.1f}",
+        )
+    console.print(Align.center(table))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark fetching, decoding and aggregating Memebase logs against a "
+        "local fake JSON-RPC node."
+    )
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help=f"Comma-separated fetch scenarios (default: all of {', '.join(SCENARIOS)})",
+    )
+    parser.add_argument(
+        "--blocks", type=int, default=DEFAULT_BLOCKS, help="Blocks per benchmark run"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per benchmark, best is kept"
+    )
+    parser.add_argument("--save", metavar="PATH", help="Write the results to this JSON file")
+    parser.add_argument(
+        "--baseline",
+        metavar="PATH",
+        help="Results JSON of an earlier run; exit 1 if throughput regressed",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"Throughput drop counted as a regression (default: {DEFAULT_TOLERANCE})",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the results as JSON instead of a table"
+    )
+    args = parser.parse_args(argv)
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Unknown scenarios: {', '.join(unknown)}")
+
+    results = run_benchmarks(scenarios, args.blocks, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        render_results(results)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"⚠️ Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
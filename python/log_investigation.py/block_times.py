@@ -0,0 +1,153 @@
+import asyncio
+import os
+import sqlite3
+import threading
+
+DEFAULT_BLOCK_TIMES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "block_times.sqlite"
+)
+SAMPLE_INTERVAL = 1_000  # Blocks between sampled timestamps; others are interpolated
+BATCH_SIZE = 100  # eth_getBlockByNumber calls per JSON-RPC batch
+
+
+class BlockTimeIndex:
+    """
+    On-disk sparse index of block timestamps, per chain.
+
+    Only the sampled blocks are stored; timestamps in between are
+    interpolated by BlockTimeResolver. Use ":memory:" for a throwaway index.
+    """
+
+    def __init__(self, path: str = DEFAULT_BLOCK_TIMES_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS block_times (
+                chain_id INTEGER NOT NULL,
+                block_number INTEGER NOT NULL,
+                timestamp INTEGER NOT NULL,
+                PRIMARY KEY (chain_id, block_number)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, chain_id: int, block_numbers) -> dict:
+        """Returns {block_number: timestamp} for the given blocks that are indexed."""
+        block_numbers = sorted(set(block_numbers))
+        if not block_numbers:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT block_number, timestamp FROM block_times "
+                "WHERE chain_id = ? AND block_number BETWEEN ? AND ?",
+                (chain_id, block_numbers[0], block_numbers[-1]),
+            ).fetchall()
+        wanted = set(block_numbers)
+        return {block: timestamp for block, timestamp in rows if block in wanted}
+
+    def store(self, chain_id: int, timestamps: dict):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO block_times VALUES (?, ?, ?)",
+                [(chain_id, block, timestamp) for block, timestamp in timestamps.items()],
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class BlockTimeResolver:
+    """
+    Resolves block numbers to timestamps with a handful of requests.
+
+    Timestamps are only fetched for sampled blocks (every sample_interval
+    blocks, plus the head for blocks past the last full interval), many per
+    HTTP request via JSON-RPC batches, and kept in a BlockTimeIndex. Every
+    other block is linearly interpolated between its two samples, which is
+    exact on chains with a fixed block time and close elsewhere.
+    """
+
+    def __init__(
+        self,
+        client,
+        index: BlockTimeIndex,
+        chain_id: int,
+        sample_interval: int = SAMPLE_INTERVAL,
+        batch_size: int = BATCH_SIZE,
+    ):
+        """
+        Args:
+            client: AsyncRpcClient the samples are fetched with.
+            index: Index the samples are read from and stored to.
+            chain_id: Chain the block numbers belong to.
+            sample_interval: Blocks between samples.
+            batch_size: Blocks fetched per JSON-RPC batch.
+        """
+        self.client = client
+        self.index = index
+        self.chain_id = chain_id
+        self.sample_interval = sample_interval
+        self.batch_size = batch_size
+
+    def _samples(self, block_number: int, last_block: int):
+        low = block_number - block_number % self.sample_interval
+        return low, min(low + self.sample_interval, last_block)
+
+    async def _fetch(self, block_numbers: list) -> dict:
+        batches = [
+            block_numbers[i : i + self.batch_size]
+            for i in range(0, len(block_numbers), self.batch_size)
+        ]
+        results = await asyncio.gather(
+            *(
+                self.client.call_batch(
+                    [("eth_getBlockByNumber", [hex(block), False]) for block in batch]
+                )
+                for batch in batches
+            )
+        )
+        return {
+            block: int(result["timestamp"], 16)
+            for batch, batch_results in zip(batches, results)
+            for block, result in zip(batch, batch_results)
+        }
+
+    async def resolve(self, block_numbers, head_block: int = None) -> dict:
+        """
+        Returns {block_number: timestamp} for every given block. head_block
+        caps the samples; without it the highest given block is used, which
+        is always safe but is less likely to be indexed already.
+        """
+        block_numbers = sorted(set(block_numbers))
+        if not block_numbers:
+            return {}
+        last_block = max(block_numbers[-1], head_block or 0)
+        samples = {
+            sample
+            for block in block_numbers
+            for sample in self._samples(block, last_block)
+        }
+
+        known = self.index.get(self.chain_id, samples)
+        missing = sorted(samples - known.keys())
+        if missing:
+            fetched = await self._fetch(missing)
+            self.index.store(self.chain_id, fetched)
+            known.update(fetched)
+
+        timestamps = {}
+        for block in block_numbers:
+            if block in known:
+                timestamps[block] = known[block]
+                continue
+            low, high = self._samples(block, last_block)
+            slope = (known[high] - known[low]) / (high - low)
+            timestamps[block] = round(known[low] + (block - low) * slope)
+        return timestamps
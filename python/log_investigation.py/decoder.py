@@ -0,0 +1,123 @@
+from functools import lru_cache
+
+from eth_utils import keccak, to_checksum_address
+
+# Static ABI types that occupy exactly one 32-byte word
+WORD_TYPES = ("address", "bool", "bytes32") + tuple(f"uint{bits}" for bits in range(8, 257, 8))
+
+
+@lru_cache(maxsize=None)
+def _checksum(address_hex: str) -> str:
+    return to_checksum_address(address_hex)
+
+
+def _decode_word(abi_type: str, word_hex: str):
+    if abi_type == "address":
+        return _checksum("0x" + word_hex[24:])
+    if abi_type == "bool":
+        return word_hex[-1] != "0"
+    if abi_type == "bytes32":
+        return bytes.fromhex(word_hex)
+    return int(word_hex, 16)
+
+
+class EventDecoder:
+    """
+    Fast decoder for raw JSON-RPC logs of events whose arguments are all
+    single-word static types (address, bool, bytes32, uintN), such as the
+    Memebase events. It reads straight from the topics and the data hex, so
+    it skips web3's generic ABI machinery entirely.
+
+    The topic0 -> event map is built once from the ABI.
+    """
+
+    def __init__(self, abi, event_names=None):
+        """
+        Args:
+            abi: Contract ABI (list of dicts).
+            event_names: Events to support. Defaults to every event in the ABI.
+
+        Raises:
+            ValueError: If a requested event is missing or has unsupported argument types.
+        """
+        self.events = {}  # topic0 -> (name, [(arg, type, topic index or data word index, indexed)])
+        self.topics = {}  # name -> topic0
+        events_in_abi = {item["name"]: item for item in abi if item.get("type") == "event"}
+        for name in event_names or events_in_abi:
+            if name not in events_in_abi:
+                raise ValueError(f"Event {name} not found in ABI")
+            inputs = events_in_abi[name]["inputs"]
+            unsupported = [i["type"] for i in inputs if i["type"] not in WORD_TYPES]
+            if unsupported:
+                raise ValueError(f"Event {name} has unsupported argument types: {unsupported}")
+
+            signature = f"{name}({','.join(i['type'] for i in inputs)})"
+            topic0 = "0x" + keccak(text=signature).hex()
+            fields = []
+            topic_position = data_position = 0
+            for item in inputs:
+                if item.get("indexed"):
+                    topic_position += 1
+                    fields.append((item["name"], item["type"], topic_position, True))
+                else:
+                    fields.append((item["name"], item["type"], data_position, False))
+                    data_position += 1
+            self.events[topic0] = (name, fields)
+            self.topics[name] = topic0
+
+    def event_name(self, raw_log):
+        """Returns the event name of a raw log, or None if it is not a known event."""
+        event = self.events.get(raw_log["topics"][0].lower()) if raw_log["topics"] else None
+        return event[0] if event else None
+
+    def decode(self, raw_log) -> dict:
+        """
+        Decodes one raw log (hex topics/data, as returned by eth_getLogs) into a
+        dict with 'event', 'args', 'blockNumber', 'transactionHash', 'logIndex'
+        and 'address'. Addresses in args are checksummed, like web3 does.
+        """
+        name, fields = self.events[raw_log["topics"][0].lower()]
+        topics = raw_log["topics"]
+        data = raw_log["data"][2:]
+        args = {}
+        for arg, abi_type, position, indexed in fields:
+            word = topics[position][2:] if indexed else data[position * 64 : (position + 1) * 64]
+            args[arg] = _decode_word(abi_type, word)
+        return {
+            "event": name,
+            "args": args,
+            "address": raw_log["address"],
+            "blockNumber": raw_log["blockNumber"],
+            "transactionHash": raw_log["transactionHash"],
+            "logIndex": raw_log["logIndex"],
+        }
+
+    def decode_columns(self, raw_logs) -> dict:
+        """
+        Batch-decodes a chunk into column arrays, one table per event:
+        {event_name: {"blockNumber": [...], "transactionHash": [...],
+        "logIndex": [...], <arg>: [...], ...}}. Logs of unknown events are skipped.
+        """
+        tables = {}
+        for raw_log in raw_logs:
+            event = self.events.get(raw_log["topics"][0].lower()) if raw_log["topics"] else None
+            if event is None:
+                continue
+            name, fields = event
+            table = tables.get(name)
+            if table is None:
+                table = tables[name] = {
+                    "blockNumber": [],
+                    "transactionHash": [],
+                    "logIndex": [],
+                    **{arg: [] for arg, _, _, _ in fields},
+                }
+            table["blockNumber"].append(raw_log["blockNumber"])
+            table["transactionHash"].append(raw_log["transactionHash"])
+            table["logIndex"].append(raw_log["logIndex"])
+            topics = raw_log["topics"]
+            data = raw_log["data"][2:]
+            for arg, abi_type, position, indexed in fields:
+                word = topics[position][2:] if indexed else data[position * 64 : (position + 1) * 64]
+                table[arg].append(_decode_word(abi_type, word))
+        return tables
@@ -0,0 +1,147 @@
+import os
+
+ROW_GROUP_SIZE = 50_000  # Rows buffered per event before a row group is written
+MAX_DECIMAL_DIGITS = 76  # decimal256 precision
+LIMB_BITS = 64  # Low limb of an integer split in two (see _split_integer)
+LIMB_MASK = 2**LIMB_BITS - 1
+
+
+def _integer_digits(abi_type: str) -> int:
+    """Decimal digits of the largest magnitude an ABI integer type holds."""
+    signed = abi_type.startswith("int")
+    bits = int(abi_type[3 if signed else 4 :] or 256)
+    return len(str(2 ** (bits - 1) if signed else 2**bits - 1))
+
+
+def _is_split(abi_type: str) -> bool:
+    """Whether an ABI integer type is too wide for decimal256, as (u)int256 (78 digits) is."""
+    return (abi_type.startswith("uint") or abi_type.startswith("int")) and (
+        _integer_digits(abi_type) > MAX_DECIMAL_DIGITS
+    )
+
+
+def _split_integer(value: int):
+    """
+    Splits an integer into (value >> 64, its low 64 bits), the limbs of
+    aggregation.split_amounts, so that value == hi * 2**64 + lo.
+    """
+    return value >> LIMB_BITS, value & LIMB_MASK
+
+
+def _arrow_fields(pa, name: str, abi_type: str) -> list:
+    """Parquet columns of one event argument, two limbs for a split integer."""
+    if _is_split(abi_type):
+        # The high limb keeps the remaining 192 bits and the sign, which fit decimal256
+        return [
+            (f"{name}_hi", pa.decimal256(MAX_DECIMAL_DIGITS, 0)),
+            (f"{name}_lo", pa.uint64()),
+        ]
+    if abi_type == "address":
+        return [(name, pa.string())]
+    if abi_type == "bool":
+        return [(name, pa.bool_())]
+    if abi_type.startswith("bytes"):
+        return [(name, pa.binary())]
+    if abi_type.startswith("uint") or abi_type.startswith("int"):
+        return [(name, pa.decimal256(MAX_DECIMAL_DIGITS, 0))]
+    raise ValueError(f"Unsupported ABI type for export: {abi_type}")
+
+
+class ParquetEventWriter:
+    """
+    Writes decoded events as a columnar Parquet dataset laid out as
+    <out_dir>/event=<name>/blocks=<from>-<to>/part-0.parquet, one row per log.
+
+    Rows hold block_number, transaction_hash, log_index and every event
+    argument. Integer arguments are stored exactly and stay numeric: as
+    decimal256(76, 0) where the type fits, and for (u)int256, whose values
+    can reach 78 digits, as <name>_hi and <name>_lo columns, with
+    value == hi * 2**64 + lo (see _split_integer). Logs are buffered per event and flushed in
+    row groups, so the writer can be fed chunk by chunk while fetching.
+    Requires pyarrow.
+    """
+
+    def __init__(self, out_dir: str, abi, event_names, from_block: int, to_block: int):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "Parquet export needs pyarrow: pip install pyarrow"
+            ) from e
+        self._pa = pa
+        self._pq = pq
+        self.out_dir = out_dir
+        self.partition = f"blocks={from_block}-{to_block}"
+
+        events_in_abi = {item["name"]: item for item in abi if item.get("type") == "event"}
+        self._schemas = {}
+        self._arguments = {}  # (name, split into limbs) of each argument, by event
+        for name in event_names:
+            inputs = events_in_abi[name]["inputs"]
+            self._arguments[name] = [(i["name"], _is_split(i["type"])) for i in inputs]
+            self._schemas[name] = pa.schema(
+                [
+                    ("block_number", pa.uint64()),
+                    ("transaction_hash", pa.string()),
+                    ("log_index", pa.uint32()),
+                    *[
+                        field
+                        for i in inputs
+                        for field in _arrow_fields(pa, i["name"], i["type"])
+                    ],
+                ]
+            )
+        self._buffers = {name: [] for name in event_names}
+        self._writers = {}
+        self.rows_written = {name: 0 for name in event_names}
+
+    def path(self, event_name: str) -> str:
+        return os.path.join(
+            self.out_dir, f"event={event_name}", self.partition, "part-0.parquet"
+        )
+
+    def write(self, event_name: str, logs):
+        """Buffers decoded logs of one event, flushing full row groups to disk."""
+        buffer = self._buffers[event_name]
+        buffer.extend(logs)
+        if len(buffer) >= ROW_GROUP_SIZE:
+            self._flush(event_name)
+
+    def _flush(self, event_name: str):
+        buffer = self._buffers[event_name]
+        if not buffer:
+            return
+        schema = self._schemas[event_name]
+        columns = {
+            "block_number": [log["blockNumber"] for log in buffer],
+            "transaction_hash": [log["transactionHash"] for log in buffer],
+            "log_index": [log["logIndex"] for log in buffer],
+        }
+        for name, split in self._arguments[event_name]:
+            values = [log["args"][name] for log in buffer]
+            if split:
+                limbs = [_split_integer(value) for value in values]
+                columns[f"{name}_hi"] = [hi for hi, _ in limbs]
+                columns[f"{name}_lo"] = [lo for _, lo in limbs]
+            else:
+                columns[name] = values
+        table = self._pa.Table.from_pydict(columns, schema=schema)
+
+        writer = self._writers.get(event_name)
+        if writer is None:
+            os.makedirs(os.path.dirname(self.path(event_name)), exist_ok=True)
+            writer = self._writers[event_name] = self._pq.ParquetWriter(
+                self.path(event_name), schema
+            )
+        writer.write_table(table)
+        self.rows_written[event_name] += len(buffer)
+        buffer.clear()
+
+    def close(self):
+        """Flushes what is left and finalizes every file. Events with no logs get no file."""
+        for event_name in self._buffers:
+            self._flush(event_name)
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
@@ -0,0 +1,321 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from eth_utils import keccak
+
+from abi_memebase import memebase_abi
+
+DEFAULT_CHAIN_ID = 8453  # Base
+DEFAULT_HEAD_BLOCK = 31_600_000
+DEFAULT_LOG_INTERVAL = 10  # Every this many blocks holds one log per event
+GENESIS_TIMESTAMP = 1_686_789_347  # Base mainnet
+BLOCK_TIME_SECONDS = 2
+FINALITY_DEPTH = 900  # Blocks between the head and the "finalized" tag
+# Participants of the synthetic events, lowercase like node responses
+DEFAULT_ADDRESSES = tuple(f"0x{i:040x}" for i in range(1, 101))
+# Pending connections the node queues; the default of 5 makes bursts of new
+# connections wait out a SYN retransmit, which would skew benchmark timings
+LISTEN_BACKLOG = 128
+
+
+def _encode_word(abi_type: str, value) -> str:
+    """Encodes a single-word ABI value as 64 hex digits (see decoder._decode_word)."""
+    if abi_type == "address":
+        return value[2:].lower().rjust(64, "0")
+    if abi_type == "bool":
+        return f"{int(value):064x}"
+    if abi_type == "bytes32":
+        return value.hex()
+    return f"{value:064x}"
+
+
+class SyntheticLogs:
+    """
+    Deterministic raw eth_getLogs results for the events of an ABI.
+
+    Every log_interval-th block holds one log of each event. Arguments
+    cycle through addresses, so every address gets a share of every event,
+    and amounts vary with the block. The same range always yields the same
+    logs, which keeps benchmark runs comparable.
+    """
+
+    def __init__(
+        self,
+        contract_address: str,
+        abi=memebase_abi,
+        event_names=None,
+        addresses=DEFAULT_ADDRESSES,
+        log_interval: int = DEFAULT_LOG_INTERVAL,
+    ):
+        """
+        Args:
+            contract_address: Emitting contract.
+            abi: ABI the events are taken from. Only single-word argument types are supported.
+            event_names: Events to emit. Defaults to every event in the ABI.
+            addresses: Pool the address arguments are drawn from.
+            log_interval: Blocks between blocks with logs.
+        """
+        self.contract_address = contract_address.lower()
+        self.addresses = addresses
+        self.log_interval = log_interval
+        events_in_abi = {item["name"]: item for item in abi if item.get("type") == "event"}
+        self.events = []  # (topic0, inputs)
+        for name in event_names or events_in_abi:
+            inputs = events_in_abi[name]["inputs"]
+            signature = f"{name}({','.join(i['type'] for i in inputs)})"
+            self.events.append(("0x" + keccak(text=signature).hex(), inputs))
+
+    def _value(self, abi_type: str, block_number: int, position: int):
+        if abi_type == "address":
+            turn = block_number // self.log_interval + position
+            return self.addresses[turn % len(self.addresses)]
+        if abi_type == "bool":
+            return block_number % 2 == 0
+        if abi_type == "bytes32":
+            return block_number.to_bytes(32, "big")
+        return ((block_number * 7_919 + position) % 1_000 + 1) * 10**15
+
+    def block_logs(self, block_number: int) -> list:
+        """All raw logs of one block."""
+        if block_number % self.log_interval:
+            return []
+        logs = []
+        for log_index, (topic0, inputs) in enumerate(self.events):
+            topics, data = [topic0], ""
+            for position, item in enumerate(inputs):
+                word = _encode_word(item["type"], self._value(item["type"], block_number, position))
+                if item.get("indexed"):
+                    topics.append("0x" + word)
+                else:
+                    data += word
+            logs.append(
+                {
+                    "address": self.contract_address,
+                    "blockNumber": hex(block_number),
+                    "blockHash": f"0x{block_number:064x}",
+                    "transactionHash": f"0x{block_number:056x}{log_index:08x}",
+                    "transactionIndex": hex(log_index),
+                    "logIndex": hex(log_index),
+                    "removed": False,
+                    "topics": topics,
+                    "data": "0x" + data,
+                }
+            )
+        return logs
+
+    def logs(self, from_block: int, to_block: int, address=None, topics=None) -> list:
+        """
+        Raw logs in [from_block, to_block] matching an eth_getLogs filter's
+        address (a string or list) and topics (per position None, a topic
+        or a list of alternatives).
+        """
+        if address is not None:
+            wanted = {a.lower() for a in ([address] if isinstance(address, str) else address)}
+            if self.contract_address not in wanted:
+                return []
+        topic_filters = [
+            None if t is None else {x.lower() for x in ([t] if isinstance(t, str) else t)}
+            for t in topics or []
+        ]
+        first = -(-from_block // self.log_interval) * self.log_interval
+        return [
+            log
+            for block_number in range(first, to_block + 1, self.log_interval)
+            for log in self.block_logs(block_number)
+            if all(
+                allowed is None or (i < len(log["topics"]) and log["topics"][i] in allowed)
+                for i, allowed in enumerate(topic_filters)
+            )
+        ]
+
+
+class FakeNode:
+    """
+    Local stand-in for an EVM JSON-RPC node that serves SyntheticLogs,
+    for offline benchmarks and tests.
+
+    It answers the calls investigation.py makes (eth_getLogs, block
+    numbers and headers, chain id, balances), single or batched, and can
+    inject per-request latency, random 429s and the block range and result
+    size limits of hosted providers. Each request runs on its own thread, so
+    concurrent clients overlap like they do against a real node.
+    Use it as a context manager; the node listens on url while open.
+    """
+
+    def __init__(
+        self,
+        logs: SyntheticLogs,
+        head_block: int = DEFAULT_HEAD_BLOCK,
+        chain_id: int = DEFAULT_CHAIN_ID,
+        latency: float = 0.0,
+        rate_limit_probability: float = 0.0,
+        max_block_range: int = None,
+        max_results: int = None,
+        seed: int = 0,
+        port: int = 0,
+    ):
+        """
+        Args:
+            logs: Logs served by eth_getLogs.
+            head_block: Latest block; the "finalized" tag trails it by FINALITY_DEPTH.
+            chain_id: Value of eth_chainId.
+            latency: Seconds every HTTP request is delayed by.
+            rate_limit_probability: Share of eth_getLogs requests answered with a 429.
+            max_block_range: Largest eth_getLogs range served, None for no limit.
+            max_results: Most logs one eth_getLogs response may hold, None for no limit.
+            seed: Seed of the 429 injection.
+            port: Port to listen on, 0 for any free one.
+        """
+        self.logs = logs
+        self.head_block = head_block
+        self.chain_id = chain_id
+        self.latency = latency
+        self.rate_limit_probability = rate_limit_probability
+        self.max_block_range = max_block_range
+        self.max_results = max_results
+        self.requests = {}  # Method -> calls served
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _block(self, tag):
+        if tag == "latest":
+            number = self.head_block
+        elif tag in ("finalized", "safe"):
+            number = self.head_block - FINALITY_DEPTH
+        else:
+            number = int(tag, 16)
+        if number > self.head_block:
+            return None
+        return {
+            "number": hex(number),
+            "hash": f"0x{number:064x}",
+            "parentHash": f"0x{max(0, number - 1):064x}",
+            "timestamp": hex(GENESIS_TIMESTAMP + number * BLOCK_TIME_SECONDS),
+            "transactions": [],
+            "uncles": [],
+            "difficulty": "0x0",
+            "totalDifficulty": "0x0",
+            "gasLimit": "0x0",
+            "gasUsed": "0x0",
+            "baseFeePerGas": "0x0",
+            "size": "0x0",
+            "extraData": "0x",
+            "logsBloom": "0x" + "00" * 256,
+            "miner": "0x" + "00" * 20,
+            "mixHash": "0x" + "00" * 32,
+            "nonce": "0x" + "00" * 8,
+            "receiptsRoot": "0x" + "00" * 32,
+            "sha3Uncles": "0x" + "00" * 32,
+            "stateRoot": "0x" + "00" * 32,
+            "transactionsRoot": "0x" + "00" * 32,
+        }
+
+    def _get_logs(self, log_filter):
+        from_block = self._block(log_filter.get("fromBlock", "latest"))
+        to_block = self._block(log_filter.get("toBlock", "latest"))
+        from_block = int(from_block["number"], 16) if from_block else self.head_block + 1
+        to_block = int(to_block["number"], 16) if to_block else self.head_block
+        if self.max_block_range and to_block - from_block + 1 > self.max_block_range:
+            raise _RpcFault(
+                -32600, f"block range is too wide, maximum block range is {self.max_block_range}"
+            )
+        logs = self.logs.logs(
+            from_block, to_block, log_filter.get("address"), log_filter.get("topics")
+        )
+        if self.max_results and len(logs) > self.max_results:
+            raise _RpcFault(-32005, f"query returned more than {self.max_results} results")
+        return logs
+
+    def _result(self, method: str, params: list):
+        if method == "eth_getLogs":
+            return self._get_logs(params[0])
+        if method == "eth_blockNumber":
+            return hex(self.head_block)
+        if method == "eth_getBlockByNumber":
+            return self._block(params[0])
+        if method == "eth_chainId":
+            return hex(self.chain_id)
+        if method == "net_version":
+            return str(self.chain_id)
+        if method == "eth_getBalance":
+            return "0x0"
+        raise _RpcFault(-32601, f"the method {method} does not exist")
+
+    def _respond(self, request: dict):
+        method = request.get("method")
+        with self._lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+        try:
+            response = {"result": self._result(method, request.get("params", []))}
+        except _RpcFault as fault:
+            response = {"error": {"code": fault.code, "message": fault.message}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), **response}
+
+    def _rate_limited(self, requests: list) -> bool:
+        if not any(request.get("method") == "eth_getLogs" for request in requests):
+            return False
+        with self._lock:
+            return self._random.random() < self.rate_limit_probability
+
+    def _handler_class(self):
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b"", headers=()):
+                self.send_response(status)
+                for header in headers:
+                    self.send_header(*header)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                requests = payload if isinstance(payload, list) else [payload]
+                if node.latency:
+                    time.sleep(node.latency)
+                if node._rate_limited(requests):
+                    self._send(429, headers=[("Retry-After", "0")])
+                    return
+                responses = [node._respond(request) for request in requests]
+                body = json.dumps(responses if isinstance(payload, list) else responses[0])
+                self._send(200, body.encode(), [("Content-Type", "application/json")])
+
+        return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+
+class _RpcFault(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
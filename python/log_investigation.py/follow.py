@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import time
+
+REORG_DEPTH = 64  # Blocks of recent logs kept so a short reorg can be rolled back
+DEFAULT_POLL_SECONDS = 10
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+
+def checkpoint_path(
+    chain_id: int, contract_address: str, event_names, from_block: int, addresses=None
+) -> str:
+    """
+    Checkpoint file for a chain, contract, event set, scan start and
+    (optional) address filter: aggregates of a different chain or range
+    are not resumed.
+    """
+    name = (
+        f"follow-{chain_id}-{contract_address.lower()}-{from_block}-"
+        f"{'-'.join(sorted(event_names))}"
+    )
+    if addresses:
+        # Filtered aggregates only hold those addresses, so they get their own checkpoint
+        digest = hashlib.sha1(",".join(sorted(a.lower() for a in addresses)).encode())
+        name += f"-{digest.hexdigest()[:12]}"
+    return os.path.join(CHECKPOINT_DIR, name + ".json")
+
+
+class HeadFollower:
+    """
+    Keeps per-address aggregates live by following the chain head.
+
+    Every poll fetches only the blocks after the checkpoint and folds them
+    into the accumulators in place. The hashes of recent tips and the logs
+    of the last REORG_DEPTH blocks are kept, so when a reorg replaces a block
+    we already processed, its logs are taken back out and the blocks are
+    fetched again. The checkpoint (aggregates included) is saved after every
+    poll, so a restart carries on where the last run stopped.
+    """
+
+    def __init__(self, w3, fetch_logs, accumulators, path, reorg_depth=REORG_DEPTH):
+        """
+        Args:
+            w3: Web3 instance used for block numbers and hashes.
+            fetch_logs: Function (from_block, to_block) -> (logs_by_event, failed_ranges).
+            accumulators: Dict of event name -> EventAccumulator, updated in place.
+            path: Checkpoint file.
+            reorg_depth: How many recent blocks can be rolled back.
+        """
+        self.w3 = w3
+        self.fetch_logs = fetch_logs
+        self.accumulators = accumulators
+        self.path = path
+        self.reorg_depth = reorg_depth
+        self.last_block = None
+        self.tips = []  # [(block_number, block_hash)] of recent checkpoints, oldest first
+        self.recent_logs = {}  # block_number -> {event_name: [logs]}
+
+    def load(self) -> bool:
+        """Restores the checkpoint and aggregates. Returns False if there is none."""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self.last_block = state["last_block"]
+        self.tips = [tuple(tip) for tip in state["tips"]]
+        self.recent_logs = {int(block): logs for block, logs in state["recent_logs"].items()}
+        for event_name, accumulator in self.accumulators.items():
+            accumulator.load_state(state["accumulators"][event_name])
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        state = {
+            "last_block": self.last_block,
+            "tips": self.tips,
+            "recent_logs": self.recent_logs,
+            "accumulators": {
+                event_name: accumulator.to_state()
+                for event_name, accumulator in self.accumulators.items()
+            },
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def start(self, last_block: int, tip_hash: str = None):
+        """
+        Starts following after a scan that covered everything up to last_block.
+        tip_hash is the hash of last_block read before the scan, so a reorg
+        during the scan is caught by the first poll; it is read now if None.
+        """
+        self.last_block = last_block
+        self.tips = [(last_block, tip_hash or self.block_hash(last_block))]
+        self.recent_logs = {}
+        self.save()
+
+    def block_hash(self, block_number: int) -> str:
+        return self.w3.to_hex(self.w3.eth.get_block(block_number)["hash"])
+
+    def _rollback_reorg(self):
+        """
+        Checks the latest tip against the chain and, if it was reorged away,
+        rolls the aggregates back to the newest tip that is still canonical.
+        Returns the number of blocks rolled back.
+        """
+        fork_block = None
+        for block_number, block_hash in reversed(self.tips):
+            if self.block_hash(block_number) == block_hash:
+                fork_block = block_number
+                break
+        if fork_block == self.last_block:
+            return 0
+        if fork_block is None:
+            # Deeper than we can track: drop everything we still hold
+            fork_block = self.tips[0][0] - 1 if self.tips else self.last_block
+            print(f"⚠️ Reorg deeper than {self.reorg_depth} blocks, aggregates may be off")
+
+        for block_number in sorted(self.recent_logs):
+            if block_number > fork_block:
+                for event_name, logs in self.recent_logs.pop(block_number).items():
+                    self.accumulators[event_name].remove_logs(logs)
+        self.tips = [tip for tip in self.tips if tip[0] <= fork_block]
+        rolled_back = self.last_block - fork_block
+        self.last_block = fork_block
+        return rolled_back
+
+    def poll_once(self):
+        """
+        Processes the blocks between the checkpoint and the head.
+        Returns the (from_block, to_block) range applied, or None if nothing changed.
+        """
+        rolled_back = self._rollback_reorg()
+        if rolled_back:
+            print(f"\n⚠️ Reorg detected, rolled back {rolled_back} blocks to {self.last_block}")
+
+        head = self.w3.eth.block_number
+        if head <= self.last_block:
+            if rolled_back:
+                self.save()
+            return None
+
+        from_block = self.last_block + 1
+        # Read before fetching: if head is reorged meanwhile, the next poll rolls it back
+        head_hash = self.block_hash(head)
+        logs_by_event, failed_ranges = self.fetch_logs(from_block, head)
+        if failed_ranges:
+            # Apply nothing rather than leave a hole; the next poll retries the range
+            print(f"\n⚠️ Could not fetch {failed_ranges}, retrying on the next poll")
+            return None
+
+        for event_name, logs in logs_by_event.items():
+            self.accumulators[event_name].add_logs(logs)
+            for log in logs:
+                self.recent_logs.setdefault(log["blockNumber"], {}).setdefault(
+                    event_name, []
+                ).append(log)
+
+        self.last_block = head
+        self.tips.append((head, head_hash))
+        oldest_kept = head - self.reorg_depth
+        self.tips = [tip for tip in self.tips if tip[0] > oldest_kept]
+        self.recent_logs = {
+            block: logs for block, logs in self.recent_logs.items() if block > oldest_kept
+        }
+        self.save()
+        return from_block, head
+
+    def run(self, poll_seconds=DEFAULT_POLL_SECONDS, on_update=None):
+        """Polls until interrupted, calling on_update(from_block, to_block) after each delta."""
+        try:
+            while True:
+                applied = self.poll_once()
+                if applied and on_update is not None:
+                    on_update(*applied)
+                time.sleep(poll_seconds)
+        except KeyboardInterrupt:
+            self.save()
+            print(f"\nStopped following at block {self.last_block}, checkpoint saved to {self.path}")
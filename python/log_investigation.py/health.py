@@ -0,0 +1,185 @@
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+
+from rpc_client import AsyncRpcClient, RpcError, classify_log_limit_error
+
+DEFAULT_HEALTH_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "rpc_health.json"
+)
+DEFAULT_HEALTH_TTL_SECONDS = 15 * 60  # Probe results younger than this are reused
+PROBE_TIMEOUT_SECONDS = 10
+LATENCY_SAMPLES = 5  # Sequential eth_blockNumber calls timed per endpoint
+# getLogs ranges tried, largest first
+LOG_RANGE_PROBES = (100_000, 50_000, 10_000, 5_000, 2_000, 1_000, 500, 100)
+ARCHIVE_PROBE_DEPTH = 100_000  # Blocks below head whose state only archive nodes keep
+MAX_HEAD_LAG = 50  # Blocks an endpoint may trail the best head before it is left out
+
+# Empty getLogs filter: nothing matches, so only the range limit can fail it
+ZERO_ADDRESS = "0x" + "00" * 20
+PROBE_TOPIC = "0x" + "00" * 31 + "01"
+
+_health_lock = threading.Lock()
+
+
+def load_health(path=DEFAULT_HEALTH_PATH) -> dict:
+    """Loads the cached probe results by URL."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_health(results: dict, path=DEFAULT_HEALTH_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _health_lock:
+        merged = {**load_health(path), **results}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(merged, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+def latency_percentile(samples: list, q: float) -> float:
+    """Nearest-rank percentile of a list of latencies."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+async def _probe_log_range(client, head_block: int):
+    """Largest of LOG_RANGE_PROBES the endpoint serves, or None if unknown."""
+    for blocks in LOG_RANGE_PROBES:
+        try:
+            await client.get_logs(
+                ZERO_ADDRESS, [PROBE_TOPIC], max(0, head_block - blocks + 1), head_block
+            )
+            return blocks
+        except Exception as exc:
+            if classify_log_limit_error(exc) is None:
+                return None
+    return None
+
+
+async def _probe_archive(client, head_block: int):
+    """Whether old state is served (True), pruned (False), or unknown (None)."""
+    try:
+        await client.call(
+            "eth_getBalance",
+            [ZERO_ADDRESS, hex(max(1, head_block - ARCHIVE_PROBE_DEPTH))],
+        )
+        return True
+    except RpcError:
+        return False
+    except Exception:
+        return None
+
+
+async def probe_endpoint(url: str) -> dict:
+    """
+    Measures one endpoint: eth_blockNumber latency percentiles and head,
+    the largest getLogs range it accepts, and whether it serves archive state.
+    Never raises; a dead endpoint comes back with ok False and the error.
+    """
+    result = {"url": url, "ok": False, "probed_at": time.time()}
+    try:
+        async with AsyncRpcClient(url, max_in_flight=1, timeout=PROBE_TIMEOUT_SECONDS) as client:
+            latencies, heads = [], []
+            for _ in range(LATENCY_SAMPLES):
+                started = time.monotonic()
+                heads.append(int(await client.call("eth_blockNumber", []), 16))
+                latencies.append(time.monotonic() - started)
+            head_block = max(heads)
+            result.update(
+                ok=True,
+                head_block=head_block,
+                latency_p50=latency_percentile(latencies, 50),
+                latency_p90=latency_percentile(latencies, 90),
+                max_log_range=await _probe_log_range(client, head_block),
+                archive=await _probe_archive(client, head_block),
+            )
+    except Exception as exc:
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    return result
+
+
+def rank_endpoints(results) -> list:
+    """
+    Marks endpoints trailing the best head by more than MAX_HEAD_LAG as
+    unhealthy (they would silently miss recent logs) and returns the healthy
+    ones, fastest first.
+    """
+    heads = [r["head_block"] for r in results if r["ok"]]
+    best_head = max(heads) if heads else None
+    for result in results:
+        if not result["ok"]:
+            continue
+        result["head_lag"] = best_head - result["head_block"]
+        if result["head_lag"] > MAX_HEAD_LAG:
+            result["ok"] = False
+            result["error"] = f"{result['head_lag']} blocks behind the best head"
+    return sorted((r for r in results if r["ok"]), key=lambda r: r["latency_p50"])
+
+
+def check_endpoints(
+    urls,
+    ttl=DEFAULT_HEALTH_TTL_SECONDS,
+    path=DEFAULT_HEALTH_PATH,
+    refresh=False,
+    probe=probe_endpoint,
+) -> list:
+    """
+    Returns the probe results of the healthy endpoints, fastest first.
+
+    The probe is skipped when every endpoint has a cached healthy result
+    younger than ttl; a cached failure is always retried, so a brief outage
+    does not outlive the run that saw it. Otherwise all of them are probed again, in parallel, since head
+    lag is only comparable between results taken at the same time, and the
+    results are written back to the cache at path.
+
+    Args:
+        urls: Endpoint URLs.
+        ttl: Seconds a cached result stays valid.
+        path: JSON cache file, or None to neither read nor write one.
+        refresh: Probe every endpoint even if its cached result is fresh.
+        probe: Coroutine function url -> result, probe_endpoint by default.
+    """
+    cached = load_health(path) if path and not refresh else {}
+    now = time.time()
+    results = {
+        url: cached[url]
+        for url in urls
+        if url in cached
+        and cached[url]["ok"]
+        and now - cached[url]["probed_at"] < ttl
+    }
+    from_cache = len(results) == len(urls)
+    if not from_cache:
+
+        async def probe_all():
+            return await asyncio.gather(*(probe(url) for url in urls))
+
+        results = dict(zip(urls, asyncio.run(probe_all())))
+        if path:
+            save_health(results, path)
+
+    # Copies, so the lag check does not leak into the cache
+    results = [dict(results[url]) for url in urls]
+    ranked = rank_endpoints(results)
+    for result in results:
+        if not result["ok"]:
+            print(f"❌ RPC URL failed health check: {result['url']} - Error: {result.get('error')}")
+    for result in ranked:
+        print(
+            f"✅ RPC URL is healthy: {result['url']} "
+            f"(p50 {result['latency_p50'] * 1000:.0f}ms, p90 {result['latency_p90'] * 1000:.0f}ms, "
+            f"max getLogs range {result['max_log_range'] or 'unknown'}, "
+            f"archive {'unknown' if result['archive'] is None else 'yes' if result['archive'] else 'no'}, "
+            f"head lag {result['head_lag']}"
+            + (", cached" if from_cache else "")
+            + ")"
+        )
+    return ranked
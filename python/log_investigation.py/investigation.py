@@ -1,27 +1,37 @@
+import argparse
+import asyncio
+import contextlib
+import cProfile
 import json
 import os
+import pstats
 from web3 import Web3
 from dotenv import load_dotenv
 import time
-import math
+from datetime import datetime, timezone
 import sys
+import threading
 import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import aiohttp
 from rich.console import Console
 from rich.table import Table
 from rich.align import Align
 
 load_dotenv()
-start_time = time.time()
 # --- Configuration (replace with your actual values) ---
-RPC_URLS = [
-    url.strip() for url in os.getenv("RPC_URLS", os.getenv("RPC_URL")).split(",")
-]
 CONTRACT_ADDRESS = "0x82A9c823332518c32a0c0eDC050Ef00934Cf04D4"
 # ADDRESS_TO_INVESTIGATE = "0x39FCE6a33596b7319d7941F3F90d256574bcc954"
-DEFAULT_MAX_RETRIES = 3  # Max retries for fetching a single chunk
+MAX_CHUNK_ATTEMPTS = 8  # Times a chunk is tried (with backoff, across RPCs) before it is recorded as failed
+FINALITY_FALLBACK_DEPTH = 900  # Blocks below head treated as final if the node has no "finalized" tag
 
-# Map event names to their respective address and amount arguments in the ABI
+# Define the default range and chunk size based on the problem statement
+TOTAL_BLOCKS_TO_FETCH = 432000  # on base blockchain 1 day = 432000 blocks
+DEFAULT_END_BLOCK = 31589310  # Last block investigated unless a range is given
+MAX_BLOCK_RANGE_PER_REQUEST = 500  # Starting chunk size (Alchemy's 500 block limit), adapted per RPC
+
+# Map event names to their respective address and amount arguments in the ABI.
+# Each event_arg is an indexed argument (here always topic1), which lets
+# fetch_event_logs_in_chunks filter addresses on the node.
 EVENT_CONFIGS = {
     "1": {"name": "Hearted", "event_arg": "hearter", "amount_arg": "amount"},
     "2": {"name": "Collected", "event_arg": "hearter", "amount_arg": "allocation"},
@@ -36,36 +46,142 @@ EVENT_CONFIGS = {
 
 # --- Load ABI ---
 from abi_memebase import memebase_abi
+from log_cache import (
+    COVERAGE_MAP_WIDTH,
+    DEFAULT_CACHE_PATH,
+    LogCache,
+    chain_cache_path,
+    coverage_map,
+    merge_ranges,
+    range_contains,
+)
+from rpc_client import (
+    AsyncRpcClient,
+    DEFAULT_MAX_IN_FLIGHT,
+    RpcError,
+    classify_log_limit_error,
+    is_rate_limited,
+)
+from scheduler import (
+    DEFAULT_RANGE_SIZES_PATH,
+    ChunkScheduler,
+    load_range_sizes,
+    save_range_sizes,
+)
+from aggregation import ColumnarAggregator, EventAccumulator
+from decoder import EventDecoder
+from export import ParquetEventWriter
+from follow import HeadFollower, checkpoint_path
+from block_times import DEFAULT_BLOCK_TIMES_PATH, BlockTimeIndex, BlockTimeResolver
+from prices import DEFAULT_PRICES_PATH, PriceHistory, utc_date
+from health import DEFAULT_HEALTH_PATH, DEFAULT_HEALTH_TTL_SECONDS, check_endpoints
+from metrics import RunMetrics, to_prometheus
 
 ABI = memebase_abi
 
-# --- Connect to Ethereum Node ---
-w3 = Web3(Web3.HTTPProvider(RPC_URLS[0]))
+# --- Log cache (set LOG_CACHE_PATH to an empty string to disable) ---
+LOG_CACHE_PATH = os.getenv("LOG_CACHE_PATH", DEFAULT_CACHE_PATH)
 
+# Concurrent getLogs requests per RPC URL
+MAX_IN_FLIGHT_PER_RPC = int(os.getenv("MAX_IN_FLIGHT_PER_RPC", DEFAULT_MAX_IN_FLIGHT))
+
+PROFILE_TOP_ENTRIES = 25  # Functions printed by --profile, by cumulative time
+
+
+def split_urls(text):
+    """Splits comma-separated URLs, dropping surrounding whitespace and empty entries."""
+    return [url.strip() for url in text.split(",") if url.strip()]
+
+
+def default_rpc_urls():
+    """
+    Returns the RPC URLs from RPC_URLS (comma-separated), or RPC_URL.
+    """
+    return split_urls(os.getenv("RPC_URLS", os.getenv("RPC_URL", "")))
+
+
+def get_event_topic(abi, event_name):
+    """
+    Returns the topic0 hash (0x-prefixed hex) of an event in the ABI.
+    """
+    for item in abi:
+        if item.get("type") == "event" and item["name"] == event_name:
+            signature = f"{event_name}({','.join(i['type'] for i in item['inputs'])})"
+            return Web3.to_hex(Web3.keccak(text=signature))
+    raise ValueError(f"Event {event_name} not found in ABI")
+
+
+def get_topic_position(abi, event_name, arg_name):
+    """
+    Returns the topic index (1-3) that an indexed event argument is logged
+    at, or None if the argument is not indexed.
+    """
+    for item in abi:
+        if item.get("type") == "event" and item["name"] == event_name:
+            indexed = [i["name"] for i in item["inputs"] if i.get("indexed")]
+            return indexed.index(arg_name) + 1 if arg_name in indexed else None
+    raise ValueError(f"Event {event_name} not found in ABI")
+
+
+def get_address_position(abi, event_configs):
+    """
+    Returns the topic index the event_arg of every event config is logged
+    at, or None if one of them is not indexed or they sit at different
+    positions: the node can then not filter the addresses in one query.
+    """
+    positions = {
+        get_topic_position(abi, config["name"], config["event_arg"]) for config in event_configs
+    }
+    return positions.pop() if len(positions) == 1 else None
+
+
+def address_to_topic(address):
+    """
+    Left-pads an address to the 32-byte topic form used for indexed arguments.
+    """
+    return "0x" + address.lower()[2:].rjust(64, "0")
 
-def check_rpc_urls(rpc_urls):
-    healthy_rpcs = []
-    with ThreadPoolExecutor(max_workers=len(rpc_urls)) as executor:
-        future_to_url = {
-            executor.submit(Web3(Web3.HTTPProvider(url)).eth.get_block_number): url
-            for url in rpc_urls
-        }
-        for future in as_completed(future_to_url):
-            url = future_to_url[future]
-            try:
-                future.result()
-                healthy_rpcs.append(url)
-                print(f"✅ RPC URL is healthy: {url}")
-            except Exception as e:
-                print(f"❌ RPC URL failed health check: {url} - Error: {e}")
-    return healthy_rpcs
 
+def get_cache_keys(event_topics, address_topics=None, address_position=1):
+    """
+    Returns the cache keys of a getLogs query as {key: (topic0, address_topic)}.
+    A full scan is keyed by topic0 alone; a scan filtered on the indexed
+    address at topic address_position is keyed per topic0/address pair,
+    with address_topic None meaning "any address". Positions past topic1
+    are part of the key, as one event may be filtered on either argument.
+    """
+    if not address_topics:
+        return {topic0: (topic0, None) for topic0 in event_topics}
+    position = "" if address_position == 1 else f"{address_position}:"
+    return {
+        f"{topic0}:{position}{address_topic}": (topic0, address_topic)
+        for topic0 in event_topics
+        for address_topic in address_topics
+    }
 
-if not w3.is_connected():
-    print("Failed to connect to Ethereum node. Please check your RPC_URL(s).")
-    exit()
 
-contract = w3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=ABI)
+def get_finalized_block(w3_instance):
+    """
+    Returns the latest block that can no longer be reorged, falling back to
+    head - FINALITY_FALLBACK_DEPTH on nodes without the "finalized" tag.
+    """
+    try:
+        return w3_instance.eth.get_block("finalized")["number"]
+    except Exception:
+        return w3_instance.eth.block_number - FINALITY_FALLBACK_DEPTH
+
+
+def normalize_log(raw_log):
+    """
+    Converts the hex quantities of a JSON-RPC log to ints so logs can be
+    ordered and cached by block number and log index.
+    """
+    return {
+        **raw_log,
+        "blockNumber": int(raw_log["blockNumber"], 16),
+        "logIndex": int(raw_log["logIndex"], 16),
+        "transactionIndex": int(raw_log["transactionIndex"], 16),
+    }
 
 
 # Helper function to display progress
@@ -100,279 +216,1194 @@ def display_progress(
     sys.stdout.flush()
 
 
-def fetch_single_chunk(
-    rpc_url,
+async def fetch_single_chunk(
+    client,
     contract_address,
     abi,
-    event_name,
+    event_names,
     from_block,
     to_block,
-    max_retries=DEFAULT_MAX_RETRIES,
+    cache=None,
+    finalized_block=None,
+    address_topics=None,
+    address_position=1,
+    metrics=None,
 ):
-    retries = 0
-    while retries <= max_retries:
-        try:
-            w3_instance = Web3(Web3.HTTPProvider(rpc_url))
-            contract_instance = w3_instance.eth.contract(
-                address=Web3.to_checksum_address(contract_address), abi=abi
-            )
-            event_contract = getattr(contract_instance.events, event_name)()
-
-            # The get_logs call will make its own HTTP request. The explicit requests.get call was incorrect.
-            logs_chunk = event_contract.get_logs(
-                from_block=from_block, to_block=to_block
-            )
-            return logs_chunk
-        except requests.exceptions.HTTPError as http_err:
-            if http_err.response.status_code == 429:  # Too Many Requests
-                retries += 1
-                print(
-                    f"⚠️ Rate Limit (429) for {event_name} from {rpc_url} (Blocks: {from_block}-{to_block}). Retrying in 10s (Attempt {retries}/{max_retries})."
-                )
-                time.sleep(10)  # Wait for 10 seconds before retrying
-            else:
-                print(
-                    f"\n❌ HTTP error fetching {event_name} logs for range {from_block}-{to_block} from {rpc_url}: {http_err}"
-                )
-                return []
-        except requests.exceptions.ConnectionError as conn_err:
+    """
+    Fetches the raw logs of several events for a block range with a single
+    eth_getLogs call (topic0 OR-filter) and returns them normalized.
+    If address_topics is given, the node only returns logs whose indexed
+    address argument, at topic address_position, is one of them.
+    Ranges at or below finalized_block are written to the cache, per cache key,
+    timed as the "cache_write" stage of metrics if given.
+    Makes one attempt and raises on failure: retries, backoff and moving the
+    chunk to another RPC are up to the scheduler.
+    """
+    rpc_url = client.url
+    event_name = "/".join(event_names)
+    event_topics = [get_event_topic(abi, name) for name in event_names]
+    topics_filter = (
+        [event_topics, *[None] * (address_position - 1), address_topics]
+        if address_topics
+        else [event_topics]
+    )
+    try:
+        raw_logs = await client.get_logs(
+            contract_address, topics_filter, from_block, to_block
+        )
+    except aiohttp.ClientResponseError as http_err:
+        if not is_rate_limited(http_err):
             print(
-                f"\n❌ Connection error fetching {event_name} logs for range {from_block}-{to_block} from {rpc_url}: {conn_err}"
+                f"\n❌ HTTP error fetching {event_name} logs for range {from_block}-{to_block} from {rpc_url}: {http_err}"
             )
-            return []
-        except requests.exceptions.Timeout as timeout_err:
+        raise
+    except aiohttp.ClientConnectionError as conn_err:
+        print(
+            f"\n❌ Connection error fetching {event_name} logs for range {from_block}-{to_block} from {rpc_url}: {conn_err}"
+        )
+        raise
+    except asyncio.TimeoutError as timeout_err:
+        print(
+            f"\n❌ Timeout error fetching {event_name} logs for range {from_block}-{to_block} from {rpc_url}: {timeout_err!r}"
+        )
+        raise
+    except RpcError as rpc_err:
+        # Oversized requests are split and throttling is backed off by the scheduler
+        if classify_log_limit_error(rpc_err) is None and not is_rate_limited(rpc_err):
             print(
-                f"\n❌ Timeout error fetching {event_name} logs for range {from_block}-{to_block} from {rpc_url}: {timeout_err}"
+                f"\n❌ RPC error fetching {event_name} logs for range {from_block}-{to_block} from {rpc_url}: {rpc_err}"
             )
-            return []
-        except Exception as e:
+        raise
+
+    logs_chunk = [normalize_log(log) for log in raw_logs]
+    if cache is not None and finalized_block is not None and to_block <= finalized_block:
+        timer = metrics.timer("cache_write") if metrics is not None else contextlib.nullcontext()
+        with timer:
+            cache_keys = get_cache_keys(event_topics, address_topics, address_position)
+            for key, (topic0, address_topic) in cache_keys.items():
+                cache.store(
+                    contract_address,
+                    key,
+                    from_block,
+                    to_block,
+                    [
+                        log
+                        for log in logs_chunk
+                        if log["topics"][0] == topic0
+                        and (
+                            address_topic is None
+                            or log["topics"][address_position] == address_topic
+                        )
+                    ],
+                )
+    return logs_chunk
+
+
+async def fetch_chunks_async(
+    contract_address,
+    event_names,
+    ranges,
+    rpc_urls,
+    initial_range_size,
+    on_chunk,
+    cache=None,
+    finalized_block=None,
+    address_topics=None,
+    max_in_flight=MAX_IN_FLIGHT_PER_RPC,
+    abi=ABI,
+    rate_limiter=None,
+    endpoint_health=None,
+    metrics=None,
+    range_sizes_path=DEFAULT_RANGE_SIZES_PATH,
+    address_position=1,
+):
+    """
+    Fetches all block ranges concurrently. Each RPC gets one persistent client
+    and up to max_in_flight workers pulling from a shared queue, so work flows
+    to whichever endpoints are fastest and healthiest. Request sizes adapt per
+    endpoint and are remembered across runs in range_sizes_path (None to
+    start from initial_range_size and not save them).
+    Each chunk's raw logs are handed to on_chunk(raw_logs) as soon as it
+    arrives. Returns the failed ranges: chunks that failed on every attempt
+    are listed rather than being treated as empty.
+    An optional RateLimiter caps the request rate of all the RPCs together,
+    and endpoint_health (probe results by URL) gives the scheduler a head
+    start on each endpoint's speed and range limit. Request metrics and
+    each endpoint's retries and splits are recorded in metrics if given.
+    """
+    failed_ranges = []
+    start_overall_time = time.time()
+    completed_blocks = 0
+    total_blocks = sum(to_block - from_block + 1 for from_block, to_block in ranges)
+    event_label = "/".join(event_names)
+
+    def on_result(chunk, logs_chunk):
+        nonlocal completed_blocks
+        completed_blocks += chunk[1] - chunk[0] + 1
+        if logs_chunk is None:
+            failed_ranges.append(chunk)
             print(
-                f"\n❌ Unexpected error fetching {event_name} logs for range {from_block}-{to_block} from {rpc_url}: {e}"
+                f"\n❌ Giving up on chunk {chunk[0]}-{chunk[1]} after {MAX_CHUNK_ATTEMPTS} attempts"
             )
-            return []
-    print(
-        f"\nAttempted to fetch chunk {from_block}-{to_block} {max_retries + 1} times and failed."
-    )
-    return []
+        else:
+            on_chunk(logs_chunk)
+        display_progress(
+            completed_blocks,
+            total_blocks,
+            start_overall_time,
+            event_label,
+            ranges[0][0],
+            ranges[-1][1],
+        )
+
+    async def fetch_chunk(client, from_block, to_block):
+        return await fetch_single_chunk(
+            client,
+            contract_address,
+            abi,
+            event_names,
+            from_block,
+            to_block,
+            cache,
+            finalized_block,
+            address_topics,
+            address_position,
+            metrics,
+        )
+
+    async with contextlib.AsyncExitStack() as stack:
+        clients = [
+            await stack.enter_async_context(
+                AsyncRpcClient(url, max_in_flight, rate_limiter=rate_limiter, metrics=metrics)
+            )
+            for url in rpc_urls
+        ]
+        scheduler = ChunkScheduler(
+            clients,
+            fetch_chunk,
+            MAX_CHUNK_ATTEMPTS,
+            initial_range_size,
+            load_range_sizes(range_sizes_path) if range_sizes_path else None,
+            endpoint_health,
+        )
+        try:
+            await scheduler.run(ranges, on_result)
+        finally:
+            # Keep what was learned even if the scan is interrupted
+            if range_sizes_path:
+                save_range_sizes(scheduler.range_sizes(), range_sizes_path)
+
+    for endpoint in scheduler.endpoints:
+        if metrics is not None:
+            endpoint_metrics = metrics.endpoint(endpoint.url)
+            endpoint_metrics.retries += endpoint.retried
+            endpoint_metrics.splits += endpoint.split
+        latency = f"{endpoint.latency * 1000:.0f}ms" if endpoint.latency else "N/A"
+        print(
+            f"\n  {endpoint.url}: {endpoint.completed} chunks, "
+            f"{endpoint.failed} failures, {endpoint.rate_limited} rate limits, "
+            f"avg latency {latency}, range size {endpoint.range_size}, "
+            f"circuit {endpoint.breaker.state}",
+            end="",
+        )
+
+    return merge_ranges(failed_ranges)
 
 
 # Helper function to fetch logs in chunks
 def fetch_event_logs_in_chunks(
-    contract, event_name, start_block, end_block, max_range_per_request, rpc_urls
+    contract,
+    event_names,
+    start_block,
+    end_block,
+    max_range_per_request,
+    rpc_urls,
+    cache=None,
+    finalized_block=None,
+    on_logs=None,
+    keep_logs=True,
+    addresses=None,
+    address_position=1,
+    max_in_flight=MAX_IN_FLIGHT_PER_RPC,
+    rate_limiter=None,
+    endpoint_health=None,
+    metrics=None,
+    range_sizes_path=DEFAULT_RANGE_SIZES_PATH,
 ):
     """
-    Fetches logs for a specific event from a contract over a large block range
-    by breaking it into smaller chunks and fetching them in parallel.
-    """
-    all_logs = []
-    total_blocks = end_block - start_block + 1
-    # total_chunks = math.ceil(total_blocks / max_range_per_request)
-    start_overall_time = time.time()
-    completed_chunks = 0
+    Fetches logs for the given events from a contract over a large block range
+    by breaking it into smaller chunks and fetching them concurrently.
+    max_range_per_request is only the starting chunk size; it adapts per RPC
+    and the learned sizes are kept in range_sizes_path (None to not persist them).
+    All events share one eth_getLogs pass; the logs are demultiplexed by topic0
+    and decoded locally with EventDecoder into plain dicts. Ranges already in
+    the cache are read locally and only the gaps hit the RPCs.
 
-    num_rpcs = len(rpc_urls)
-    blocks_per_rpc = math.ceil(total_blocks / num_rpcs)
+    If addresses is given, the indexed address argument of every event, at
+    topic address_position (see get_topic_position), is filtered
+    server-side, so only those addresses' logs are transferred; a full
+    scan that is already cached is used instead.
 
-    tasks = []
-    for i in range(num_rpcs):
-        rpc_start_block = start_block + i * blocks_per_rpc
-        rpc_end_block = min(rpc_start_block + blocks_per_rpc - 1, end_block)
+    Decoded logs are streamed to on_logs(event_name, logs) chunk by chunk as
+    they arrive. With keep_logs=False nothing is buffered, so memory stays
+    flat however long the range is.
 
-        if rpc_start_block > rpc_end_block:
-            continue
+    Time spent fetching, reading and writing the cache, decoding and in
+    on_logs ("aggregation"), the logs processed and the RPC requests are
+    recorded in metrics, a RunMetrics, if one is given. The stages do not
+    overlap: "fetch" leaves out the other stages run as chunks arrive.
 
-        # Each RPC will handle its segment, but we still need to break it down by max_range_per_request
-        for current_from_block in range(
-            rpc_start_block, rpc_end_block + 1, max_range_per_request
-        ):
-            current_to_block = min(
-                current_from_block + max_range_per_request - 1, rpc_end_block
+    Returns (logs_by_event, failed_ranges), where logs_by_event maps event
+    name -> decoded logs (None if keep_logs is False) and failed_ranges lists
+    the block ranges that could not be fetched.
+    """
+    event_label = "/".join(event_names)
+    decoder = EventDecoder(contract.abi, event_names)
+    topic_to_event = {decoder.topics[name]: name for name in event_names}
+    logs_by_event = {name: [] for name in event_names} if keep_logs else None
+    metrics = metrics if metrics is not None else RunMetrics()
+
+    def dispatch(raw_logs):
+        decoded_by_event = {name: [] for name in event_names}
+        with metrics.timer("decode"):
+            for raw_log in raw_logs:
+                decoded_log = decoder.decode(raw_log)
+                decoded_by_event[decoded_log["event"]].append(decoded_log)
+        metrics.logs += len(raw_logs)
+        with metrics.timer("aggregation"):
+            for name, decoded_logs in decoded_by_event.items():
+                if not decoded_logs:
+                    continue
+                if on_logs is not None:
+                    on_logs(name, decoded_logs)
+                if keep_logs:
+                    logs_by_event[name].extend(decoded_logs)
+
+    address_topics = (
+        sorted({address_to_topic(address) for address in addresses})
+        if addresses
+        else None
+    )
+    if (
+        address_topics
+        and cache is not None
+        and not any(
+            cache.missing_ranges(contract.address, topic, start_block, end_block)
+            for topic in topic_to_event
+        )
+    ):
+        # The full scan is already on disk, filtering it locally is free
+        address_topics = None
+    cache_keys = get_cache_keys(topic_to_event, address_topics, address_position)
+
+    if cache is not None:
+        # Fetch the union of every key's gaps, and only take cached logs outside it
+        ranges_to_fetch = merge_ranges(
+            gap
+            for key in cache_keys
+            for gap in cache.missing_ranges(
+                contract.address, key, start_block, end_block
             )
-            tasks.append(
-                (
-                    rpc_urls[i],
-                    contract.address,
-                    ABI,
-                    event_name,
-                    current_from_block,
-                    current_to_block,
-                    DEFAULT_MAX_RETRIES,
-                )
+        )
+        cached_count = 0
+        for key in cache_keys:
+            batches = cache.iter_logs(contract.address, key, start_block, end_block)
+            while True:
+                with metrics.timer("cache_read"):
+                    batch = next(batches, None)
+                if batch is None:
+                    break
+                batch = [
+                    log
+                    for log in batch
+                    if not range_contains(ranges_to_fetch, log["blockNumber"])
+                ]
+                cached_count += len(batch)
+                dispatch(batch)
+        print(
+            f"  {cached_count} cached {event_label} logs, "
+            f"{sum(to - frm + 1 for frm, to in ranges_to_fetch)} blocks left to fetch"
+        )
+        earlier_failures = merge_ranges(
+            failure
+            for key in cache_keys
+            for failure in cache.failed_ranges(contract.address, key, start_block, end_block)
+        )
+        if earlier_failures:
+            print(
+                f"  Retrying {sum(to - frm + 1 for frm, to in earlier_failures)} blocks "
+                f"that failed in an earlier run"
             )
+    else:
+        ranges_to_fetch = [(start_block, end_block)]
 
-    with ThreadPoolExecutor(max_workers=len(rpc_urls)) as executor:
-        future_to_chunk = {
-            executor.submit(fetch_single_chunk, *task): task for task in tasks
-        }
-
-        for future in as_completed(future_to_chunk):
-            chunk_range_task = future_to_chunk[future]
-            try:
-                logs_chunk = future.result()
-                all_logs.extend(logs_chunk)
-            except Exception as exc:
-                print(
-                    f"Chunk {chunk_range_task[4]}-{chunk_range_task[5]} generated an exception: {exc}"
-                )
-            finally:
-                completed_chunks += 1
-                display_progress(
-                    completed_chunks,
-                    len(tasks),
-                    start_overall_time,
-                    event_name,
-                    start_block,
-                    end_block,
+    failed_ranges = []
+    if ranges_to_fetch:
+        with metrics.timer("fetch"):
+            failed_ranges = asyncio.run(
+                fetch_chunks_async(
+                    contract.address,
+                    event_names,
+                    ranges_to_fetch,
+                    rpc_urls,
+                    max_range_per_request,
+                    dispatch,
+                    cache,
+                    finalized_block,
+                    address_topics,
+                    max_in_flight,
+                    contract.abi,
+                    rate_limiter,
+                    endpoint_health,
+                    metrics,
+                    range_sizes_path,
+                    address_position,
                 )
+            )
 
     sys.stdout.write("\n")
     sys.stdout.flush()
-    return all_logs
+    if cache is not None and failed_ranges:
+        for key in cache_keys:
+            cache.record_failures(contract.address, key, failed_ranges)
+    total_blocks = end_block - start_block + 1
+    if total_blocks > COVERAGE_MAP_WIDTH:
+        print_coverage(start_block, end_block, ranges_to_fetch, failed_ranges)
+    return logs_by_event, failed_ranges
 
 
-def analyze_event_logs(logs, address_to_find, event_arg, amount_arg):
+def print_coverage(start_block, end_block, fetched_ranges, failed_ranges):
     """
-    Counts how many times a specific address has 'hearted' and the total amount.
+    Prints a coverage map of a scan: blocks read from the cache, fetched
+    from the RPCs in this run, and failed (to be retried by the next run).
     """
-    count = 0
-    total_amount = 0
-    # Ensure the address to find is checksummed for accurate comparison
-    checksum_address_to_find = Web3.to_checksum_address(address_to_find)
-    for log in logs:
-        if getattr(log.args, event_arg) == checksum_address_to_find:
-            count += 1
-            total_amount += getattr(log.args, amount_arg)
-    return {"count": count, "total_amount": total_amount}
+    total_blocks = end_block - start_block + 1
+    fetched_blocks = sum(to - frm + 1 for frm, to in fetched_ranges)
+    failed_blocks = sum(to - frm + 1 for frm, to in failed_ranges)
+    bar = coverage_map(
+        start_block,
+        end_block,
+        [("█", [(start_block, end_block)]), ("▓", fetched_ranges), ("✗", failed_ranges)],
+    )
+    print(
+        f"  Coverage {start_block}-{end_block}: [{bar}] "
+        f"█ cached {(total_blocks - fetched_blocks) / total_blocks:.1%} "
+        f"▓ fetched {(fetched_blocks - failed_blocks) / total_blocks:.1%} "
+        f"✗ failed {failed_blocks / total_blocks:.1%}"
+    )
 
 
-def fetch_eth_to_usd_rate():
-    primary_url = "https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@latest/v1/currencies/eth.json"
-    fallback_url = "https://latest.currency-api.pages.dev/v1/currencies/eth.json"
+def fetch_eth_to_usd_rate(currency="eth"):
+    """
+    Returns the USD price of the chain's native currency ("eth" by default), or None.
+    """
+    primary_url = f"https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@latest/v1/currencies/{currency}.json"
+    fallback_url = f"https://latest.currency-api.pages.dev/v1/currencies/{currency}.json"
 
     try:
         response = requests.get(primary_url)
         response.raise_for_status()  # Raise an exception for HTTP errors
         data = response.json()
-        return data["eth"]["usd"]
+        return data[currency]["usd"]
     except requests.exceptions.RequestException as e:
         print(f"Primary API failed: {e}. Trying fallback URL...")
         try:
             response = requests.get(fallback_url)
             response.raise_for_status()  # Raise an exception for HTTP errors
             data = response.json()
-            return data["eth"]["usd"]
+            return data[currency]["usd"]
         except requests.exceptions.RequestException as e:
-            print(f"Fallback API also failed: {e}. Cannot fetch ETH to USD rate.")
+            print(f"Fallback API also failed: {e}. Cannot fetch {currency.upper()} to USD rate.")
             return None
 
 
-# Define the total range and chunk size based on the problem statement
-TOTAL_BLOCKS_TO_FETCH = 432000  # on base blockchain 1 day = 432000 blocks
-MAX_BLOCK_RANGE_PER_REQUEST = 500  # Alchemy's 500 block limit
-
-# Determine the overall block range for investigation
-current_block_number = w3.eth.block_number
-# end_block_overall = current_block_number
-end_block_overall = 31589310
-start_block_overall = max(
-    0, end_block_overall - TOTAL_BLOCKS_TO_FETCH
-)  # Ensure block number doesn't go below 0
-
-print(
-    f"Starting log investigation from block {start_block_overall} to {end_block_overall} (total {end_block_overall - start_block_overall + 1} blocks)"
-)
+def select_events(choices):
+    """
+    Resolves event choices to their EVENT_CONFIGS entries, in order and
+    without duplicates. A choice is an event name or its menu number (see
+    EVENT_CONFIGS), or a config dict of the same shape for events of other
+    ABIs, and "*" selects every event.
+    Raises ValueError for an unknown event or an empty selection.
+    """
+    if isinstance(choices, str):
+        choices = choices.split(",")
+    choices = [
+        choice if isinstance(choice, dict) else choice.strip()
+        for choice in choices
+        if isinstance(choice, dict) or choice.strip()
+    ]
+    if "*" in choices:
+        return list(EVENT_CONFIGS.values())
 
-# Get user input for events to analyze
-print(
-    "\nSelect events to analyze (comma-separated numbers, or type '*' for all events):"
-)
-for key, config in EVENT_CONFIGS.items():
-    print(f"{key}. {config['name']}")
-
-event_choices_input = input("Enter your choices: ")
-
-if event_choices_input.lower() == "*":
-    selected_event_keys = list(EVENT_CONFIGS.keys())
-else:
-    selected_event_keys = [key.strip() for key in event_choices_input.split(",")]
-
-# Get user input for addresses to investigate
-addresses_input = input("\nEnter addresses to investigate (comma-separated): ")
-ADDRESSES_TO_INVESTIGATE = [addr.strip() for addr in addresses_input.split(",")]
-
-# --- Health Check for RPCs ---
-print("\n--- Checking RPC URL Health ---")
-RPC_URLS = check_rpc_urls(RPC_URLS)
-if not RPC_URLS:
-    print("No healthy RPC URLs available. Exiting.")
-    exit()
-
-# --- Analysis ---
-eth_to_usd_rate = fetch_eth_to_usd_rate()
-
-all_analysis_results = {}
-
-console = Console()
-
-for event_key in selected_event_keys:
-    if event_key in EVENT_CONFIGS:
-        event_info = EVENT_CONFIGS[event_key]
-        event_name = event_info["name"]
-        event_arg = event_info["event_arg"]
-        amount_arg = event_info["amount_arg"]
-
-        print(f"\n--- Fetching {event_name} Logs ---")
-        logs = fetch_event_logs_in_chunks(
-            contract,
-            event_name,
-            start_block_overall,
-            end_block_overall,
-            MAX_BLOCK_RANGE_PER_REQUEST,
-            RPC_URLS,
+    configs_by_name = {config["name"].lower(): config for config in EVENT_CONFIGS.values()}
+    selected_events = {}
+    for choice in choices:
+        if isinstance(choice, dict):
+            selected_events[choice["name"]] = choice
+            continue
+        event_info = EVENT_CONFIGS.get(choice) or configs_by_name.get(choice.lower())
+        if event_info is None:
+            raise ValueError(f"Unknown event: {choice}")
+        selected_events[event_info["name"]] = event_info
+    if not selected_events:
+        raise ValueError("No events selected")
+    return list(selected_events.values())
+
+
+class Investigator:
+    """
+    Runs log investigations against one set of RPC URLs.
+
+    The RPC health check, the Web3 connection, the log cache, the block time
+    and price indexes and the ETH/USD rate are set up once, on first use, and
+    shared by every investigate() call, so many queries in one process reuse
+    warm connections and caches.
+    One Investigator stands for one chain; it is safe to run several
+    investigations on it from different threads.
+    """
+
+    def __init__(
+        self,
+        rpc_urls=None,
+        cache_path=LOG_CACHE_PATH,
+        max_range_per_request=MAX_BLOCK_RANGE_PER_REQUEST,
+        max_in_flight=MAX_IN_FLIGHT_PER_RPC,
+        rate_limiter=None,
+        currency="eth",
+        health_ttl=DEFAULT_HEALTH_TTL_SECONDS,
+        refresh_health=False,
+    ):
+        """
+        Args:
+            rpc_urls: RPC URLs to spread requests over. Defaults to default_rpc_urls().
+            cache_path: SQLite log cache file, or an empty value to disable the
+                caches (block times and prices are then kept in memory). The
+                logs of each chain go to their own file next to it (see
+                chain_cache_path).
+            max_range_per_request: Starting chunk size, adapted per RPC.
+            max_in_flight: Concurrent getLogs requests per RPC.
+            rate_limiter: Optional RateLimiter shared by all requests to these RPCs.
+            currency: Native currency of the chain, used for the USD rate.
+            health_ttl: Seconds cached RPC probe results are trusted.
+            refresh_health: Probe the RPCs even if cached results are fresh.
+        """
+        self.rpc_urls = list(rpc_urls) if rpc_urls else default_rpc_urls()
+        if not self.rpc_urls:
+            raise ValueError("No RPC URLs given, set RPC_URLS or RPC_URL")
+        self.cache_path = cache_path
+        self.block_times = BlockTimeIndex(DEFAULT_BLOCK_TIMES_PATH if cache_path else ":memory:")
+        self.price_history = PriceHistory(DEFAULT_PRICES_PATH if cache_path else ":memory:")
+        self.max_range_per_request = max_range_per_request
+        self.max_in_flight = max_in_flight
+        self.rate_limiter = rate_limiter
+        self.currency = currency
+        self.health_path = DEFAULT_HEALTH_PATH if cache_path else None
+        self.health_ttl = health_ttl
+        self.refresh_health = refresh_health
+        self.endpoint_health = {}  # Probe results of the healthy RPCs, by URL
+        self._lock = threading.Lock()
+        self._w3 = None
+        self._cache = None
+        self._eth_to_usd_rate = None
+        self._eth_to_usd_rate_fetched = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self._cache is not None:
+            self._cache.close()
+        self.block_times.close()
+        self.price_history.close()
+
+    @property
+    def w3(self):
+        """
+        Web3 connection to the fastest healthy RPC. The RPCs are health-checked
+        on first use and reordered fastest first, so traffic goes to them first.
+        """
+        with self._lock:
+            if self._w3 is None:
+                print("\n--- Checking RPC URL Health ---")
+                healthy_rpcs = check_endpoints(
+                    self.rpc_urls, self.health_ttl, self.health_path, self.refresh_health
+                )
+                if not healthy_rpcs:
+                    raise ConnectionError("No healthy RPC URLs available")
+                self.rpc_urls = [result["url"] for result in healthy_rpcs]
+                self.endpoint_health = {result["url"]: result for result in healthy_rpcs}
+                self._w3 = Web3(Web3.HTTPProvider(self.rpc_urls[0]))
+            return self._w3
+
+    @property
+    def cache(self):
+        """
+        Log cache of the chain the RPCs serve, opened on first use, or None
+        if caching is disabled.
+        """
+        if not self.cache_path:
+            return None
+        if self._cache is None:
+            chain_id = self.w3.eth.chain_id
+            with self._lock:
+                if self._cache is None:
+                    self._cache = LogCache(chain_cache_path(self.cache_path, chain_id))
+        return self._cache
+
+    @property
+    def eth_to_usd_rate(self):
+        with self._lock:
+            if not self._eth_to_usd_rate_fetched:
+                self._eth_to_usd_rate = fetch_eth_to_usd_rate(self.currency)
+                self._eth_to_usd_rate_fetched = True
+            return self._eth_to_usd_rate
+
+    def block_timestamps(self, block_numbers, metrics=None) -> dict:
+        """
+        Returns {block_number: timestamp}, sampling blocks in JSON-RPC batches
+        and interpolating the rest (see BlockTimeResolver). The requests are
+        recorded in metrics, a RunMetrics, if one is given.
+        """
+        chain_id = self.w3.eth.chain_id
+        # Samples aligned to the interval up to the head stay reusable across runs
+        head_block = self.w3.eth.block_number
+
+        async def resolve():
+            async with AsyncRpcClient(
+                self.rpc_urls[0],
+                self.max_in_flight,
+                rate_limiter=self.rate_limiter,
+                metrics=metrics,
+            ) as client:
+                resolver = BlockTimeResolver(client, self.block_times, chain_id)
+                return await resolver.resolve(block_numbers, head_block)
+
+        return asyncio.run(resolve())
+
+    def block_usd_prices(self, block_timestamps: dict) -> dict:
+        """
+        Maps {block_number: timestamp} to {block_number: USD price of the native
+        currency on that day}, falling back to the latest rate (or None) for
+        days without a price.
+        """
+        block_dates = {
+            block: utc_date(timestamp) for block, timestamp in block_timestamps.items()
+        }
+        prices = self.price_history.usd_prices(
+            self.currency, set(block_dates.values()), fallback=self.eth_to_usd_rate
         )
+        return {block: prices[date] for block, date in block_dates.items()}
 
-        for address in ADDRESSES_TO_INVESTIGATE:
-            if address not in all_analysis_results:
-                all_analysis_results[address] = {}
+    def investigate(
+        self,
+        contract_address,
+        events,
+        addresses=(),
+        block_range=None,
+        leaderboard_size=0,
+        time_series_bucket_blocks=0,
+        export_dir=None,
+        follow=False,
+        abi=ABI,
+        historical_prices=False,
+    ):
+        """
+        Scans a contract's events over a block range and aggregates them per address.
 
-            analysis_results = analyze_event_logs(logs, address, event_arg, amount_arg)
+        Args:
+            contract_address: Contract whose events are scanned.
+            events: Event names, menu numbers or configs, or "*" (see select_events).
+            addresses: Addresses to report per-event totals for.
+            block_range: Inclusive (from_block, to_block); either end may be None.
+                The end defaults to DEFAULT_END_BLOCK, or the finalized block
+                when following, and the start to TOTAL_BLOCKS_TO_FETCH before it.
+            leaderboard_size: Top N addresses to rank per event, 0 to skip.
+            time_series_bucket_blocks: Bucket size of the per-event time series, 0 to skip.
+            export_dir: Directory to export the decoded events to as Parquet, None to skip.
+            follow: Also return a HeadFollower, started at the end of the scan,
+                that keeps the aggregates live when run.
+            abi: ABI of the contract, Memebase's by default.
+            historical_prices: Value the investigated addresses' events and the
+                time series at the USD price of each event's own day rather
+                than the latest rate. Leaderboards keep the latest rate.
 
-            eth_amount = analysis_results["total_amount"] / 10**18
-            usd_value = None
-            if eth_to_usd_rate is not None:
-                usd_value = eth_amount * eth_to_usd_rate
+        Returns:
+            dict: The report. "results" maps address -> event -> count and
+            totals, "leaderboards" and "time_series" map event -> ranking and
+            buckets, and "failed_ranges" lists the blocks that could not be
+            fetched (the results are incomplete if it is not empty).
+            "metrics" is the run's RunMetrics summary: per-RPC requests,
+            latency histogram, bytes, errors, 429s and retries, logs per
+            second and seconds per stage.
+        """
+        start_time = time.time()
+        metrics = RunMetrics()
+        selected_events = select_events(events)
+        event_names = [event_info["name"] for event_info in selected_events]
+        w3 = self.w3
+        contract = w3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=abi)
 
-            all_analysis_results[address][event_name] = {
-                "count": analysis_results["count"],
-                "total_amount_eth": eth_amount,
-                "total_amount_usd": usd_value,
+        finalized_block_number = get_finalized_block(w3)
+        from_block, to_block = block_range or (None, None)
+        if to_block is None:
+            # When following the head, scan up to the finalized block and let the follower take the rest
+            to_block = finalized_block_number if follow else DEFAULT_END_BLOCK
+        if from_block is None:
+            from_block = max(0, to_block - TOTAL_BLOCKS_TO_FETCH)  # Ensure block number doesn't go below 0
+        print(
+            f"Starting log investigation from block {from_block} to {to_block} (total {to_block - from_block + 1} blocks)"
+        )
+
+        checksummed_addresses = {
+            address: Web3.to_checksum_address(address) for address in addresses
+        }
+        accumulators = {
+            event_info["name"]: EventAccumulator(
+                event_info["name"], event_info["event_arg"], event_info["amount_arg"]
+            )
+            for event_info in selected_events
+        }
+        event_writer = (
+            ParquetEventWriter(export_dir, abi, event_names, from_block, to_block)
+            if export_dir
+            else None
+        )
+        # Compact (address, amount, block) columns for the vectorized time series report
+        event_columns = (
+            {name: {"addresses": [], "amounts": [], "blocks": []} for name in event_names}
+            if time_series_bucket_blocks
+            else None
+        )
+
+        # (block, amount) of every event of the investigated addresses, to price each on its own day
+        address_amounts = (
+            {name: {address: [] for address in checksummed_addresses.values()} for name in event_names}
+            if historical_prices
+            else None
+        )
+
+        def on_event_logs(event_name, logs):
+            accumulator = accumulators[event_name]
+            accumulator.add_logs(logs)
+            if address_amounts is not None:
+                tracked = address_amounts[event_name]
+                for log in logs:
+                    amounts = tracked.get(log["args"][accumulator.event_arg])
+                    if amounts is not None:
+                        amounts.append((log["blockNumber"], log["args"][accumulator.amount_arg]))
+            if event_writer is not None:
+                event_writer.write(event_name, logs)
+            if event_columns is not None:
+                columns = event_columns[event_name]
+                columns["addresses"].extend(log["args"][accumulator.event_arg] for log in logs)
+                columns["amounts"].extend(log["args"][accumulator.amount_arg] for log in logs)
+                columns["blocks"].extend(log["blockNumber"] for log in logs)
+
+        # Leaderboards, exports and time series need every address, otherwise let the node filter
+        address_position = get_address_position(abi, selected_events)
+        filter_addresses = (
+            None
+            if leaderboard_size or event_writer or event_columns or address_position is None
+            else list(checksummed_addresses.values())
+        )
+
+        follower = None
+        if follow:
+            follower = HeadFollower(
+                w3,
+                lambda follow_from, follow_to: fetch_event_logs_in_chunks(
+                    contract,
+                    event_names,
+                    follow_from,
+                    follow_to,
+                    self.max_range_per_request,
+                    self.rpc_urls,
+                    self.cache,
+                    get_finalized_block(w3),
+                    addresses=filter_addresses,
+                    address_position=address_position,
+                    max_in_flight=self.max_in_flight,
+                    rate_limiter=self.rate_limiter,
+                    endpoint_health=self.endpoint_health,
+                ),
+                accumulators,
+                checkpoint_path(
+                    w3.eth.chain_id, contract.address, event_names, from_block, filter_addresses
+                ),
+            )
+            if follower.load():
+                print(
+                    f"\nResuming from the follow checkpoint at block {follower.last_block}, skipping the scan"
+                )
+
+        failed_ranges = []
+        scanned = follower is None or follower.last_block is None
+        # Taken before the scan, so the follower catches a reorg of to_block during it
+        tip_hash = follower.block_hash(to_block) if follower is not None and scanned else None
+        if scanned:
+            print(f"\n--- Fetching {', '.join(event_names)} Logs ---")
+            _, failed_ranges = fetch_event_logs_in_chunks(
+                contract,
+                event_names,
+                from_block,
+                to_block,
+                self.max_range_per_request,
+                self.rpc_urls,
+                self.cache,
+                finalized_block_number,
+                on_logs=on_event_logs,
+                keep_logs=False,
+                addresses=filter_addresses,
+                address_position=address_position,
+                max_in_flight=self.max_in_flight,
+                rate_limiter=self.rate_limiter,
+                endpoint_health=self.endpoint_health,
+                metrics=metrics,
+            )
+        if event_writer is not None:
+            event_writer.close()
+            for event_name, rows in event_writer.rows_written.items():
+                if rows:
+                    print(f"Exported {rows} {event_name} events to {event_writer.path(event_name)}")
+        if failed_ranges:
+            print(
+                f"⚠️ {sum(to - frm + 1 for frm, to in failed_ranges)} blocks could not be fetched, "
+                f"results are incomplete: {', '.join(f'{frm}-{to}' for frm, to in failed_ranges)}"
+            )
+        if follower is not None and follower.last_block is None:
+            follower.start(to_block, tip_hash)
+
+        eth_to_usd_rate = self.eth_to_usd_rate
+        # A resumed follower has no per-event history, so it keeps the latest rate
+        historical_prices = historical_prices and scanned
+        block_times, block_prices = {}, {}
+        if historical_prices:
+            pricing_started = time.perf_counter()
+            blocks = {
+                block
+                for tracked in address_amounts.values()
+                for amounts in tracked.values()
+                for block, _ in amounts
             }
-    else:
-        print(f"Warning: Invalid event selection: {event_key}. Skipping.")
+            for columns in event_columns.values() if event_columns else []:
+                blocks.update(columns["blocks"])
+                blocks.update(range(from_block, to_block + 1, time_series_bucket_blocks))
+            block_times = self.block_timestamps(blocks, metrics)
+            block_prices = self.block_usd_prices(block_times)
+            metrics.add_time("pricing", time.perf_counter() - pricing_started)
+
+        analysis_started = time.perf_counter()
+        all_analysis_results = {}
+        for address, checksummed_address in checksummed_addresses.items():
+            all_analysis_results[address] = {}
+            for event_name, accumulator in accumulators.items():
+                analysis_results = accumulator.result(checksummed_address)
+                eth_amount = analysis_results["total_amount"] / 10**18
+                usd_value = None
+                if historical_prices:
+                    amounts = address_amounts[event_name][checksummed_address]
+                    if all(block_prices[block] is not None for block, _ in amounts):
+                        usd_value = sum(
+                            amount / 10**18 * block_prices[block] for block, amount in amounts
+                        )
+                elif eth_to_usd_rate is not None:
+                    usd_value = eth_amount * eth_to_usd_rate
+
+                all_analysis_results[address][event_name] = {
+                    "count": analysis_results["count"],
+                    "total_amount_eth": eth_amount,
+                    "total_amount_usd": usd_value,
+                }
+
+        leaderboards = {
+            event_name: {
+                "addresses": len(accumulator.index),
+                "events": accumulator.log_count,
+                "top": accumulator.top(leaderboard_size),
+            }
+            for event_name, accumulator in accumulators.items()
+            if leaderboard_size
+        }
+
+        time_series = {}
+        for event_name, columns in event_columns.items() if event_columns else []:
+            aggregator = ColumnarAggregator(
+                columns["addresses"], columns["amounts"], columns["blocks"]
+            )
+            buckets = [
+                {"from_block": bucket_start, "count": count, "total_amount": total_amount}
+                for bucket_start, count, total_amount in aggregator.time_series(
+                    time_series_bucket_blocks, from_block
+                )
+            ]
+            event_prices = [block_prices.get(block) for block in columns["blocks"]]
+            if historical_prices and None not in event_prices:
+                bucket_values = aggregator.value_series(
+                    time_series_bucket_blocks, event_prices, from_block
+                )
+                for bucket, usd_value in zip(buckets, bucket_values):
+                    bucket["total_amount_usd"] = usd_value
+            if historical_prices:
+                for bucket in buckets:
+                    bucket["start_time"] = block_times[bucket["from_block"]]
+            time_series[event_name] = {
+                "bucket_blocks": time_series_bucket_blocks,
+                "percentiles": aggregator.percentiles(),
+                "buckets": buckets,
+            }
+        metrics.add_time("analysis", time.perf_counter() - analysis_started)
+
+        return {
+            "contract": contract.address,
+            "from_block": from_block,
+            "to_block": to_block,
+            "events": event_names,
+            "eth_to_usd_rate": eth_to_usd_rate,
+            "historical_prices": historical_prices,
+            "results": all_analysis_results,
+            "leaderboards": leaderboards,
+            "time_series": time_series,
+            "failed_ranges": failed_ranges,
+            "elapsed_seconds": time.time() - start_time,
+            "metrics": metrics.summary(),
+            "follower": follower,
+        }
+
+
+def investigate(
+    contract_address,
+    events,
+    addresses=(),
+    block_range=None,
+    rpc_urls=None,
+    cache_path=LOG_CACHE_PATH,
+    max_range_per_request=MAX_BLOCK_RANGE_PER_REQUEST,
+    max_in_flight=MAX_IN_FLIGHT_PER_RPC,
+    rate_limiter=None,
+    currency="eth",
+    health_ttl=DEFAULT_HEALTH_TTL_SECONDS,
+    refresh_health=False,
+    **options,
+):
+    """
+    Runs a single investigation with a fresh Investigator (see Investigator.investigate).
+    Module-level so it can be handed to a process pool; use an Investigator
+    directly to share connections and caches across queries.
+    rpc_urls to refresh_health configure the Investigator, the other
+    options go to Investigator.investigate.
+    """
+    with Investigator(
+        rpc_urls,
+        cache_path,
+        max_range_per_request=max_range_per_request,
+        max_in_flight=max_in_flight,
+        rate_limiter=rate_limiter,
+        currency=currency,
+        health_ttl=health_ttl,
+        refresh_health=refresh_health,
+    ) as investigator:
+        return investigator.investigate(
+            contract_address, events, addresses, block_range, **options
+        )
+
+
+def render_report(report, console=None):
+    """
+    Prints a report from Investigator.investigate() as rich tables.
+    """
+    console = console or Console()
+    eth_to_usd_rate = report["eth_to_usd_rate"]
+    print(f"Time taken: {report['elapsed_seconds']:.2f} seconds")
+
+    console.print("\n--- Analysis Results ---")
+
+    for address, events_data in report["results"].items():
+        table = Table(
+            title=f"Results for Address: {address}"
+            + (" (incomplete: some blocks failed to fetch)" if report["failed_ranges"] else ""),
+            show_lines=True,
+            title_style="bold magenta",
+        )
+
+        table.add_column("Event Name", style="cyan", no_wrap=False)
+        table.add_column("Count", style="magenta", justify="center")
+        table.add_column("Total Amount ETH", style="green", justify="right")
+        table.add_column("Total Amount USD", style="yellow", justify="right")
+
+        for event_name, data in events_data.items():
+            eth_str = f'{data["total_amount_eth"]:.6f}'
+            usd_str = (
+                f'{data["total_amount_usd"]:.2f}'
+                if data["total_amount_usd"] is not None
+                else "N/A"
+            )
+            table.add_row(event_name, str(data["count"]), eth_str, usd_str)
+        console.print(Align.center(table))
+
+    for event_name, leaderboard in report["leaderboards"].items():
+        table = Table(
+            title=f"Top {len(leaderboard['top'])} by {event_name} amount "
+            f"({leaderboard['addresses']} addresses, {leaderboard['events']} events)",
+            show_lines=True,
+            title_style="bold magenta",
+        )
+
+        table.add_column("Rank", style="cyan", justify="center")
+        table.add_column("Address", style="cyan", no_wrap=True)
+        table.add_column("Count", style="magenta", justify="center")
+        table.add_column("Total Amount ETH", style="green", justify="right")
+        table.add_column("Total Amount USD", style="yellow", justify="right")
+
+        for rank, (address, data) in enumerate(leaderboard["top"], 1):
+            eth_amount = data["total_amount"] / 10**18
+            usd_str = (
+                f"{eth_amount * eth_to_usd_rate:.2f}" if eth_to_usd_rate is not None else "N/A"
+            )
+            table.add_row(
+                str(rank), address, str(data["count"]), f"{eth_amount:.6f}", usd_str
+            )
+        console.print(Align.center(table))
+
+    for event_name, series in report["time_series"].items():
+        table = Table(
+            title=f"{event_name} per {series['bucket_blocks']} blocks ("
+            + ", ".join(
+                f"p{q} {value / 10**18:.4f} ETH" for q, value in series["percentiles"].items()
+            )
+            + ")",
+            show_lines=True,
+            title_style="bold magenta",
+        )
+
+        buckets = series["buckets"]
+        with_times = bool(buckets) and "start_time" in buckets[0]
+        with_usd = bool(buckets) and "total_amount_usd" in buckets[0]
+        table.add_column("From Block", style="cyan", justify="right")
+        if with_times:
+            table.add_column("Start (UTC)", style="cyan", justify="right")
+        table.add_column("Count", style="magenta", justify="center")
+        table.add_column("Total Amount ETH", style="green", justify="right")
+        if with_usd:
+            table.add_column("Total Amount USD", style="yellow", justify="right")
+
+        for bucket in buckets:
+            row = [str(bucket["from_block"])]
+            if with_times:
+                row.append(
+                    datetime.fromtimestamp(bucket["start_time"], timezone.utc).strftime(
+                        "%Y-%m-%d %H:%M"
+                    )
+                )
+            row += [str(bucket["count"]), f"{bucket['total_amount'] / 10**18:.6f}"]
+            if with_usd:
+                row.append(f"{bucket['total_amount_usd']:.2f}")
+            table.add_row(*row)
+        console.print(Align.center(table))
 
-end_time = time.time()
-print(f"Time taken: {end_time - start_time:.2f} seconds")
+    render_metrics(report["metrics"], console)
 
-console.print("\n--- Analysis Results ---")
 
-for address, events_data in all_analysis_results.items():
-    table = Table(
-        title=f"Results for Address: {address}",
-        show_lines=True,
-        title_style="bold magenta",
+def render_metrics(metrics, console=None):
+    """
+    Prints a RunMetrics summary: throughput, time per stage and a table of
+    the RPC endpoints.
+    """
+    console = console or Console()
+    print(
+        f"\n{metrics['logs']} logs, {metrics['logs_per_second']:.0f} logs/s; "
+        + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in metrics["stages"].items())
     )
+    if not metrics["endpoints"]:
+        return
 
-    table.add_column("Event Name", style="cyan", no_wrap=False)
-    table.add_column("Count", style="magenta", justify="center")
-    table.add_column("Total Amount ETH", style="green", justify="right")
-    table.add_column("Total Amount USD", style="yellow", justify="right")
-
-    for event_name, data in events_data.items():
-        eth_str = f'{data["total_amount_eth"]:.6f}'
-        usd_str = (
-            f'{data["total_amount_usd"]:.2f}'
-            if data["total_amount_usd"] is not None
-            else "N/A"
+    table = Table(title="RPC Requests", show_lines=True, title_style="bold magenta")
+    table.add_column("Endpoint", style="cyan")
+    table.add_column("Requests", style="magenta", justify="right")
+    table.add_column("p50 / p90 / p99 ms", style="green", justify="right")
+    table.add_column("MB Received", style="green", justify="right")
+    table.add_column("Errors", style="yellow", justify="right")
+    table.add_column("429s", style="yellow", justify="right")
+    table.add_column("Retries", style="yellow", justify="right")
+    for url, endpoint in metrics["endpoints"].items():
+        latency = endpoint["latency"]
+        table.add_row(
+            url,
+            str(endpoint["requests"]),
+            " / ".join(f"{latency[q] * 1000:.0f}" for q in ("p50", "p90", "p99"))
+            if latency["count"]
+            else "N/A",
+            f"{endpoint['bytes_received'] / 1e6:.2f}",
+            str(endpoint["errors"]),
+            str(endpoint["rate_limited"]),
+            str(endpoint["retries"]),
         )
-        table.add_row(event_name, str(data["count"]), eth_str, usd_str)
     console.print(Align.center(table))
+
+
+@contextlib.contextmanager
+def profiled(path):
+    """
+    Runs the block under cProfile when path is set, then saves the stats
+    to path and prints the most expensive functions to stderr.
+    """
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP_ENTRIES)
+        print(f"Profile saved to {path} (python -m pstats {path} to explore)", file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Aggregate Memebase events per address over a block range."
+    )
+    parser.add_argument("--contract", default=CONTRACT_ADDRESS, help="Contract address")
+    parser.add_argument(
+        "--events",
+        default="*",
+        help="Comma-separated event names or numbers "
+        f"({', '.join(key + '=' + config['name'] for key, config in EVENT_CONFIGS.items())}), "
+        "or * for all (default)",
+    )
+    parser.add_argument(
+        "--addresses", default="", help="Comma-separated addresses to investigate"
+    )
+    parser.add_argument("--from-block", type=int, help="First block (default: --to-block minus one day)")
+    parser.add_argument(
+        "--to-block",
+        type=int,
+        help=f"Last block (default: {DEFAULT_END_BLOCK}, or the finalized block with --follow)",
+    )
+    parser.add_argument(
+        "--leaderboard", type=int, default=0, metavar="N", help="Show the top N addresses per event"
+    )
+    parser.add_argument(
+        "--time-series",
+        type=int,
+        default=0,
+        metavar="BLOCKS",
+        help="Time series bucket size in blocks (e.g. 43200 = 1 day on Base)",
+    )
+    parser.add_argument("--export-dir", help="Export decoded events to this directory as Parquet")
+    parser.add_argument(
+        "--follow", action="store_true", help="Keep following the chain head after the scan"
+    )
+    parser.add_argument(
+        "--historical-prices",
+        action="store_true",
+        help="Value each event at the USD price of its own day instead of the latest rate",
+    )
+    parser.add_argument(
+        "--rpc-urls", help="Comma-separated RPC URLs (default: RPC_URLS or RPC_URL)"
+    )
+    parser.add_argument(
+        "--cache", default=LOG_CACHE_PATH, help="Log cache file, empty to disable"
+    )
+    parser.add_argument(
+        "--refresh-health",
+        action="store_true",
+        help="Probe the RPCs even if the cached health check is still fresh",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the report as JSON instead of tables"
+    )
+    parser.add_argument(
+        "--metrics-json", metavar="PATH", help="Write the run metrics summary to this JSON file"
+    )
+    parser.add_argument(
+        "--prometheus",
+        metavar="PATH",
+        help="Write the run metrics to this file in the Prometheus text format",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="investigation.pstats",
+        metavar="PATH",
+        help="Profile the run with cProfile and save the stats (default: investigation.pstats)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        selected_events = select_events(args.events)
+    except ValueError as e:
+        sys.exit(f"Invalid --events: {e}")
+    addresses = [address.strip() for address in args.addresses.split(",") if address.strip()]
+    rpc_urls = split_urls(args.rpc_urls) if args.rpc_urls else None
+
+    try:
+        with Investigator(
+            rpc_urls, args.cache, refresh_health=args.refresh_health
+        ) as investigator:
+            # Keep stdout clean for the JSON report, progress goes to stderr
+            with (
+                contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext()
+            ), profiled(args.profile):
+                report = investigator.investigate(
+                    args.contract,
+                    [event_info["name"] for event_info in selected_events],
+                    addresses,
+                    (args.from_block, args.to_block),
+                    leaderboard_size=args.leaderboard,
+                    time_series_bucket_blocks=args.time_series,
+                    export_dir=args.export_dir,
+                    follow=args.follow,
+                    historical_prices=args.historical_prices,
+                )
+            follower = report.pop("follower")
+            if args.metrics_json:
+                with open(args.metrics_json, "w") as f:
+                    json.dump(report["metrics"], f, indent=2)
+            if args.prometheus:
+                with open(args.prometheus, "w") as f:
+                    f.write(
+                        to_prometheus(
+                            report["metrics"],
+                            {"contract": report["contract"], "events": ",".join(report["events"])},
+                        )
+                    )
+            if args.json:
+                print(json.dumps(report, indent=2))
+            else:
+                render_report(report)
+
+            if follower is not None:
+
+                def print_live_totals(from_block, to_block):
+                    totals = ", ".join(
+                        f"{address[:10]}… {event_name} "
+                        f"{accumulator.result(Web3.to_checksum_address(address))['count']}"
+                        for address in addresses
+                        for event_name, accumulator in follower.accumulators.items()
+                    )
+                    print(f"Block {to_block} (+{to_block - from_block + 1}): {totals or 'no addresses'}")
+
+                print(
+                    f"\n--- Following the chain head from block {follower.last_block} (Ctrl-C to stop) ---"
+                )
+                follower.run(on_update=print_live_totals)
+    except (ValueError, ConnectionError) as e:
+        sys.exit(str(e))
+    except KeyboardInterrupt:
+        sys.exit(
+            "\nInterrupted."
+            + (" Completed chunks are cached, run again to resume the scan." if args.cache else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import bisect
+import json
+import os
+import sqlite3
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "logs.sqlite"
+)
+COVERAGE_MAP_WIDTH = 60  # Cells in the coverage bar printed after a scan
+
+
+class LogCache:
+    """
+    On-disk cache of raw eth_getLogs results.
+
+    Logs are stored per (contract, topic) together with the block segments that
+    have been fully fetched, so a later run only needs to request the gaps.
+    Only finalized ranges should be stored: a cached segment is never refetched.
+    Each segment is committed as its chunk arrives, so the cache doubles as the
+    journal of an interrupted scan, and ranges that failed are recorded too.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS segments (
+                contract TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                from_block INTEGER NOT NULL,
+                to_block INTEGER NOT NULL,
+                PRIMARY KEY (contract, topic, from_block, to_block)
+            );
+            CREATE TABLE IF NOT EXISTS logs (
+                contract TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                block_number INTEGER NOT NULL,
+                log_index INTEGER NOT NULL,
+                log TEXT NOT NULL,
+                PRIMARY KEY (contract, topic, block_number, log_index)
+            );
+            CREATE TABLE IF NOT EXISTS failures (
+                contract TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                from_block INTEGER NOT NULL,
+                to_block INTEGER NOT NULL,
+                PRIMARY KEY (contract, topic, from_block, to_block)
+            );
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(contract: str, topic: str):
+        return contract.lower(), topic.lower()
+
+    def missing_ranges(
+        self, contract: str, topic: str, start_block: int, end_block: int
+    ) -> list:
+        """
+        Returns the (from_block, to_block) ranges inside [start_block, end_block]
+        that are not covered by any cached segment.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT from_block, to_block FROM segments "
+                "WHERE contract = ? AND topic = ? AND to_block >= ? AND from_block <= ? "
+                "ORDER BY from_block",
+                (*self._key(contract, topic), start_block, end_block),
+            ).fetchall()
+
+        missing = []
+        cursor = start_block
+        for from_block, to_block in rows:
+            if from_block > cursor:
+                missing.append((cursor, from_block - 1))
+            cursor = max(cursor, to_block + 1)
+            if cursor > end_block:
+                break
+        if cursor <= end_block:
+            missing.append((cursor, end_block))
+        return missing
+
+    def get_logs(
+        self, contract: str, topic: str, start_block: int, end_block: int
+    ) -> list:
+        """Returns the cached raw logs in [start_block, end_block], in chain order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT log FROM logs "
+                "WHERE contract = ? AND topic = ? AND block_number BETWEEN ? AND ? "
+                "ORDER BY block_number, log_index",
+                (*self._key(contract, topic), start_block, end_block),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def iter_logs(
+        self,
+        contract: str,
+        topic: str,
+        start_block: int,
+        end_block: int,
+        batch_size: int = 5_000,
+    ):
+        """
+        Yields the cached raw logs in [start_block, end_block] in batches, in
+        chain order, without loading the whole range into memory.
+        """
+        cursor = (start_block, -1)
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT block_number, log_index, log FROM logs "
+                    "WHERE contract = ? AND topic = ? AND block_number <= ? "
+                    "AND (block_number, log_index) > (?, ?) "
+                    "ORDER BY block_number, log_index LIMIT ?",
+                    (*self._key(contract, topic), end_block, *cursor, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            yield [json.loads(row[2]) for row in rows]
+            cursor = rows[-1][:2]
+
+    def store(
+        self, contract: str, topic: str, from_block: int, to_block: int, logs: list
+    ):
+        """
+        Records [from_block, to_block] as fetched along with its raw logs.
+        Logs must be JSON-serializable dicts with 'blockNumber' and 'logIndex'.
+        """
+        key = self._key(contract, topic)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?, ?)",
+                [
+                    (*key, log["blockNumber"], log["logIndex"], json.dumps(log))
+                    for log in logs
+                ],
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO segments VALUES (?, ?, ?, ?)",
+                (*key, from_block, to_block),
+            )
+            self._conn.execute(
+                "DELETE FROM failures WHERE contract = ? AND topic = ? "
+                "AND from_block >= ? AND to_block <= ?",
+                (*key, from_block, to_block),
+            )
+
+    def record_failures(self, contract: str, topic: str, ranges):
+        """Records block ranges that could not be fetched."""
+        key = self._key(contract, topic)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO failures VALUES (?, ?, ?, ?)",
+                [(*key, from_block, to_block) for from_block, to_block in ranges],
+            )
+
+    def failed_ranges(
+        self, contract: str, topic: str, start_block: int, end_block: int
+    ) -> list:
+        """
+        Returns the recorded failures inside [start_block, end_block] that are
+        still missing from the cache, merged.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT from_block, to_block FROM failures "
+                "WHERE contract = ? AND topic = ? AND to_block >= ? AND from_block <= ?",
+                (*self._key(contract, topic), start_block, end_block),
+            ).fetchall()
+        failures = merge_ranges(
+            (max(from_block, start_block), min(to_block, end_block))
+            for from_block, to_block in rows
+        )
+        return intersect_ranges(
+            failures, self.missing_ranges(contract, topic, start_block, end_block)
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def chain_cache_path(path: str, chain_id: int) -> str:
+    """
+    The cache file of one chain next to path, e.g. logs-8453.sqlite for
+    logs.sqlite: the same contract address can hold different logs on
+    different chains, and cache rows are not keyed by chain.
+    """
+    root, extension = os.path.splitext(path)
+    return f"{root}-{chain_id}{extension}"
+
+
+def merge_ranges(ranges) -> list:
+    """Merges overlapping or adjacent (from_block, to_block) ranges, sorted."""
+    merged = []
+    for from_block, to_block in sorted(ranges):
+        if merged and from_block <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], to_block))
+        else:
+            merged.append((from_block, to_block))
+    return merged
+
+
+def range_contains(ranges, block_number: int) -> bool:
+    """Checks whether a block falls inside any of the sorted, merged ranges."""
+    index = bisect.bisect_right(ranges, (block_number, float("inf"))) - 1
+    return index >= 0 and ranges[index][0] <= block_number <= ranges[index][1]
+
+
+def intersect_ranges(ranges, other_ranges) -> list:
+    """Intersection of two sorted, merged lists of (from_block, to_block) ranges."""
+    intersection = []
+    i = j = 0
+    while i < len(ranges) and j < len(other_ranges):
+        from_block = max(ranges[i][0], other_ranges[j][0])
+        to_block = min(ranges[i][1], other_ranges[j][1])
+        if from_block <= to_block:
+            intersection.append((from_block, to_block))
+        if ranges[i][1] < other_ranges[j][1]:
+            i += 1
+        else:
+            j += 1
+    return intersection
+
+
+def coverage_map(start_block: int, end_block: int, layers, width=COVERAGE_MAP_WIDTH) -> str:
+    """
+    Draws [start_block, end_block] as a bar of width cells. layers is a list
+    of (char, ranges), lowest priority first: each cell shows the char of the
+    last layer that touches it, or "·" if none does, so even a single failed
+    block stays visible.
+    """
+    blocks = end_block - start_block + 1
+    width = min(width, blocks)
+    cells = ["·"] * width
+    for char, ranges in layers:
+        for from_block, to_block in ranges:
+            from_block, to_block = max(from_block, start_block), min(to_block, end_block)
+            if from_block > to_block:
+                continue
+            first = (from_block - start_block) * width // blocks
+            last = (to_block - start_block) * width // blocks
+            cells[first : last + 1] = char * (last - first + 1)
+    return "".join(cells)
@@ -0,0 +1,182 @@
+import contextlib
+import time
+
+from health import latency_percentile
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROMETHEUS_PREFIX = "log_investigation"
+
+
+class EndpointMetrics:
+    """Request counters and latencies of one RPC endpoint."""
+
+    def __init__(self):
+        self.latencies = []  # Seconds, one per answered HTTP request
+        self.unanswered = 0  # HTTP requests that failed without a response body
+        self.bytes_received = 0
+        self.errors = 0  # Failed requests other than 429s, answered or not
+        self.rate_limited = 0
+        self.retries = 0  # Chunks put back on the queue after failing here
+        self.splits = 0  # Chunks split in half after a size limit error
+
+    def histogram(self) -> dict:
+        """Cumulative bucket counts, Prometheus style, keyed by upper bound."""
+        buckets = {
+            str(bound): sum(1 for latency in self.latencies if latency <= bound)
+            for bound in LATENCY_BUCKETS
+        }
+        buckets["+Inf"] = len(self.latencies)
+        return buckets
+
+    def summary(self) -> dict:
+        latency = {"count": len(self.latencies), "sum": sum(self.latencies)}
+        if self.latencies:
+            latency.update(
+                p50=latency_percentile(self.latencies, 50),
+                p90=latency_percentile(self.latencies, 90),
+                p99=latency_percentile(self.latencies, 99),
+                max=max(self.latencies),
+            )
+        latency["buckets"] = self.histogram()
+        return {
+            "requests": len(self.latencies) + self.unanswered,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "splits": self.splits,
+            "bytes_received": self.bytes_received,
+            "latency": latency,
+        }
+
+
+class RunMetrics:
+    """
+    Counters and timers for one investigation run: per-endpoint request
+    latency, bytes, errors, 429s and retries, logs processed, and the time
+    spent in each stage of the pipeline (fetch, cache reads and writes,
+    decoding, aggregation, analysis). Meant to be used from one thread.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.endpoints = {}
+        self.logs = 0
+        self.stages = {}
+        self._nested = []  # Seconds spent in timers nested in each running timer
+
+    def endpoint(self, url: str) -> EndpointMetrics:
+        if url not in self.endpoints:
+            self.endpoints[url] = EndpointMetrics()
+        return self.endpoints[url]
+
+    def record_request(self, url: str, latency: float, bytes_received: int):
+        endpoint = self.endpoint(url)
+        endpoint.latencies.append(latency)
+        endpoint.bytes_received += bytes_received
+
+    def record_failure(self, url: str, rate_limited: bool, answered: bool = False):
+        """
+        Counts a failed request. answered marks a JSON-RPC error in a response
+        that record_request already counted, so the request is not counted twice.
+        """
+        endpoint = self.endpoint(url)
+        if not answered:
+            endpoint.unanswered += 1
+        if rate_limited:
+            endpoint.rate_limited += 1
+        else:
+            endpoint.errors += 1
+
+    def add_time(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def timer(self, stage: str):
+        """
+        Times a stage. Time spent in a timer nested inside this one counts
+        toward the inner stage only, so e.g. "fetch" leaves out the decoding
+        and aggregation done as chunks arrive, and the stages do not overlap.
+        """
+        started = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.add_time(stage, seconds - self._nested.pop())
+            if self._nested:
+                self._nested[-1] += seconds
+
+    def summary(self) -> dict:
+        """JSON-serializable run summary."""
+        elapsed = time.monotonic() - self.started
+        return {
+            "elapsed_seconds": elapsed,
+            "logs": self.logs,
+            "logs_per_second": self.logs / elapsed if elapsed else 0.0,
+            "stages": dict(self.stages),
+            "endpoints": {url: endpoint.summary() for url, endpoint in self.endpoints.items()},
+        }
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(summary: dict, labels: dict = None) -> str:
+    """
+    Renders a RunMetrics summary in the Prometheus text exposition format,
+    e.g. for node_exporter's textfile collector. labels are added to every
+    sample (such as the contract or job name).
+    """
+    base_labels = "".join(f'{key}="{_label(value)}",' for key, value in (labels or {}).items())
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} {kind}")
+        for suffix, sample_labels, value in samples:
+            label_text = (base_labels + sample_labels).rstrip(",")
+            lines.append(f"{PROMETHEUS_PREFIX}_{name}{suffix}{{{label_text}}} {value}")
+
+    endpoints = summary["endpoints"].items()
+    metric(
+        "rpc_request_duration_seconds",
+        "histogram",
+        "Latency of answered JSON-RPC requests.",
+        [
+            ("_bucket", f'endpoint="{_label(url)}",le="{bound}",', count)
+            for url, endpoint in endpoints
+            for bound, count in endpoint["latency"]["buckets"].items()
+        ]
+        + [
+            (suffix, f'endpoint="{_label(url)}",', endpoint["latency"][key])
+            for url, endpoint in endpoints
+            for suffix, key in (("_sum", "sum"), ("_count", "count"))
+        ],
+    )
+    for name, key, help_text in (
+        ("rpc_errors_total", "errors", "Failed JSON-RPC requests, rate limits excluded."),
+        ("rpc_rate_limited_total", "rate_limited", "JSON-RPC requests that were rate limited."),
+        ("rpc_retries_total", "retries", "Chunks retried after failing on the endpoint."),
+        ("rpc_splits_total", "splits", "Chunks split after a result or range limit."),
+        ("rpc_received_bytes_total", "bytes_received", "Bytes of JSON-RPC responses."),
+    ):
+        metric(
+            name,
+            "counter",
+            help_text,
+            [("", f'endpoint="{_label(url)}",', endpoint[key]) for url, endpoint in endpoints],
+        )
+    metric("logs_total", "counter", "Logs decoded and aggregated.", [("", "", summary["logs"])])
+    metric(
+        "stage_seconds_total",
+        "counter",
+        "Time spent per pipeline stage.",
+        [("", f'stage="{_label(stage)}",', seconds) for stage, seconds in summary["stages"].items()],
+    )
+    metric(
+        "run_seconds", "gauge", "Wall time of the run.", [("", "", summary["elapsed_seconds"])]
+    )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+DEFAULT_PRICES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "prices.sqlite"
+)
+# Daily snapshots of the currency API, primary first
+PRICE_URLS = (
+    "https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@{date}/v1/currencies/{currency}.json",
+    "https://{date}.currency-api.pages.dev/v1/currencies/{currency}.json",
+)
+REQUEST_TIMEOUT_SECONDS = 10
+MAX_PARALLEL_REQUESTS = 8
+
+
+def utc_date(timestamp: int) -> str:
+    """Returns the UTC date (YYYY-MM-DD) of a unix timestamp."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).date().isoformat()
+
+
+class PriceHistory:
+    """
+    Daily USD prices of a currency, cached on disk.
+
+    Past days never change, so each (currency, day) is fetched once. The
+    current day is not cached since its snapshot may not be published yet.
+    """
+
+    def __init__(self, path: str = DEFAULT_PRICES_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS prices (
+                currency TEXT NOT NULL,
+                date TEXT NOT NULL,
+                usd REAL NOT NULL,
+                PRIMARY KEY (currency, date)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def usd_prices(self, currency: str, dates, fallback: float = None) -> dict:
+        """
+        Returns {date: USD price} for the given YYYY-MM-DD dates.
+        Days whose price cannot be fetched get the fallback price (e.g. the
+        latest rate), which may be None.
+        """
+        dates = set(dates)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, usd FROM prices WHERE currency = ?", (currency,)
+            ).fetchall()
+        prices = {date: usd for date, usd in rows if date in dates}
+
+        missing = sorted(dates - prices.keys())
+        if missing:
+            with ThreadPoolExecutor(max_workers=MAX_PARALLEL_REQUESTS) as executor:
+                fetched = dict(
+                    zip(missing, executor.map(lambda d: fetch_usd_price(currency, d), missing))
+                )
+            today = datetime.now(timezone.utc).date().isoformat()
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO prices VALUES (?, ?, ?)",
+                    [
+                        (currency, date, usd)
+                        for date, usd in fetched.items()
+                        if usd is not None and date < today
+                    ],
+                )
+            prices.update(fetched)
+
+        return {date: fallback if usd is None else usd for date, usd in prices.items()}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def fetch_usd_price(currency: str, date: str):
+    """Fetches the USD price of a currency on a day, or None if no source has it."""
+    for url in PRICE_URLS:
+        try:
+            response = requests.get(
+                url.format(date=date, currency=currency), timeout=REQUEST_TIMEOUT_SECONDS
+            )
+            response.raise_for_status()
+            return response.json()[currency]["usd"]
+        except (requests.exceptions.RequestException, KeyError, ValueError):
+            continue
+    return None
@@ -0,0 +1,260 @@
+import asyncio
+import email.utils
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+import aiohttp
+
+DEFAULT_MAX_IN_FLIGHT = 20  # Concurrent requests allowed per endpoint
+DEFAULT_TIMEOUT_SECONDS = 30
+
+
+class RpcError(Exception):
+    """Error object returned by a JSON-RPC endpoint."""
+
+    def __init__(self, code, message):
+        super().__init__(f"RPC error {code}: {message}")
+        self.code = code
+        self.message = message
+
+
+class RateLimiter:
+    """
+    Token bucket capping the request rate of a group of endpoints.
+
+    Thread-safe and not tied to an event loop, so one limiter can hold the
+    budget of a chain shared by clients running in different threads.
+    """
+
+    def __init__(self, requests_per_second: float, burst: int = None):
+        self.rate = requests_per_second
+        self.burst = burst or max(1, math.ceil(requests_per_second))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class AsyncRpcClient:
+    """
+    Minimal JSON-RPC client for one endpoint.
+
+    Keeps a single aiohttp session (and its connection pool) open for the
+    lifetime of the client and caps the number of requests in flight, and
+    optionally their rate through a shared RateLimiter. Latency, response
+    size and failures of every request are recorded in metrics (a
+    metrics.RunMetrics) if one is given.
+    Use it as an async context manager.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        rate_limiter: RateLimiter = None,
+        metrics=None,
+    ):
+        self.url = url
+        self.max_in_flight = max_in_flight
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._ids = itertools.count(1)
+        self._session = None
+
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession(
+            timeout=self._timeout,
+            connector=aiohttp.TCPConnector(limit=self.max_in_flight),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+
+    async def _post(self, payload):
+        """Sends a JSON-RPC payload and returns the decoded response body."""
+        async with self._semaphore:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            started = time.monotonic()
+            try:
+                async with self._session.post(self.url, json=payload) as response:
+                    response.raise_for_status()
+                    raw = await response.read()
+            except Exception as exc:
+                self._record_failure(exc)
+                raise
+        if self.metrics is not None:
+            self.metrics.record_request(self.url, time.monotonic() - started, len(raw))
+        return json.loads(raw)
+
+    def _record_failure(self, exc, answered=False):
+        if self.metrics is not None:
+            self.metrics.record_failure(self.url, is_rate_limited(exc), answered)
+
+    async def call(self, method: str, params: list):
+        """
+        Sends one JSON-RPC request and returns its result.
+
+        Raises:
+            aiohttp.ClientResponseError: On non-2xx HTTP responses (e.g. 429).
+            RpcError: If the endpoint returns a JSON-RPC error object.
+        """
+        payload = {
+            "jsonrpc": "2.0",
+            "id": next(self._ids),
+            "method": method,
+            "params": params,
+        }
+        body = await self._post(payload)
+        if "error" in body:
+            error = RpcError(body["error"].get("code"), body["error"].get("message"))
+            self._record_failure(error, answered=True)
+            raise error
+        return body["result"]
+
+    async def call_batch(self, calls: list) -> list:
+        """
+        Sends several requests as one JSON-RPC batch (a single HTTP request)
+        and returns their results in the order of calls.
+
+        Args:
+            calls: List of (method, params) pairs.
+
+        Raises:
+            aiohttp.ClientResponseError: On non-2xx HTTP responses (e.g. 429).
+            RpcError: If the batch, or any request in it, returns an error object.
+        """
+        ids = [next(self._ids) for _ in calls]
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+        body = await self._post(payload)
+        if isinstance(body, dict):
+            # Some nodes answer a rejected batch with a single error object
+            error = body.get("error", {})
+            error = RpcError(error.get("code"), error.get("message", "invalid batch response"))
+            self._record_failure(error, answered=True)
+            raise error
+        responses = {response["id"]: response for response in body}
+        results = []
+        for request_id in ids:
+            response = responses.get(request_id)
+            if response is None or "error" in response:
+                error = (response or {}).get("error", {})
+                error = RpcError(error.get("code"), error.get("message", "missing batch response"))
+                self._record_failure(error, answered=True)
+                raise error
+            results.append(response["result"])
+        return results
+
+    async def get_logs(
+        self, address: str, topics: list, from_block: int, to_block: int
+    ) -> list:
+        return await self.call(
+            "eth_getLogs",
+            [
+                {
+                    "address": address,
+                    "fromBlock": hex(from_block),
+                    "toBlock": hex(to_block),
+                    "topics": topics,
+                }
+            ],
+        )
+
+
+# Substrings providers use when an eth_getLogs request asks for too much.
+# Kept narrow: throttling messages such as "Rate limit exceeded" must not match
+RESULT_LIMIT_MARKERS = (
+    "response size exceeded",
+    "returned more than",
+    "too many results",
+    "query timeout",
+)
+RANGE_LIMIT_MARKERS = (
+    "block range",
+    "range too",
+    "range is too",
+    "range exceeds",
+    "maximum block range",
+)
+
+
+def classify_log_limit_error(exc):
+    """
+    Tells whether an eth_getLogs failure means the request was too large.
+
+    Returns:
+        "results" if the response would hold too many logs, "range" if the
+        block range exceeds the provider's limit, None for any other error,
+        including throttling.
+    """
+    if is_rate_limited(exc):
+        return None
+    if isinstance(exc, aiohttp.ClientResponseError) and exc.status == 413:
+        return "results"
+    if not isinstance(exc, RpcError):
+        return None
+    message = (exc.message or "").lower()
+    if any(marker in message for marker in RESULT_LIMIT_MARKERS):
+        return "results"
+    if any(marker in message for marker in RANGE_LIMIT_MARKERS):
+        return "range"
+    return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter for the given (0-based) retry attempt."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def retry_after_seconds(exc):
+    """
+    Returns the delay requested by a 429/503 response's Retry-After header,
+    or None if there is none. Both the seconds and HTTP-date forms are accepted.
+    """
+    headers = getattr(exc, "headers", None)
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_rate_limited(exc) -> bool:
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status == 429
+    # Some providers report throttling as a JSON-RPC error on a 200 response
+    return isinstance(exc, RpcError) and (
+        exc.code == 429 or "rate limit" in (exc.message or "").lower()
+    )
@@ -0,0 +1,267 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rich.align import Align
+from rich.console import Console
+from rich.table import Table
+from web3 import Web3
+
+from investigation import (
+    ABI,
+    CONTRACT_ADDRESS,
+    MAX_IN_FLIGHT_PER_RPC,
+    Investigator,
+    default_rpc_urls,
+)
+from log_cache import DEFAULT_CACHE_PATH
+from rpc_client import RateLimiter
+
+DEFAULT_REQUESTS_PER_SECOND = 25  # Request budget of a chain without its own
+
+
+def load_manifest(path: str) -> dict:
+    """
+    Loads a JSON manifest of investigation jobs.
+
+    {
+      "chains": {
+        "base": {"rpc_urls": ["${BASE_RPC_URL}"], "requests_per_second": 25,
+                 "max_in_flight": 20, "currency": "eth"}
+      },
+      "jobs": [
+        {"name": "memebase-base", "chain": "base", "contract": "0x...",
+         "abi": "memebase.json", "events": ["Hearted"], "addresses": ["0x..."],
+         "from_block": 31157310, "to_block": 31589310, "leaderboard": 10,
+         "historical_prices": true}
+      ]
+    }
+
+    RPC URLs may reference environment variables. A job's "abi" is a JSON
+    file relative to the manifest (Memebase's ABI if omitted), and its
+    "events" are names, menu numbers or event configs (see select_events).
+    Job names default to "<chain>-<contract>".
+
+    Raises:
+        ValueError: If a job names an unknown chain, or jobs share a name.
+    """
+    with open(path) as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    chains = {}
+    for chain_name, chain in manifest.get("chains", {}).items():
+        rpc_urls = [os.path.expandvars(url) for url in chain.get("rpc_urls", [])]
+        chains[chain_name] = {**chain, "rpc_urls": rpc_urls}
+
+    jobs = []
+    for job in manifest["jobs"]:
+        if job["chain"] not in chains:
+            raise ValueError(f"Job {job.get('name')} uses unknown chain {job['chain']}")
+        job = {
+            "contract": CONTRACT_ADDRESS,
+            "events": "*",
+            "addresses": [],
+            **job,
+        }
+        job.setdefault("name", f"{job['chain']}-{job['contract']}")
+        if "abi" in job:
+            with open(os.path.join(base_dir, job["abi"])) as f:
+                job["abi"] = json.load(f)
+        jobs.append(job)
+
+    names = [job["name"] for job in jobs]
+    duplicates = {name for name in names if names.count(name) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate job names: {', '.join(sorted(duplicates))}")
+    return {"chains": chains, "jobs": jobs}
+
+
+def make_investigators(chains: dict) -> dict:
+    """
+    Builds one Investigator per chain. Each chain has its own RPC pool, log
+    cache file (the same contract address can live on several chains) and
+    RateLimiter, so the jobs of one chain share its request budget while
+    chains do not slow each other down.
+    """
+    cache_dir = os.path.dirname(DEFAULT_CACHE_PATH)
+    return {
+        chain_name: Investigator(
+            chain["rpc_urls"] or default_rpc_urls(),
+            os.path.join(cache_dir, f"logs-{chain_name}.sqlite"),
+            max_in_flight=chain.get("max_in_flight", MAX_IN_FLIGHT_PER_RPC),
+            rate_limiter=RateLimiter(
+                chain.get("requests_per_second", DEFAULT_REQUESTS_PER_SECOND)
+            ),
+            currency=chain.get("currency", "eth"),
+        )
+        for chain_name, chain in chains.items()
+    }
+
+
+def run_job(investigator, job: dict) -> dict:
+    return investigator.investigate(
+        job["contract"],
+        job["events"],
+        job["addresses"],
+        (job.get("from_block"), job.get("to_block")),
+        leaderboard_size=job.get("leaderboard", 0),
+        time_series_bucket_blocks=job.get("time_series", 0),
+        export_dir=job.get("export_dir"),
+        abi=job.get("abi", ABI),
+        historical_prices=job.get("historical_prices", False),
+    )
+
+
+def run_manifest(manifest: dict, investigators: dict = None) -> dict:
+    """
+    Runs every job of a manifest concurrently, one thread per job, and
+    merges their reports (see merge_reports). A failing job is reported
+    under "errors" instead of stopping the others.
+    """
+    start_time = time.time()
+    owned = investigators is None
+    if owned:
+        investigators = make_investigators(manifest["chains"])
+
+    reports, errors = {}, {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, len(manifest["jobs"]))) as executor:
+            futures = {
+                job["name"]: (job, executor.submit(run_job, investigators[job["chain"]], job))
+                for job in manifest["jobs"]
+            }
+            for job_name, (job, future) in futures.items():
+                try:
+                    reports[job_name] = {**future.result(), "chain": job["chain"]}
+                except Exception as e:
+                    errors[job_name] = f"{type(e).__name__}: {e}"
+    finally:
+        if owned:
+            for investigator in investigators.values():
+                investigator.close()
+
+    merged_report = merge_reports(reports, errors)
+    merged_report["elapsed_seconds"] = time.time() - start_time
+    return merged_report
+
+
+def merge_reports(reports: dict, errors: dict = None) -> dict:
+    """
+    Merges per-job reports into one.
+
+    Returns:
+        dict: "jobs" holds each job's report (without its follower),
+        "results" maps checksummed address -> job -> event -> totals so an
+        address can be followed across chains and contracts, "failed_ranges"
+        maps job -> ranges for the incomplete jobs, and "errors" maps
+        job -> error for the jobs that did not finish.
+    """
+    merged_results = {}
+    for job_name, report in reports.items():
+        for address, events_data in report["results"].items():
+            merged_results.setdefault(Web3.to_checksum_address(address), {})[job_name] = events_data
+    return {
+        "jobs": {
+            job_name: {key: value for key, value in report.items() if key != "follower"}
+            for job_name, report in reports.items()
+        },
+        "results": merged_results,
+        "failed_ranges": {
+            job_name: report["failed_ranges"]
+            for job_name, report in reports.items()
+            if report["failed_ranges"]
+        },
+        "errors": errors or {},
+    }
+
+
+def render_merged_report(merged_report, console=None):
+    """
+    Prints a job summary and a per-address table across every job.
+    """
+    console = console or Console()
+    print(f"Time taken: {merged_report['elapsed_seconds']:.2f} seconds")
+
+    table = Table(title="Jobs", show_lines=True, title_style="bold magenta")
+    table.add_column("Job", style="cyan")
+    table.add_column("Chain", style="cyan")
+    table.add_column("Blocks", style="magenta", justify="right")
+    table.add_column("Seconds", style="green", justify="right")
+    table.add_column("Status", style="yellow")
+    for job_name, report in merged_report["jobs"].items():
+        failed_ranges = report["failed_ranges"]
+        status = (
+            f"incomplete: {sum(to - frm + 1 for frm, to in failed_ranges)} blocks failed"
+            if failed_ranges
+            else "ok"
+        )
+        table.add_row(
+            job_name,
+            report["chain"],
+            f"{report['from_block']}-{report['to_block']}",
+            f"{report['elapsed_seconds']:.2f}",
+            status,
+        )
+    for job_name, error in merged_report["errors"].items():
+        table.add_row(job_name, "", "", "", f"failed: {error}")
+    console.print(Align.center(table))
+
+    for address, jobs_data in merged_report["results"].items():
+        table = Table(
+            title=f"Results for Address: {address}", show_lines=True, title_style="bold magenta"
+        )
+        table.add_column("Job", style="cyan")
+        table.add_column("Event Name", style="cyan")
+        table.add_column("Count", style="magenta", justify="center")
+        table.add_column("Total Amount", style="green", justify="right")
+        table.add_column("Total Amount USD", style="yellow", justify="right")
+        for job_name, events_data in jobs_data.items():
+            for event_name, data in events_data.items():
+                usd_str = (
+                    f'{data["total_amount_usd"]:.2f}'
+                    if data["total_amount_usd"] is not None
+                    else "N/A"
+                )
+                table.add_row(
+                    job_name,
+                    event_name,
+                    str(data["count"]),
+                    f'{data["total_amount_eth"]:.6f}',
+                    usd_str,
+                )
+        console.print(Align.center(table))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the investigation jobs of a manifest concurrently and merge their reports."
+    )
+    parser.add_argument("manifest", help="JSON manifest of chains and jobs")
+    parser.add_argument(
+        "--json", action="store_true", help="Print the merged report as JSON instead of tables"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        manifest = load_manifest(args.manifest)
+    except (OSError, ValueError, KeyError) as e:
+        sys.exit(f"Invalid manifest {args.manifest}: {e!r}")
+
+    # Keep stdout clean for the JSON report, progress goes to stderr
+    with contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext():
+        merged_report = run_manifest(manifest)
+    if args.json:
+        print(json.dumps(merged_report, indent=2))
+    else:
+        render_merged_report(merged_report)
+    if merged_report["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+from rpc_client import (
+    backoff_delay,
+    classify_log_limit_error,
+    is_rate_limited,
+    retry_after_seconds,
+)
+
+EWMA_ALPHA = 0.2  # Weight of the newest sample in latency/error averages
+IDLE_POLL_SECONDS = 0.05  # How often a throttled worker re-checks its share
+
+# Adaptive getLogs range sizing
+DEFAULT_RANGE_SIZE = 500
+MAX_RANGE_SIZE = 100_000
+GROW_MAX_LOGS = 1_000  # Grow the range only while responses stay this small...
+GROW_MAX_LATENCY = 2.0  # ...and this fast (seconds)
+# Circuit breaker
+BREAKER_FAILURE_THRESHOLD = 5  # Consecutive failures that take an endpoint out of rotation
+BREAKER_COOLDOWN_SECONDS = 15.0  # First wait before probing it again; doubles per failed probe
+BREAKER_MAX_COOLDOWN_SECONDS = 300.0
+
+DEFAULT_RANGE_SIZES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "range_sizes.json"
+)
+
+
+_range_sizes_lock = threading.Lock()
+
+
+def load_range_sizes(path=DEFAULT_RANGE_SIZES_PATH) -> dict:
+    """Loads the per-endpoint range sizes learned by previous runs."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_range_sizes(range_sizes: dict, path=DEFAULT_RANGE_SIZES_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Concurrent investigations save from several threads, so merge under a lock and replace atomically
+    with _range_sizes_lock:
+        merged = {**load_range_sizes(path), **range_sizes}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(merged, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+class CircuitBreaker:
+    """
+    Takes an endpoint out of rotation after repeated failures.
+
+    closed: requests flow normally. open: no requests until the cooldown
+    passes. half-open: a single probe request decides whether the endpoint
+    closes again or goes back to open with a longer cooldown.
+    """
+
+    def __init__(self):
+        self.consecutive_failures = 0
+        self.cooldown = BREAKER_COOLDOWN_SECONDS
+        self.open_until = None
+
+    @property
+    def state(self) -> str:
+        if self.open_until is None:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half-open"
+
+    def allows(self, slot: int) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half-open" and slot == 0)
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.cooldown = BREAKER_COOLDOWN_SECONDS
+        self.open_until = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == "half-open":
+            # The probe failed: back off harder before the next one
+            self.cooldown = min(self.cooldown * 2, BREAKER_MAX_COOLDOWN_SECONDS)
+            self.open_until = time.monotonic() + self.cooldown
+        elif self.consecutive_failures >= BREAKER_FAILURE_THRESHOLD:
+            self.open_until = time.monotonic() + self.cooldown
+
+
+class EndpointStats:
+    """
+    Live latency and error-rate tracking for one RPC endpoint.
+    """
+
+    def __init__(
+        self,
+        client,
+        range_size=DEFAULT_RANGE_SIZE,
+        range_ceiling=MAX_RANGE_SIZE,
+        latency=None,
+    ):
+        self.client = client
+        self.url = client.url
+        self.latency = latency  # EWMA of successful request latency, seconds
+        self.error_rate = 0.0  # EWMA of failures, 0 (healthy) to 1 (always failing)
+        self.completed = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.retried = 0  # Chunks that failed here and went back on the queue
+        self.split = 0  # Chunks that were too large here and were halved
+        self.consecutive_rate_limits = 0
+        self.paused_until = 0.0  # Set when the endpoint asks us to slow down
+        self.breaker = CircuitBreaker()
+        self.range_size = range_size  # Blocks per eth_getLogs request
+        self.range_ceiling = range_ceiling  # Largest range the provider accepts
+
+    def adapt_range(self, blocks: int, log_count: int, latency: float):
+        """Doubles the range after a full-size request that came back small and fast."""
+        if (
+            blocks >= self.range_size
+            and log_count <= GROW_MAX_LOGS
+            and latency <= GROW_MAX_LATENCY
+        ):
+            self.range_size = min(self.range_size * 2, self.range_ceiling)
+
+    def shrink_range(self, blocks: int, limit_kind: str):
+        """
+        Halves the range after a too-large request. A block range limit is
+        provider-wide, so it also caps future growth.
+        """
+        self.range_size = max(1, min(self.range_size, blocks // 2))
+        if limit_kind == "range":
+            self.range_ceiling = min(self.range_ceiling, self.range_size)
+
+    def record_success(self, latency: float):
+        self.completed += 1
+        self.consecutive_rate_limits = 0
+        self.breaker.record_success()
+        self.latency = (
+            latency
+            if self.latency is None
+            else (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * latency
+        )
+        self.error_rate *= 1 - EWMA_ALPHA
+
+    def record_failure(self):
+        self.failed += 1
+        self.error_rate = (1 - EWMA_ALPHA) * self.error_rate + EWMA_ALPHA
+        self.breaker.record_failure()
+
+    def record_rate_limit(self, retry_after=None):
+        """Pauses every worker of this endpoint for Retry-After or a jittered backoff."""
+        self.rate_limited += 1
+        self.error_rate = (1 - EWMA_ALPHA) * self.error_rate + EWMA_ALPHA
+        delay = (
+            retry_after
+            if retry_after is not None
+            else backoff_delay(self.consecutive_rate_limits)
+        )
+        self.consecutive_rate_limits += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+
+    def allowed_in_flight(self, best_latency) -> int:
+        """
+        Share of this endpoint's in-flight slots it may use right now: slower
+        and error-prone endpoints get fewer, but always at least one so they
+        keep being measured.
+        """
+        weight = 1.0 - self.error_rate
+        if self.latency and best_latency:
+            weight *= min(1.0, best_latency / self.latency)
+        return max(1, round(self.client.max_in_flight * weight))
+
+
+class ChunkScheduler:
+    """
+    Work-stealing scheduler: every endpoint pulls block ranges from one shared
+    queue and carves off a chunk sized to what that endpoint handles well, so
+    fast endpoints take on more of the range than slow ones.
+    A failed chunk goes back on the queue with a jittered backoff and is
+    preferably retried on an endpoint that has not failed it yet; a chunk
+    rejected as too large is split in half instead. Rate-limited endpoints
+    pause, and endpoints that keep failing are cut off by a circuit breaker.
+    """
+
+    def __init__(
+        self,
+        clients,
+        fetch_chunk,
+        max_attempts,
+        initial_range_size=DEFAULT_RANGE_SIZE,
+        range_sizes=None,
+        endpoint_health=None,
+    ):
+        """
+        Args:
+            clients: AsyncRpcClient instances, one per endpoint.
+            fetch_chunk: Coroutine function (client, from_block, to_block) -> logs.
+                It must raise on failure.
+            max_attempts: How many times a chunk is tried before it is given up.
+            initial_range_size: Starting blocks per request for new endpoints.
+            range_sizes: Learned sizes by URL, as returned by range_sizes().
+            endpoint_health: Probe results by URL (see health.check_endpoints).
+                Their latency seeds each endpoint's share of the traffic and
+                their getLogs range limit caps its range until sizes are learned.
+        """
+        range_sizes = range_sizes or {}
+        endpoint_health = endpoint_health or {}
+        self.endpoints = []
+        for client in clients:
+            health = endpoint_health.get(client.url, {})
+            settings = {"range_size": initial_range_size}
+            if health.get("max_log_range"):
+                settings["range_ceiling"] = health["max_log_range"]
+                settings["range_size"] = min(initial_range_size, health["max_log_range"])
+            settings.update(range_sizes.get(client.url, {}))
+            self.endpoints.append(
+                EndpointStats(client, latency=health.get("latency_p50"), **settings)
+            )
+        self.fetch_chunk = fetch_chunk
+        self.max_attempts = max_attempts
+
+    def range_sizes(self) -> dict:
+        return {
+            endpoint.url: {
+                "range_size": endpoint.range_size,
+                "range_ceiling": endpoint.range_ceiling,
+            }
+            for endpoint in self.endpoints
+        }
+
+    def _best_latency(self):
+        latencies = [e.latency for e in self.endpoints if e.latency is not None]
+        return min(latencies) if latencies else None
+
+    async def run(self, ranges, on_result):
+        """
+        Fetches every (from_block, to_block) range and calls
+        on_result(chunk, logs) as each chunk of it finishes; logs is None for
+        chunks that failed on every attempt.
+
+        Raises:
+            Exception: Whatever on_result raised; the remaining chunks are
+                cancelled rather than fetched into a lost result.
+        """
+        queue = asyncio.Queue()
+        for block_range in ranges:
+            queue.put_nowait((block_range, 0, frozenset(), 0.0))
+
+        workers = [
+            asyncio.create_task(self._worker(endpoint, slot, queue, on_result))
+            for endpoint in self.endpoints
+            for slot in range(endpoint.client.max_in_flight)
+        ]
+        all_done = asyncio.create_task(queue.join())
+        try:
+            # Workers only stop by raising: watch them alongside the queue so
+            # an error neither leaves the queue waiting nor gets lost
+            done, _ = await asyncio.wait(
+                [all_done, *workers], return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task is not all_done:
+                    task.result()
+        finally:
+            for task in [all_done, *workers]:
+                task.cancel()
+            await asyncio.gather(all_done, *workers, return_exceptions=True)
+
+    async def _worker(self, endpoint, slot, queue, on_result):
+        while True:
+            if (
+                time.monotonic() < endpoint.paused_until
+                or not endpoint.breaker.allows(slot)
+                or slot >= endpoint.allowed_in_flight(self._best_latency())
+            ):
+                await asyncio.sleep(IDLE_POLL_SECONDS)
+                continue
+
+            (from_block, to_block), attempts, failed_on, not_before = await queue.get()
+            try:
+                # Leave chunks this endpoint already failed to the others, if any are left
+                if endpoint.url in failed_on and len(failed_on) < len(self.endpoints):
+                    queue.put_nowait(
+                        ((from_block, to_block), attempts, failed_on, not_before)
+                    )
+                    await asyncio.sleep(IDLE_POLL_SECONDS)
+                    continue
+                await asyncio.sleep(max(0.0, not_before - time.monotonic()))
+
+                # Take a chunk of the size this endpoint handles and put the rest back
+                if to_block - from_block + 1 > endpoint.range_size:
+                    queue.put_nowait(
+                        ((from_block + endpoint.range_size, to_block), 0, frozenset(), 0.0)
+                    )
+                    to_block = from_block + endpoint.range_size - 1
+                chunk = (from_block, to_block)
+                blocks = to_block - from_block + 1
+
+                started = time.monotonic()
+                try:
+                    logs = await self.fetch_chunk(endpoint.client, *chunk)
+                except Exception as exc:
+                    rate_limited = is_rate_limited(exc)
+                    limit_kind = None if rate_limited else classify_log_limit_error(exc)
+                    if limit_kind is not None and blocks > 1:
+                        endpoint.shrink_range(blocks, limit_kind)
+                        endpoint.split += 1
+                        middle = from_block + blocks // 2
+                        queue.put_nowait(
+                            ((from_block, middle - 1), attempts, failed_on, 0.0)
+                        )
+                        queue.put_nowait(((middle, to_block), attempts, failed_on, 0.0))
+                        continue
+
+                    if rate_limited:
+                        # Throttling says nothing about the chunk, so it may come back here
+                        endpoint.record_rate_limit(retry_after_seconds(exc))
+                        retry_on = failed_on
+                    else:
+                        endpoint.record_failure()
+                        retry_on = failed_on | {endpoint.url}
+                    if attempts + 1 < self.max_attempts:
+                        endpoint.retried += 1
+                        queue.put_nowait(
+                            (
+                                chunk,
+                                attempts + 1,
+                                retry_on,
+                                time.monotonic() + backoff_delay(attempts),
+                            )
+                        )
+                    else:
+                        on_result(chunk, None)
+                    continue
+
+                latency = time.monotonic() - started
+                endpoint.record_success(latency)
+                endpoint.adapt_range(blocks, len(logs), latency)
+                on_result(chunk, logs)
+            finally:
+                queue.task_done()
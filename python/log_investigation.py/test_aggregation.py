@@ -0,0 +1,116 @@
+import unittest
+
+from aggregation import ColumnarAggregator, EventAccumulator, build_address_index, np
+
+ALICE = "0x39FCE6a33596b7319d7941F3F90d256574bcc954"
+BOB = "0x82A9c823332518c32a0c0eDC050Ef00934Cf04D4"
+CAROL = "0x0001a500a6b18995B03f44bb040A5fFc28E45CB0"
+
+
+def hearted(hearter, amount):
+    return {"args": {"hearter": hearter, "memeNonce": 1, "amount": amount}}
+
+
+class TestAddressIndex(unittest.TestCase):
+    """
+    Tests for the single-pass address index.
+    """
+
+    def test_index_counts_and_sums_every_address(self):
+        # Arrange
+        logs = [hearted(ALICE, 10), hearted(BOB, 99), hearted(ALICE, 5)]
+
+        # Act
+        index = build_address_index(logs, "hearter", "amount")
+
+        # Assert
+        self.assertEqual(index, {ALICE: [2, 15], BOB: [1, 99]})
+
+
+class TestEventAccumulator(unittest.TestCase):
+    """
+    Tests for folding decoded logs into per-address totals.
+    """
+
+    def test_totals_are_folded_across_chunks(self):
+        # Arrange
+        accumulator = EventAccumulator("Hearted", "hearter", "amount")
+
+        # Act
+        accumulator.add_logs([hearted(ALICE, 10), hearted(BOB, 99)])
+        accumulator.add_logs([hearted(ALICE, 5)])
+
+        # Assert
+        self.assertEqual(accumulator.result(ALICE), {"count": 2, "total_amount": 15})
+        self.assertEqual(accumulator.log_count, 3)
+
+    def test_unseen_address_has_zero_totals(self):
+        accumulator = EventAccumulator("Hearted", "hearter", "amount")
+
+        accumulator.add_logs([hearted(BOB, 99)])
+
+        self.assertEqual(accumulator.result(ALICE), {"count": 0, "total_amount": 0})
+
+    def test_leaderboard_by_amount_and_count(self):
+        # Arrange
+        accumulator = EventAccumulator("Hearted", "hearter", "amount")
+        accumulator.add_logs(
+            [hearted(ALICE, 1), hearted(ALICE, 1), hearted(BOB, 50), hearted(CAROL, 7)]
+        )
+
+        # Act
+        by_amount = [address for address, _ in accumulator.top(2)]
+        by_count = [address for address, _ in accumulator.top(1, by="count")]
+
+        # Assert
+        self.assertEqual(by_amount, [BOB, CAROL])
+        self.assertEqual(by_count, [ALICE])
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestColumnarAggregator(unittest.TestCase):
+    """
+    Tests for the vectorized aggregation engine.
+    """
+
+    def setUp(self):
+        # Amounts above 2**64 exercise the high limb
+        self.aggregator = ColumnarAggregator(
+            addresses=[ALICE, BOB, ALICE, CAROL],
+            amounts=[2**100 + 1, 5, 2**64, 7],
+            block_numbers=[100, 105, 112, 125],
+        )
+
+    def test_group_by_address_is_exact(self):
+        totals = self.aggregator.group_by_address()
+
+        self.assertEqual(totals[ALICE], {"count": 2, "total_amount": 2**100 + 1 + 2**64})
+        self.assertEqual(totals[BOB], {"count": 1, "total_amount": 5})
+        self.assertEqual(totals[CAROL], {"count": 1, "total_amount": 7})
+
+    def test_time_series_buckets(self):
+        series = self.aggregator.time_series(10, start_block=100)
+
+        self.assertEqual(
+            series,
+            [(100, 2, 2**100 + 6), (110, 1, 2**64), (120, 1, 7)],
+        )
+
+    def test_value_series_prices_each_event(self):
+        aggregator = ColumnarAggregator(
+            addresses=[ALICE, BOB, ALICE],
+            amounts=[10**18, 2 * 10**18, 10**18],
+            block_numbers=[100, 105, 112],
+        )
+
+        values = aggregator.value_series(10, prices=[1000.0, 2000.0, 3000.0], start_block=100)
+
+        self.assertEqual(values, [5000.0, 3000.0])
+
+    def test_amounts_above_128_bits_are_rejected(self):
+        with self.assertRaises(OverflowError):
+            ColumnarAggregator([ALICE], [2**128], [100])
+
+
+if __name__ == "__main__":
+    unittest.main()
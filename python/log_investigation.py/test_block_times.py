@@ -0,0 +1,56 @@
+import asyncio
+import unittest
+
+from block_times import BlockTimeIndex, BlockTimeResolver
+
+
+class FakeClient:
+    """Answers eth_getBlockByNumber batches for a chain with a 2 second block time."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def call_batch(self, calls):
+        self.batches.append([int(params[0], 16) for _, params in calls])
+        return [{"timestamp": hex(1_000_000 + 2 * int(params[0], 16))} for _, params in calls]
+
+
+class TestBlockTimeResolver(unittest.TestCase):
+    """
+    Tests for sampling, batching and interpolating block timestamps.
+    """
+
+    def setUp(self):
+        self.index = BlockTimeIndex(":memory:")
+        self.client = FakeClient()
+
+    def tearDown(self):
+        self.index.close()
+
+    def resolve(self, block_numbers, head_block=None):
+        resolver = BlockTimeResolver(
+            self.client, self.index, chain_id=8453, sample_interval=100, batch_size=2
+        )
+        return asyncio.run(resolver.resolve(block_numbers, head_block))
+
+    def test_only_samples_are_fetched_and_the_rest_interpolated(self):
+        # Act
+        timestamps = self.resolve([150, 160, 250, 275])
+
+        # Assert
+        self.assertEqual(timestamps, {b: 1_000_000 + 2 * b for b in (150, 160, 250, 275)})
+        self.assertEqual(self.client.batches, [[100, 200], [275]])
+
+    def test_indexed_samples_are_not_fetched_again(self):
+        # Arrange
+        self.resolve([150, 275], head_block=1000)
+
+        # Act
+        self.resolve([120, 180], head_block=1000)
+
+        # Assert
+        self.assertEqual(len(self.client.batches), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
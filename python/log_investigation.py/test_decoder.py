@@ -0,0 +1,77 @@
+import unittest
+
+from abi_memebase import memebase_abi
+from decoder import EventDecoder
+
+HEARTER = "0x39FCE6a33596b7319d7941F3F90d256574bcc954"
+# keccak("Hearted(address,uint256,uint256)")
+HEARTED_TOPIC = "0xbe9e2dd3ea9f989c1b2e8c4e8f99d486f6fed42c7a8ec7f1ac42e550f571eda1"
+
+
+def word(value: int) -> str:
+    return hex(value)[2:].rjust(64, "0")
+
+
+def raw_hearted_log(decoder, hearter, meme_nonce, amount, block_number=100):
+    return {
+        "address": "0x82a9c823332518c32a0c0edc050ef00934cf04d4",
+        "blockNumber": block_number,
+        "logIndex": 3,
+        "transactionHash": "0x" + "ab" * 32,
+        "topics": [
+            decoder.topics["Hearted"],
+            "0x" + hearter.lower()[2:].rjust(64, "0"),
+            "0x" + word(meme_nonce),
+        ],
+        "data": "0x" + word(amount),
+    }
+
+
+class TestEventDecoder(unittest.TestCase):
+    """
+    Tests for decoding raw Memebase logs straight from topics and data.
+    """
+
+    def setUp(self):
+        self.decoder = EventDecoder(memebase_abi)
+
+    def test_topic0_matches_event_signature(self):
+        self.assertEqual(self.decoder.topics["Hearted"], HEARTED_TOPIC)
+
+    def test_decode_indexed_and_data_arguments(self):
+        # Arrange
+        raw_log = raw_hearted_log(self.decoder, HEARTER, 7, 10**20)
+
+        # Act
+        decoded = self.decoder.decode(raw_log)
+
+        # Assert
+        self.assertEqual(decoded["event"], "Hearted")
+        self.assertEqual(
+            decoded["args"], {"hearter": HEARTER, "memeNonce": 7, "amount": 10**20}
+        )
+        self.assertEqual(decoded["blockNumber"], 100)
+
+    def test_decode_columns_groups_by_event(self):
+        # Arrange
+        raw_logs = [
+            raw_hearted_log(self.decoder, HEARTER, 1, 5, block_number=100),
+            raw_hearted_log(self.decoder, HEARTER, 2, 6, block_number=101),
+        ]
+
+        # Act
+        tables = self.decoder.decode_columns(raw_logs)
+
+        # Assert
+        self.assertEqual(list(tables), ["Hearted"])
+        self.assertEqual(tables["Hearted"]["blockNumber"], [100, 101])
+        self.assertEqual(tables["Hearted"]["amount"], [5, 6])
+        self.assertEqual(tables["Hearted"]["hearter"], [HEARTER, HEARTER])
+
+    def test_unknown_event_is_rejected(self):
+        with self.assertRaises(ValueError):
+            EventDecoder(memebase_abi, ["NotAnEvent"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from export import ParquetEventWriter
+
+MAX_UINT256 = 2**256 - 1
+ABI = [
+    {
+        "type": "event",
+        "name": "Paid",
+        "anonymous": False,
+        "inputs": [
+            {"name": "payer", "type": "address", "indexed": True},
+            {"name": "amount", "type": "uint256", "indexed": False},
+            {"name": "fee", "type": "uint128", "indexed": False},
+            {"name": "delta", "type": "int256", "indexed": False},
+        ],
+    }
+]
+
+
+def make_log(block_number, amount, fee, delta):
+    return {
+        "event": "Paid",
+        "blockNumber": block_number,
+        "transactionHash": f"0x{block_number:064x}",
+        "logIndex": 0,
+        "args": {"payer": "0x" + "ab" * 20, "amount": amount, "fee": fee, "delta": delta},
+    }
+
+
+class TestParquetEventWriter(unittest.TestCase):
+    """
+    Tests for exporting decoded events to Parquet.
+    Follows AAA pattern: Arrange, Act, Assert.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.writer = ParquetEventWriter(directory.name, ABI, ["Paid"], 100, 200)
+
+    def test_integers_round_trip_exactly_up_to_max_uint256(self):
+        # Arrange
+        logs = [
+            make_log(100, 10**18, 5, -(2**255)),
+            make_log(101, MAX_UINT256, 2**128 - 1, 2**255 - 1),
+        ]
+
+        # Act
+        self.writer.write("Paid", logs)
+        self.writer.close()
+        rows = pq.read_table(self.writer.path("Paid")).to_pylist()
+
+        # Assert
+        def joined(row, name):
+            return int(row[f"{name}_hi"]) * 2**64 + row[f"{name}_lo"]
+
+        self.assertEqual([joined(row, "amount") for row in rows], [10**18, MAX_UINT256])
+        self.assertEqual([joined(row, "delta") for row in rows], [-(2**255), 2**255 - 1])
+        self.assertEqual([row["fee"] for row in rows], [Decimal(5), Decimal(2**128 - 1)])
+        self.assertEqual(rows[1]["block_number"], 101)
+        self.assertEqual(self.writer.rows_written["Paid"], 2)
+
+    def test_256_bit_integers_are_stored_as_numeric_limbs(self):
+        # Act
+        self.writer.write("Paid", [make_log(100, 10**18, 5, -1)])
+        self.writer.close()
+        schema = pq.read_schema(self.writer.path("Paid"))
+
+        # Assert
+        self.assertEqual(
+            {field.name: field.type for field in schema},
+            {
+                "block_number": pa.uint64(),
+                "transaction_hash": pa.string(),
+                "log_index": pa.uint32(),
+                "payer": pa.string(),
+                "amount_hi": pa.decimal256(76, 0),
+                "amount_lo": pa.uint64(),
+                "fee": pa.decimal256(76, 0),
+                "delta_hi": pa.decimal256(76, 0),
+                "delta_lo": pa.uint64(),
+            },
+        )
+
+    def test_partition_path_holds_event_and_block_range(self):
+        # Act
+        path = self.writer.path("Paid")
+
+        # Assert
+        self.assertTrue(
+            path.endswith(os.path.join("event=Paid", "blocks=100-200", "part-0.parquet"))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,299 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from web3 import Web3
+
+from decoder import EventDecoder
+from fake_node import FakeNode, SyntheticLogs
+from investigation import (
+    ABI,
+    CONTRACT_ADDRESS,
+    MAX_CHUNK_ATTEMPTS,
+    fetch_event_logs_in_chunks,
+    normalize_log,
+)
+from log_cache import LogCache
+from metrics import RunMetrics
+
+
+class TestSyntheticLogs(unittest.TestCase):
+    """
+    Tests for the deterministic logs served by the fake node.
+    """
+
+    def setUp(self):
+        self.logs = SyntheticLogs(CONTRACT_ADDRESS, ABI, ["Hearted", "Collected"], log_interval=10)
+
+    def test_logs_decode_and_follow_the_topic_filter(self):
+        # Arrange
+        decoder = EventDecoder(ABI, ["Hearted", "Collected"])
+
+        # Act
+        all_logs = self.logs.logs(1, 100)
+        hearted = self.logs.logs(1, 100, CONTRACT_ADDRESS, [[decoder.topics["Hearted"]]])
+
+        # Assert
+        self.assertEqual(len(all_logs), 20)
+        self.assertEqual(len(hearted), 10)
+        decoded = decoder.decode(normalize_log(hearted[0]))
+        self.assertEqual(decoded["event"], "Hearted")
+        self.assertEqual(decoded["blockNumber"], 10)
+        self.assertTrue(Web3.is_checksum_address(decoded["args"]["hearter"]))
+        self.assertGreater(decoded["args"]["amount"], 0)
+
+    def test_same_range_yields_same_logs(self):
+        # Act / Assert
+        self.assertEqual(self.logs.logs(500, 900), self.logs.logs(500, 900))
+
+
+class TestFakeNode(unittest.TestCase):
+    """
+    Tests for fetching from the fake node through the real fetch path.
+    """
+
+    def test_range_limited_fetch_splits_and_returns_every_log(self):
+        # Arrange
+        synthetic_logs = SyntheticLogs(CONTRACT_ADDRESS, ABI, ["Hearted"])
+        contract = Web3().eth.contract(address=CONTRACT_ADDRESS, abi=ABI)
+        metrics = RunMetrics()
+
+        # Act
+        with FakeNode(synthetic_logs, max_block_range=300) as node:
+            with contextlib.redirect_stdout(io.StringIO()):
+                logs_by_event, failed_ranges = fetch_event_logs_in_chunks(
+                    contract,
+                    ["Hearted"],
+                    1_000,
+                    4_999,
+                    1_000,
+                    [node.url],
+                    finalized_block=4_999,
+                    max_in_flight=4,
+                    metrics=metrics,
+                    range_sizes_path=None,
+                )
+
+        # Assert
+        self.assertEqual(failed_ranges, [])
+        self.assertEqual(len(logs_by_event["Hearted"]), 400)
+        self.assertGreater(node.requests["eth_getLogs"], 4_000 // 300)
+        endpoint = metrics.summary()["endpoints"][node.url]
+        # Rejected ranges are errors, but still one request each
+        self.assertGreater(endpoint["errors"], 0)
+        self.assertEqual(endpoint["requests"], node.requests["eth_getLogs"])
+
+    def test_result_limited_fetch_shrinks_the_range_and_returns_every_log(self):
+        # Arrange
+        synthetic_logs = SyntheticLogs(CONTRACT_ADDRESS, ABI, ["Hearted"])
+        contract = Web3().eth.contract(address=CONTRACT_ADDRESS, abi=ABI)
+
+        # Act
+        with FakeNode(synthetic_logs, max_results=30) as node:
+            with contextlib.redirect_stdout(io.StringIO()):
+                logs_by_event, failed_ranges = fetch_event_logs_in_chunks(
+                    contract,
+                    ["Hearted"],
+                    1_000,
+                    4_999,
+                    1_000,
+                    [node.url],
+                    finalized_block=4_999,
+                    max_in_flight=4,
+                    range_sizes_path=None,
+                )
+
+        # Assert
+        self.assertEqual(failed_ranges, [])
+        self.assertEqual(len(logs_by_event["Hearted"]), 400)
+
+    def test_chunks_throttled_on_every_attempt_are_reported_as_failed(self):
+        # Arrange
+        synthetic_logs = SyntheticLogs(CONTRACT_ADDRESS, ABI, ["Hearted"])
+        contract = Web3().eth.contract(address=CONTRACT_ADDRESS, abi=ABI)
+        metrics = RunMetrics()
+
+        # Act
+        with FakeNode(synthetic_logs, rate_limit_probability=1.0) as node:
+            with contextlib.redirect_stdout(io.StringIO()), mock.patch(
+                "scheduler.backoff_delay", return_value=0.0
+            ):
+                logs_by_event, failed_ranges = fetch_event_logs_in_chunks(
+                    contract,
+                    ["Hearted"],
+                    1_000,
+                    1_999,
+                    1_000,
+                    [node.url],
+                    finalized_block=1_999,
+                    max_in_flight=1,
+                    metrics=metrics,
+                    range_sizes_path=None,
+                )
+
+        # Assert
+        self.assertEqual(failed_ranges, [(1_000, 1_999)])
+        self.assertEqual(logs_by_event["Hearted"], [])
+        endpoint = metrics.summary()["endpoints"][node.url]
+        self.assertEqual(endpoint["rate_limited"], MAX_CHUNK_ATTEMPTS)
+        self.assertEqual(endpoint["retries"], MAX_CHUNK_ATTEMPTS - 1)
+
+    def test_filter_on_a_later_topic_matches_the_full_scan(self):
+        # Arrange
+        synthetic_logs = SyntheticLogs(CONTRACT_ADDRESS, ABI, ["Collected"])
+        contract = Web3().eth.contract(address=CONTRACT_ADDRESS, abi=ABI)
+        meme_token = Web3.to_checksum_address(synthetic_logs.addresses[1])
+
+        def fetch(node, **options):
+            with contextlib.redirect_stdout(io.StringIO()):
+                logs_by_event, _ = fetch_event_logs_in_chunks(
+                    contract,
+                    ["Collected"],
+                    1_000,
+                    2_999,
+                    1_000,
+                    [node.url],
+                    range_sizes_path=None,
+                    **options,
+                )
+            # Chunks arrive in any order
+            return sorted(
+                (log["blockNumber"], log["logIndex"])
+                for log in logs_by_event["Collected"]
+                if log["args"]["memeToken"] == meme_token
+            )
+
+        # Act
+        with FakeNode(synthetic_logs) as node:
+            full_scan = fetch(node)
+            filtered = fetch(node, addresses=[meme_token], address_position=2)
+
+        # Assert
+        self.assertTrue(full_scan)
+        self.assertEqual(filtered, full_scan)
+
+    def test_error_in_on_logs_stops_the_fetch(self):
+        # Arrange
+        synthetic_logs = SyntheticLogs(CONTRACT_ADDRESS, ABI, ["Hearted"])
+        contract = Web3().eth.contract(address=CONTRACT_ADDRESS, abi=ABI)
+        calls = []
+
+        def on_logs(name, logs):
+            calls.append(name)
+            if len(calls) == 2:
+                raise ValueError("aggregation failed")
+
+        # Act / Assert
+        with FakeNode(synthetic_logs) as node:
+            with contextlib.redirect_stdout(io.StringIO()), self.assertRaises(ValueError):
+                fetch_event_logs_in_chunks(
+                    contract,
+                    ["Hearted"],
+                    1_000,
+                    10_999,
+                    500,
+                    [node.url],
+                    on_logs=on_logs,
+                    keep_logs=False,
+                    max_in_flight=4,
+                    range_sizes_path=None,
+                )
+
+
+class TestAddressFilter(unittest.TestCase):
+    """
+    Tests for filtering investigated addresses on the node (topic1), with
+    and without the log cache.
+    """
+
+    FROM_BLOCK, TO_BLOCK = 1_000, 2_999
+
+    def setUp(self):
+        synthetic_logs = SyntheticLogs(CONTRACT_ADDRESS, ABI, ["Hearted", "Collected"])
+        self.addresses = [Web3.to_checksum_address(a) for a in synthetic_logs.addresses[:2]]
+        self.contract = Web3().eth.contract(address=CONTRACT_ADDRESS, abi=ABI)
+        self.node = FakeNode(synthetic_logs).__enter__()
+        self.addCleanup(self.node.__exit__)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def make_cache(self, name):
+        cache = LogCache(os.path.join(self.directory, f"{name}.sqlite"))
+        self.addCleanup(cache.close)
+        return cache
+
+    def totals(self, cache=None, addresses=None):
+        """Per-event, per-address count and amount sum of the investigated addresses."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            logs_by_event, failed_ranges = fetch_event_logs_in_chunks(
+                self.contract,
+                ["Hearted", "Collected"],
+                self.FROM_BLOCK,
+                self.TO_BLOCK,
+                500,
+                [self.node.url],
+                cache,
+                finalized_block=self.TO_BLOCK,
+                addresses=addresses,
+                range_sizes_path=None,
+            )
+        self.assertEqual(failed_ranges, [])
+        amount_args = {"Hearted": "amount", "Collected": "allocation"}
+        totals = {}
+        for name, logs in logs_by_event.items():
+            for log in logs:
+                hearter = log["args"]["hearter"]
+                if hearter in self.addresses:
+                    count, amount = totals.get((name, hearter), (0, 0))
+                    totals[(name, hearter)] = (count + 1, amount + log["args"][amount_args[name]])
+        return totals
+
+    def test_filtered_scan_matches_the_full_scan_cold_and_warm(self):
+        # Arrange
+        expected = self.totals()
+        cache = self.make_cache("filtered")
+
+        # Act
+        cold = self.totals(cache, self.addresses)
+        requests_after_cold = self.node.requests["eth_getLogs"]
+        warm = self.totals(cache, self.addresses)
+
+        # Assert
+        self.assertTrue(expected)
+        self.assertEqual(cold, expected)
+        self.assertEqual(warm, expected)
+        self.assertEqual(self.node.requests["eth_getLogs"], requests_after_cold)
+
+    def test_cached_full_scan_is_filtered_locally(self):
+        # Arrange
+        cache = self.make_cache("full")
+        expected = self.totals(cache)
+        requests_after_full_scan = self.node.requests["eth_getLogs"]
+
+        # Act
+        filtered = self.totals(cache, self.addresses)
+
+        # Assert
+        self.assertEqual(filtered, expected)
+        self.assertEqual(self.node.requests["eth_getLogs"], requests_after_full_scan)
+
+    def test_cached_logs_are_not_counted_twice_when_their_range_is_refetched(self):
+        # Arrange
+        expected = self.totals()
+        cache = self.make_cache("partial")
+        # Only the first address is cached, so the second one's gap covers the whole range
+        self.totals(cache, self.addresses[:1])
+
+        # Act
+        both = self.totals(cache, self.addresses)
+
+        # Assert
+        self.assertEqual(both, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+
+from aggregation import EventAccumulator
+from follow import HeadFollower, checkpoint_path
+
+ALICE = "0x39FCE6a33596b7319d7941F3F90d256574bcc954"
+
+
+class FakeChain:
+    """Minimal stand-in for web3: a head and a hash per block that a reorg can change."""
+
+    def __init__(self, head):
+        self.block_number = head
+        self.forks = {}
+
+    @property
+    def eth(self):
+        return self
+
+    def get_block(self, number):
+        return {"hash": f"0x{number:x}-{self.forks.get(number, 0)}"}
+
+    def to_hex(self, value):
+        return value
+
+
+def hearted(block, amount):
+    return {"blockNumber": block, "args": {"hearter": ALICE, "amount": amount}}
+
+
+class TestHeadFollower(unittest.TestCase):
+    """
+    Tests for applying head deltas and rolling back reorged blocks.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "follow.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reorged_blocks_are_rolled_back_and_refetched(self):
+        # Arrange
+        chain = FakeChain(head=100)
+        logs_by_block = {101: [hearted(101, 5)], 102: [hearted(102, 7)]}
+
+        def fetch_logs(from_block, to_block):
+            logs = [log for b in range(from_block, to_block + 1) for log in logs_by_block.get(b, [])]
+            return {"Hearted": logs}, []
+
+        accumulator = EventAccumulator("Hearted", "hearter", "amount")
+        follower = HeadFollower(chain, fetch_logs, {"Hearted": accumulator}, self.path)
+        follower.start(100)
+        chain.block_number = 101
+        follower.poll_once()
+        chain.block_number = 102
+        follower.poll_once()
+
+        # Act: block 102 is replaced by a block with a different log
+        chain.forks[102] = 1
+        logs_by_block[102] = [hearted(102, 1)]
+        applied = follower.poll_once()
+
+        # Assert
+        self.assertEqual(applied, (102, 102))
+        self.assertEqual(accumulator.result(ALICE), {"count": 2, "total_amount": 6})
+
+    def test_reorg_during_the_fetch_is_rolled_back_on_the_next_poll(self):
+        # Arrange
+        chain = FakeChain(head=100)
+        logs_by_block = {101: [hearted(101, 5)]}
+
+        def fetch_logs(from_block, to_block):
+            logs = [log for b in range(from_block, to_block + 1) for log in logs_by_block.get(b, [])]
+            # Block 101 is replaced after these logs were read from it
+            chain.forks[101] = 1
+            logs_by_block[101] = [hearted(101, 2)]
+            return {"Hearted": logs}, []
+
+        accumulator = EventAccumulator("Hearted", "hearter", "amount")
+        follower = HeadFollower(chain, fetch_logs, {"Hearted": accumulator}, self.path)
+        follower.start(100)
+        chain.block_number = 101
+        follower.poll_once()
+
+        # Act
+        applied = follower.poll_once()
+
+        # Assert
+        self.assertEqual(applied, (101, 101))
+        self.assertEqual(accumulator.result(ALICE), {"count": 1, "total_amount": 2})
+
+    def test_checkpoint_depends_on_the_chain_and_the_scan_start(self):
+        # Act
+        paths = {
+            checkpoint_path(chain_id, "0xAB", ["Hearted"], from_block)
+            for chain_id, from_block in ((1, 0), (8453, 0), (1, 100))
+        }
+
+        # Assert
+        self.assertEqual(len(paths), 3)
+
+    def test_checkpoint_restores_aggregates(self):
+        # Arrange
+        chain = FakeChain(head=100)
+        accumulator = EventAccumulator("Hearted", "hearter", "amount")
+        follower = HeadFollower(
+            chain, lambda a, b: ({"Hearted": [hearted(101, 5)]}, []), {"Hearted": accumulator}, self.path
+        )
+        follower.start(100)
+        chain.block_number = 101
+        follower.poll_once()
+
+        # Act
+        restored = EventAccumulator("Hearted", "hearter", "amount")
+        resumed = HeadFollower(chain, None, {"Hearted": restored}, self.path)
+        loaded = resumed.load()
+
+        # Assert
+        self.assertTrue(loaded)
+        self.assertEqual(resumed.last_block, 101)
+        self.assertEqual(restored.result(ALICE), {"count": 1, "total_amount": 5})
+
+
+if __name__ == "__main__":
+    unittest.main()
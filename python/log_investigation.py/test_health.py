@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+from health import MAX_HEAD_LAG, check_endpoints, rank_endpoints
+
+
+def probe_result(url, latency, head_block=1_000, ok=True):
+    return {
+        "url": url,
+        "ok": ok,
+        "probed_at": 0.0,
+        "head_block": head_block,
+        "latency_p50": latency,
+        "latency_p90": latency,
+        "max_log_range": 10_000,
+        "archive": True,
+    }
+
+
+class TestRankEndpoints(unittest.TestCase):
+    """
+    Tests for ordering endpoints by their probe results.
+    """
+
+    def test_fastest_first_and_lagging_or_dead_left_out(self):
+        # Arrange
+        results = [
+            probe_result("slow", 0.3),
+            probe_result("fast", 0.05),
+            probe_result("lagging", 0.01, head_block=1_000 - MAX_HEAD_LAG - 1),
+            {"url": "dead", "ok": False, "probed_at": 0.0, "error": "refused"},
+        ]
+
+        # Act
+        ranked = rank_endpoints(results)
+
+        # Assert
+        self.assertEqual([r["url"] for r in ranked], ["fast", "slow"])
+        self.assertIn("behind", results[2]["error"])
+
+
+class TestCheckEndpoints(unittest.TestCase):
+    """
+    Tests for the cached, parallel health check.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "rpc_health.json")
+        self.probed = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    async def probe(self, url):
+        self.probed.append(url)
+        return {**probe_result(url, 0.1), "probed_at": 1e12}
+
+    def test_fresh_cached_results_skip_the_probe(self):
+        # Arrange
+        check_endpoints(["a", "b"], path=self.path, probe=self.probe)
+
+        # Act
+        ranked = check_endpoints(["b", "a"], path=self.path, probe=self.probe)
+
+        # Assert
+        self.assertEqual(sorted(self.probed), ["a", "b"])
+        self.assertEqual(len(ranked), 2)
+
+    def test_cached_failure_is_probed_again(self):
+        # Arrange
+        down = {"url": "a", "ok": False, "probed_at": 1e12, "error": "refused"}
+
+        async def failing_probe(url):
+            return down
+
+        check_endpoints(["a"], path=self.path, probe=failing_probe)
+
+        # Act
+        ranked = check_endpoints(["a"], path=self.path, probe=self.probe)
+
+        # Assert
+        self.assertEqual(self.probed, ["a"])
+        self.assertEqual([r["url"] for r in ranked], ["a"])
+
+    def test_refresh_probes_again(self):
+        # Arrange
+        check_endpoints(["a"], path=self.path, probe=self.probe)
+
+        # Act
+        check_endpoints(["a"], path=self.path, refresh=True, probe=self.probe)
+
+        # Assert
+        self.assertEqual(self.probed, ["a", "a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from investigation import (
+    ABI,
+    EVENT_CONFIGS,
+    Investigator,
+    get_address_position,
+    get_topic_position,
+    investigate,
+    parse_args,
+    select_events,
+    split_urls,
+)
+
+CONTRACT = "0x82A9c823332518c32a0c0eDC050Ef00934Cf04D4"
+TOPIC = "0xabc"
+
+
+class TestSelectEvents(unittest.TestCase):
+    """
+    Tests for resolving event choices from the CLI and library API.
+    """
+
+    def test_names_and_numbers_resolve_without_duplicates(self):
+        # Act
+        selected_events = select_events("1, collected,Hearted")
+
+        # Assert
+        self.assertEqual([e["name"] for e in selected_events], ["Hearted", "Collected"])
+
+    def test_star_selects_every_event(self):
+        # Act
+        selected_events = select_events(["*"])
+
+        # Assert
+        self.assertEqual(selected_events, list(EVENT_CONFIGS.values()))
+
+    def test_unknown_event_is_rejected(self):
+        # Act / Assert
+        with self.assertRaises(ValueError):
+            select_events("Hearted,Minted")
+
+
+class TestAddressTopics(unittest.TestCase):
+    """
+    Tests for locating the investigated address among an event's topics.
+    """
+
+    def test_topic_position_follows_the_indexed_inputs(self):
+        # Act / Assert
+        self.assertEqual(get_topic_position(ABI, "Collected", "hearter"), 1)
+        self.assertEqual(get_topic_position(ABI, "Collected", "memeToken"), 2)
+        self.assertEqual(get_topic_position(ABI, "Unleashed", "memeToken"), 3)
+        self.assertIsNone(get_topic_position(ABI, "Collected", "allocation"))
+
+    def test_events_filter_on_a_shared_position_only(self):
+        # Arrange
+        by_meme_token = {"name": "Collected", "event_arg": "memeToken", "amount_arg": "allocation"}
+        by_amount = {"name": "Collected", "event_arg": "allocation", "amount_arg": "allocation"}
+
+        # Act / Assert
+        self.assertEqual(get_address_position(ABI, EVENT_CONFIGS.values()), 1)
+        self.assertEqual(get_address_position(ABI, [by_meme_token]), 2)
+        self.assertIsNone(get_address_position(ABI, [EVENT_CONFIGS["1"], by_meme_token]))
+        self.assertIsNone(get_address_position(ABI, [by_amount]))
+
+
+class TestInvestigatorCache(unittest.TestCase):
+    """
+    Tests for keeping each chain's logs in its own cache.
+    """
+
+    def test_chains_sharing_a_cache_path_get_separate_caches(self):
+        # Arrange
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cache_path = os.path.join(tmp.name, "logs.sqlite")
+        caches = []
+        for chain_id in (1, 8453):
+            with mock.patch.multiple(
+                "investigation",
+                DEFAULT_BLOCK_TIMES_PATH=":memory:",
+                DEFAULT_PRICES_PATH=":memory:",
+            ):
+                investigator = Investigator(["http://rpc"], cache_path)
+            self.addCleanup(investigator.close)
+            investigator._w3 = SimpleNamespace(eth=SimpleNamespace(chain_id=chain_id))
+            caches.append(investigator.cache)
+        mainnet, base = caches
+
+        # Act
+        mainnet.store(CONTRACT, TOPIC, 100, 199, [])
+
+        # Assert
+        self.assertEqual(
+            [mainnet.path, base.path],
+            [os.path.join(tmp.name, f"logs-{chain_id}.sqlite") for chain_id in (1, 8453)],
+        )
+        self.assertEqual(base.missing_ranges(CONTRACT, TOPIC, 100, 199), [(100, 199)])
+
+
+class TestInvestigate(unittest.TestCase):
+    """
+    Tests for the one-shot investigate() wrapper.
+    """
+
+    def test_constructor_options_configure_the_investigator(self):
+        # Arrange
+        rate_limiter = object()
+
+        # Act
+        with mock.patch("investigation.Investigator") as investigator_class:
+            investigate(
+                "0xabc",
+                "1",
+                rpc_urls=["http://rpc"],
+                max_in_flight=2,
+                rate_limiter=rate_limiter,
+                leaderboard_size=5,
+            )
+
+        # Assert
+        args, kwargs = investigator_class.call_args
+        self.assertEqual(args[0], ["http://rpc"])
+        self.assertEqual(kwargs["max_in_flight"], 2)
+        self.assertIs(kwargs["rate_limiter"], rate_limiter)
+        investigator = investigator_class.return_value.__enter__.return_value
+        investigator.investigate.assert_called_once_with(
+            "0xabc", "1", (), None, leaderboard_size=5
+        )
+
+
+class TestParseArgs(unittest.TestCase):
+    """
+    Tests for the non-interactive command line.
+    """
+
+    def test_flags_replace_the_prompts(self):
+        # Act
+        args = parse_args(
+            ["--events", "1", "--addresses", "0xabc", "--leaderboard", "10", "--follow"]
+        )
+
+        # Assert
+        self.assertEqual(args.events, "1")
+        self.assertEqual(args.leaderboard, 10)
+        self.assertTrue(args.follow)
+        self.assertIsNone(args.to_block)
+
+    def test_rpc_urls_are_stripped(self):
+        # Act / Assert
+        self.assertEqual(split_urls("http://a, http://b ,,"), ["http://a", "http://b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
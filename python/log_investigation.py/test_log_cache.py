@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+
+from log_cache import LogCache, coverage_map, intersect_ranges, merge_ranges, range_contains
+
+CONTRACT = "0x82A9c823332518c32a0c0eDC050Ef00934Cf04D4"
+TOPIC = "0xabc"
+
+
+def make_log(block_number, log_index=0):
+    return {"blockNumber": block_number, "logIndex": log_index, "data": "0x"}
+
+
+class TestLogCache(unittest.TestCase):
+    """
+    Tests for the segment bookkeeping of the on-disk log cache.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = LogCache(os.path.join(self.tmp_dir.name, "logs.sqlite"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_empty_cache_misses_whole_range(self):
+        self.assertEqual(self.cache.missing_ranges(CONTRACT, TOPIC, 100, 200), [(100, 200)])
+
+    def test_missing_ranges_are_the_gaps(self):
+        # Arrange
+        self.cache.store(CONTRACT, TOPIC, 100, 149, [])
+        self.cache.store(CONTRACT, TOPIC, 170, 179, [])
+
+        # Act
+        missing = self.cache.missing_ranges(CONTRACT, TOPIC, 90, 200)
+
+        # Assert
+        self.assertEqual(missing, [(90, 99), (150, 169), (180, 200)])
+
+    def test_fully_cached_range_has_no_gaps(self):
+        self.cache.store(CONTRACT, TOPIC, 100, 199, [])
+        self.cache.store(CONTRACT, TOPIC, 200, 299, [])
+
+        self.assertEqual(self.cache.missing_ranges(CONTRACT, TOPIC, 150, 250), [])
+
+    def test_get_logs_returns_stored_logs_in_order(self):
+        # Arrange
+        self.cache.store(CONTRACT, TOPIC, 100, 199, [make_log(150, 1), make_log(120)])
+
+        # Act
+        logs = self.cache.get_logs(CONTRACT.lower(), TOPIC, 100, 140)
+
+        # Assert
+        self.assertEqual(logs, [make_log(120)])
+
+    def test_iter_logs_yields_batches_in_order(self):
+        # Arrange
+        logs = [make_log(block, index) for block in (100, 101, 102) for index in (0, 1)]
+        self.cache.store(CONTRACT, TOPIC, 100, 199, list(reversed(logs)))
+
+        # Act
+        batches = list(self.cache.iter_logs(CONTRACT, TOPIC, 101, 199, batch_size=3))
+
+        # Assert
+        self.assertEqual([len(batch) for batch in batches], [3, 1])
+        self.assertEqual([log for batch in batches for log in batch], logs[2:])
+
+    def test_keys_are_separated_by_topic(self):
+        self.cache.store(CONTRACT, TOPIC, 100, 199, [make_log(150)])
+
+        self.assertEqual(self.cache.get_logs(CONTRACT, "0xdef", 100, 199), [])
+        self.assertEqual(self.cache.missing_ranges(CONTRACT, "0xdef", 100, 199), [(100, 199)])
+
+    def test_failures_are_journaled_until_fetched(self):
+        # Arrange
+        self.cache.record_failures(CONTRACT, TOPIC, [(100, 149), (300, 349)])
+
+        # Act
+        self.cache.store(CONTRACT, TOPIC, 100, 199, [])
+        failed = self.cache.failed_ranges(CONTRACT, TOPIC, 0, 320)
+
+        # Assert
+        self.assertEqual(failed, [(300, 320)])
+
+
+class TestRangeHelpers(unittest.TestCase):
+    """
+    Tests for the block range helpers shared by the cache and the fetcher.
+    """
+
+    def test_merge_ranges_joins_overlapping_and_adjacent(self):
+        merged = merge_ranges([(200, 300), (100, 150), (151, 160), (250, 400)])
+
+        self.assertEqual(merged, [(100, 160), (200, 400)])
+
+    def test_range_contains(self):
+        ranges = [(100, 160), (200, 400)]
+
+        self.assertTrue(range_contains(ranges, 100))
+        self.assertTrue(range_contains(ranges, 400))
+        self.assertFalse(range_contains(ranges, 170))
+        self.assertFalse(range_contains(ranges, 99))
+        self.assertFalse(range_contains([], 100))
+
+    def test_intersect_ranges(self):
+        intersection = intersect_ranges([(100, 160), (200, 400)], [(150, 250), (390, 500)])
+
+        self.assertEqual(intersection, [(150, 160), (200, 250), (390, 400)])
+
+    def test_coverage_map_keeps_small_failures_visible(self):
+        bar = coverage_map(0, 999, [("#", [(0, 999)]), ("x", [(500, 500)])], width=10)
+
+        self.assertEqual(bar, "#####x####")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from unittest import mock
+
+from metrics import RunMetrics, to_prometheus
+
+
+class TestRunMetrics(unittest.TestCase):
+    """
+    Tests for the run metrics summary and its Prometheus rendering.
+    """
+
+    def setUp(self):
+        self.metrics = RunMetrics()
+        for latency in (0.04, 0.2, 0.3, 3.0):
+            self.metrics.record_request("http://a", latency, 100)
+        self.metrics.record_failure("http://a", rate_limited=True)
+        self.metrics.record_failure("http://a", rate_limited=False)
+        self.metrics.add_time("decode", 0.5)
+        self.metrics.add_time("decode", 0.25)
+        self.metrics.logs = 10
+
+    def test_summary_counts_requests_and_buckets_latencies(self):
+        # Act
+        summary = self.metrics.summary()
+
+        # Assert
+        endpoint = summary["endpoints"]["http://a"]
+        self.assertEqual(endpoint["requests"], 6)
+        self.assertEqual(endpoint["rate_limited"], 1)
+        self.assertEqual(endpoint["errors"], 1)
+        self.assertEqual(endpoint["bytes_received"], 400)
+        self.assertEqual(endpoint["latency"]["p50"], 0.2)
+        buckets = endpoint["latency"]["buckets"]
+        self.assertEqual(buckets["0.05"], 1)
+        self.assertEqual(buckets["0.25"], 2)
+        self.assertEqual(buckets["5.0"], 4)
+        self.assertEqual(buckets["+Inf"], 4)
+        self.assertEqual(summary["stages"], {"decode": 0.75})
+        self.assertEqual(summary["logs"], 10)
+
+    def test_json_rpc_error_in_an_answered_request_counts_it_once(self):
+        # Arrange
+        metrics = RunMetrics()
+        metrics.record_request("http://a", 0.1, 100)
+
+        # Act
+        metrics.record_failure("http://a", rate_limited=False, answered=True)
+
+        # Assert
+        endpoint = metrics.summary()["endpoints"]["http://a"]
+        self.assertEqual(endpoint["requests"], 1)
+        self.assertEqual(endpoint["errors"], 1)
+
+    def test_nested_stage_time_is_left_out_of_the_enclosing_stage(self):
+        # Arrange
+        metrics = RunMetrics()
+        clock = iter([0.0, 1.0, 1.5, 2.0, 2.25, 3.0])
+
+        # Act
+        with mock.patch("metrics.time.perf_counter", side_effect=lambda: next(clock)):
+            with metrics.timer("fetch"):
+                with metrics.timer("decode"):
+                    pass
+                with metrics.timer("aggregation"):
+                    pass
+
+        # Assert
+        self.assertEqual(
+            metrics.summary()["stages"], {"decode": 0.5, "aggregation": 0.25, "fetch": 2.25}
+        )
+
+    def test_prometheus_text_has_labelled_histogram_and_counters(self):
+        # Act
+        text = to_prometheus(self.metrics.summary(), {"contract": '0x"1'})
+
+        # Assert
+        self.assertIn("# TYPE log_investigation_rpc_request_duration_seconds histogram", text)
+        self.assertIn(
+            'log_investigation_rpc_request_duration_seconds_bucket'
+            '{contract="0x\\"1",endpoint="http://a",le="+Inf"} 4',
+            text,
+        )
+        self.assertIn(
+            'log_investigation_rpc_rate_limited_total{contract="0x\\"1",endpoint="http://a"} 1',
+            text,
+        )
+        self.assertIn('log_investigation_logs_total{contract="0x\\"1"} 10', text)
+        self.assertIn('stage="decode"} 0.75', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import email.utils
+import random
+import time
+import unittest
+
+import aiohttp
+
+from rpc_client import (
+    RpcError,
+    backoff_delay,
+    classify_log_limit_error,
+    is_rate_limited,
+    retry_after_seconds,
+)
+
+
+def http_error(status, headers=None):
+    return aiohttp.ClientResponseError(None, (), status=status, headers=headers)
+
+
+class TestClassifyLogLimitError(unittest.TestCase):
+    """
+    Tests for telling oversized eth_getLogs requests from other failures.
+    Follows AAA pattern: Arrange, Act, Assert.
+    """
+
+    def test_result_limits_are_recognised(self):
+        # Arrange
+        errors = [
+            RpcError(-32005, "query returned more than 10000 results"),
+            RpcError(-32602, "Log response size exceeded"),
+            RpcError(-32005, "too many results, narrow the filter"),
+            http_error(413),
+        ]
+
+        # Act / Assert
+        for error in errors:
+            self.assertEqual(classify_log_limit_error(error), "results", error)
+
+    def test_range_limits_are_recognised(self):
+        # Arrange
+        errors = [
+            RpcError(-32600, "block range is too wide, maximum block range is 2000"),
+            RpcError(-32000, "eth_getLogs block range too large"),
+        ]
+
+        # Act / Assert
+        for error in errors:
+            self.assertEqual(classify_log_limit_error(error), "range", error)
+
+    def test_other_errors_are_not_limits(self):
+        # Act / Assert
+        self.assertIsNone(classify_log_limit_error(RpcError(-32601, "method not found")))
+        self.assertIsNone(classify_log_limit_error(RpcError(-32000, None)))
+        self.assertIsNone(classify_log_limit_error(http_error(500)))
+        self.assertIsNone(classify_log_limit_error(TimeoutError()))
+
+    def test_throttling_is_not_a_limit(self):
+        # Arrange
+        errors = [
+            RpcError(-32005, "Rate limit exceeded"),
+            RpcError(429, "too many requests, more than 10 per second"),
+            http_error(429),
+        ]
+
+        # Act / Assert
+        for error in errors:
+            self.assertIsNone(classify_log_limit_error(error), error)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """
+    Tests for the backoff and throttling helpers.
+    """
+
+    def test_backoff_is_jittered_below_a_doubling_capped_bound(self):
+        # Arrange
+        random.seed(0)
+
+        # Act
+        delays = {attempt: [backoff_delay(attempt) for _ in range(200)] for attempt in (0, 3, 10)}
+
+        # Assert
+        self.assertTrue(all(0 <= delay <= 1 for delay in delays[0]))
+        self.assertTrue(all(0 <= delay <= 8 for delay in delays[3]))
+        self.assertTrue(all(0 <= delay <= 60 for delay in delays[10]))
+        self.assertGreater(max(delays[10]), 8)
+        self.assertGreater(len(set(delays[0])), 1)
+
+    def test_retry_after_accepts_seconds_and_http_dates(self):
+        # Arrange
+        in_ten_seconds = email.utils.formatdate(time.time() + 10, usegmt=True)
+        an_hour_ago = email.utils.formatdate(time.time() - 3_600, usegmt=True)
+
+        # Act / Assert
+        self.assertEqual(retry_after_seconds(http_error(429, {"Retry-After": "3"})), 3.0)
+        self.assertAlmostEqual(
+            retry_after_seconds(http_error(429, {"Retry-After": in_ten_seconds})), 10, delta=2
+        )
+        self.assertEqual(retry_after_seconds(http_error(503, {"Retry-After": an_hour_ago})), 0.0)
+        self.assertIsNone(retry_after_seconds(http_error(429, {"Retry-After": "soon"})))
+        self.assertIsNone(retry_after_seconds(http_error(429)))
+        self.assertIsNone(retry_after_seconds(RpcError(429, "rate limited")))
+
+    def test_throttling_is_recognised_over_http_and_json_rpc(self):
+        # Act / Assert
+        self.assertTrue(is_rate_limited(http_error(429)))
+        self.assertTrue(is_rate_limited(RpcError(429, "too many requests")))
+        self.assertTrue(is_rate_limited(RpcError(-32005, "Rate limit exceeded")))
+        self.assertFalse(is_rate_limited(http_error(500)))
+        self.assertFalse(is_rate_limited(RpcError(-32000, "execution reverted")))
+
+
+if __name__ == "__main__":
+    unittest.main()
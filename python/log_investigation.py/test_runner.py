@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from runner import load_manifest, merge_reports
+
+ALICE = "0x39FCE6a33596b7319d7941F3F90d256574bcc954"
+
+
+def job_report(count, failed_ranges=()):
+    return {
+        "results": {ALICE.lower(): {"Hearted": {"count": count}}},
+        "failed_ranges": list(failed_ranges),
+        "follower": None,
+    }
+
+
+class TestLoadManifest(unittest.TestCase):
+    """
+    Tests for reading the job manifest.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_manifest(self, manifest):
+        path = os.path.join(self.tmp.name, "manifest.json")
+        with open(path, "w") as f:
+            json.dump(manifest, f)
+        return path
+
+    def test_jobs_get_defaults_and_rpc_urls_expand_env(self):
+        # Arrange
+        path = self.write_manifest(
+            {
+                "chains": {"base": {"rpc_urls": ["https://${TEST_RPC_HOST}/rpc"]}},
+                "jobs": [{"chain": "base", "contract": "0xabc", "events": ["Hearted"]}],
+            }
+        )
+
+        # Act
+        with mock.patch.dict(os.environ, {"TEST_RPC_HOST": "node.example"}):
+            manifest = load_manifest(path)
+
+        # Assert
+        self.assertEqual(manifest["chains"]["base"]["rpc_urls"], ["https://node.example/rpc"])
+        self.assertEqual(manifest["jobs"][0]["name"], "base-0xabc")
+        self.assertEqual(manifest["jobs"][0]["addresses"], [])
+
+    def test_unknown_chain_is_rejected(self):
+        # Arrange
+        path = self.write_manifest({"chains": {}, "jobs": [{"chain": "celo"}]})
+
+        # Act / Assert
+        with self.assertRaises(ValueError):
+            load_manifest(path)
+
+
+class TestMergeReports(unittest.TestCase):
+    """
+    Tests for merging job reports into one.
+    """
+
+    def test_address_results_are_merged_across_jobs(self):
+        # Arrange
+        reports = {"base": job_report(3), "celo": job_report(1, [(10, 20)])}
+
+        # Act
+        merged_report = merge_reports(reports, {"gnosis": "ConnectionError: down"})
+
+        # Assert
+        self.assertEqual(set(merged_report["results"][ALICE]), {"base", "celo"})
+        self.assertEqual(merged_report["failed_ranges"], {"celo": [(10, 20)]})
+        self.assertNotIn("follower", merged_report["jobs"]["base"])
+        self.assertEqual(merged_report["errors"], {"gnosis": "ConnectionError: down"})
+
+
+if __name__ == "__main__":
+    unittest.main()
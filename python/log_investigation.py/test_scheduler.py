@@ -0,0 +1,315 @@
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from rpc_client import RpcError
+from scheduler import (
+    BREAKER_COOLDOWN_SECONDS,
+    BREAKER_FAILURE_THRESHOLD,
+    MAX_RANGE_SIZE,
+    ChunkScheduler,
+    CircuitBreaker,
+    EndpointStats,
+)
+
+RUN_TIMEOUT_SECONDS = 5  # A scheduler that stops making progress fails the test instead of hanging it
+
+
+def run_scheduler(scheduler, ranges, on_result):
+    return asyncio.run(asyncio.wait_for(scheduler.run(ranges, on_result), RUN_TIMEOUT_SECONDS))
+
+
+def make_client(url, max_in_flight=1):
+    return SimpleNamespace(url=url, max_in_flight=max_in_flight)
+
+
+class TestChunkScheduler(unittest.TestCase):
+    """
+    Tests for how the scheduler hands out chunks and surfaces errors.
+    Follows AAA pattern: Arrange, Act, Assert.
+    """
+
+    def test_on_result_error_is_raised_for_every_concurrency(self):
+        for max_in_flight in (1, 4):
+            # Arrange
+            async def fetch_chunk(client, from_block, to_block):
+                return [from_block]
+
+            results = []
+
+            def on_result(chunk, logs):
+                if results:
+                    raise ValueError("aggregation failed")
+                results.append(chunk)
+
+            scheduler = ChunkScheduler(
+                [make_client("a", max_in_flight)], fetch_chunk, 3, initial_range_size=10
+            )
+
+            # Act / Assert
+            with self.assertRaises(ValueError, msg=f"max_in_flight {max_in_flight}"):
+                run_scheduler(scheduler, [(0, 99)], on_result)
+
+    def test_chunks_cover_the_range_once_and_flow_to_the_fast_endpoint(self):
+        # Arrange
+        blocks_by_url = {"fast": 0, "slow": 0}
+
+        async def fetch_chunk(client, from_block, to_block):
+            if client.url == "slow":
+                await asyncio.sleep(0.05)
+            blocks_by_url[client.url] += to_block - from_block + 1
+            return []
+
+        chunks = []
+        scheduler = ChunkScheduler(
+            [make_client("fast"), make_client("slow")], fetch_chunk, 3, initial_range_size=10
+        )
+
+        # Act
+        run_scheduler(
+            scheduler, [(0, 499), (1_000, 1_499)], lambda chunk, logs: chunks.append(chunk)
+        )
+
+        # Assert
+        fetched = sorted(block for start, end in chunks for block in range(start, end + 1))
+        self.assertEqual(fetched, list(range(0, 500)) + list(range(1_000, 1_500)))
+        self.assertGreater(blocks_by_url["fast"], blocks_by_url["slow"])
+
+    def test_failed_chunk_is_retried_on_another_endpoint(self):
+        # Arrange
+        attempts = []
+
+        async def fetch_chunk(client, from_block, to_block):
+            attempts.append(client.url)
+            if client.url == "down":
+                raise RuntimeError("connection refused")
+            return [from_block]
+
+        results = []
+        # Two attempts: a retry on the endpoint that already failed would give the chunk up
+        scheduler = ChunkScheduler(
+            [make_client("down"), make_client("up")], fetch_chunk, 2, initial_range_size=10
+        )
+
+        # Act
+        run_scheduler(scheduler, [(0, 29)], lambda chunk, logs: results.append((chunk, logs)))
+
+        # Assert
+        self.assertIn("down", attempts)
+        self.assertTrue(results)
+        self.assertTrue(all(logs is not None for _, logs in results))
+        self.assertEqual(
+            sorted(block for (start, end), _ in results for block in range(start, end + 1)),
+            list(range(30)),
+        )
+
+    def test_chunk_failing_every_attempt_is_reported_once_without_logs(self):
+        # Arrange
+        attempts = []
+
+        async def fetch_chunk(client, from_block, to_block):
+            attempts.append((from_block, to_block))
+            raise RuntimeError("connection refused")
+
+        results = []
+        scheduler = ChunkScheduler([make_client("down")], fetch_chunk, 3, initial_range_size=10)
+
+        # Act
+        with mock.patch("scheduler.backoff_delay", return_value=0.0):
+            run_scheduler(scheduler, [(0, 9)], lambda chunk, logs: results.append((chunk, logs)))
+
+        # Assert
+        self.assertEqual(attempts, [(0, 9)] * 3)
+        self.assertEqual(results, [((0, 9), None)])
+        self.assertEqual(scheduler.endpoints[0].retried, 2)
+
+    def test_rate_limit_error_backs_off_without_shrinking_the_range(self):
+        # Arrange
+        attempts = []
+
+        async def fetch_chunk(client, from_block, to_block):
+            attempts.append((from_block, to_block))
+            if len(attempts) == 1:
+                raise RpcError(-32005, "Rate limit exceeded")
+            return []
+
+        results = []
+        scheduler = ChunkScheduler([make_client("a")], fetch_chunk, 3, initial_range_size=100)
+
+        # Act
+        with mock.patch("scheduler.backoff_delay", return_value=0.0):
+            run_scheduler(scheduler, [(0, 99)], lambda chunk, logs: results.append(chunk))
+
+        # Assert
+        self.assertEqual(attempts, [(0, 99), (0, 99)])
+        self.assertEqual(results, [(0, 99)])
+        endpoint = scheduler.endpoints[0]
+        self.assertGreaterEqual(endpoint.range_size, 100)
+        self.assertEqual(endpoint.split, 0)
+        self.assertEqual((endpoint.rate_limited, endpoint.retried), (1, 1))
+
+
+class TestEndpointThrottling(unittest.TestCase):
+    """
+    Tests for pausing rate-limited endpoints and breaking failing ones.
+    """
+
+    def test_rate_limit_pauses_for_retry_after_or_a_growing_backoff(self):
+        # Arrange
+        endpoint = EndpointStats(make_client("a"))
+
+        # Act
+        endpoint.record_rate_limit(retry_after=30)
+        paused_for = endpoint.paused_until - time.monotonic()
+        endpoint.paused_until = 0.0
+        with mock.patch(
+            "scheduler.backoff_delay", side_effect=lambda attempt: attempt + 1.0
+        ) as backoff:
+            endpoint.record_rate_limit()
+            endpoint.record_rate_limit()
+
+        # Assert
+        self.assertAlmostEqual(paused_for, 30, delta=1)
+        self.assertEqual([call.args[0] for call in backoff.call_args_list], [1, 2])
+        self.assertEqual(endpoint.rate_limited, 3)
+        self.assertGreater(endpoint.error_rate, 0)
+
+    def test_success_resets_the_rate_limit_backoff(self):
+        # Arrange
+        endpoint = EndpointStats(make_client("a"))
+        endpoint.record_rate_limit(retry_after=0)
+
+        # Act
+        endpoint.record_success(0.1)
+
+        # Assert
+        self.assertEqual(endpoint.consecutive_rate_limits, 0)
+
+    def test_breaker_opens_after_repeated_failures(self):
+        # Arrange
+        breaker = CircuitBreaker()
+
+        # Act
+        for _ in range(BREAKER_FAILURE_THRESHOLD - 1):
+            breaker.record_failure()
+        state_before_threshold = breaker.state
+        breaker.record_failure()
+
+        # Assert
+        self.assertEqual(state_before_threshold, "closed")
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allows(0))
+
+    def test_half_open_breaker_lets_one_probe_through(self):
+        # Arrange
+        breaker = CircuitBreaker()
+        for _ in range(BREAKER_FAILURE_THRESHOLD):
+            breaker.record_failure()
+
+        # Act
+        breaker.open_until = time.monotonic() - 1  # Cooldown over
+
+        # Assert
+        self.assertEqual(breaker.state, "half-open")
+        self.assertTrue(breaker.allows(0))
+        self.assertFalse(breaker.allows(1))
+
+    def test_failed_probe_reopens_with_a_doubled_cooldown(self):
+        # Arrange
+        breaker = CircuitBreaker()
+        for _ in range(BREAKER_FAILURE_THRESHOLD):
+            breaker.record_failure()
+        breaker.open_until = time.monotonic() - 1
+
+        # Act
+        breaker.record_failure()
+
+        # Assert
+        self.assertEqual(breaker.state, "open")
+        self.assertEqual(breaker.cooldown, BREAKER_COOLDOWN_SECONDS * 2)
+
+    def test_successful_probe_closes_the_breaker(self):
+        # Arrange
+        breaker = CircuitBreaker()
+        for _ in range(BREAKER_FAILURE_THRESHOLD):
+            breaker.record_failure()
+        breaker.open_until = time.monotonic() - 1
+        breaker.record_failure()
+        breaker.open_until = time.monotonic() - 1
+
+        # Act
+        breaker.record_success()
+
+        # Assert
+        self.assertEqual(breaker.state, "closed")
+        self.assertEqual(breaker.cooldown, BREAKER_COOLDOWN_SECONDS)
+        self.assertTrue(breaker.allows(3))
+
+
+class TestRangeSizing(unittest.TestCase):
+    """
+    Tests for adapting each endpoint's eth_getLogs block range.
+    """
+
+    def setUp(self):
+        self.endpoint = EndpointStats(make_client("a"), range_size=500, range_ceiling=2_000)
+
+    def test_range_doubles_after_small_fast_full_requests_up_to_the_ceiling(self):
+        # Act
+        self.endpoint.adapt_range(500, 10, 0.1)
+        after_one = self.endpoint.range_size
+        for _ in range(5):
+            self.endpoint.adapt_range(self.endpoint.range_size, 10, 0.1)
+
+        # Assert
+        self.assertEqual(after_one, 1_000)
+        self.assertEqual(self.endpoint.range_size, 2_000)
+
+    def test_range_keeps_its_size_after_partial_large_or_slow_requests(self):
+        # Act
+        self.endpoint.adapt_range(200, 10, 0.1)
+        self.endpoint.adapt_range(500, 5_000, 0.1)
+        self.endpoint.adapt_range(500, 10, 10.0)
+
+        # Assert
+        self.assertEqual(self.endpoint.range_size, 500)
+
+    def test_result_limit_halves_the_range_but_keeps_the_ceiling(self):
+        # Act
+        self.endpoint.shrink_range(500, "results")
+
+        # Assert
+        self.assertEqual(self.endpoint.range_size, 250)
+        self.assertEqual(self.endpoint.range_ceiling, 2_000)
+
+    def test_range_limit_halves_the_range_and_caps_growth(self):
+        # Act
+        self.endpoint.shrink_range(500, "range")
+        self.endpoint.adapt_range(250, 10, 0.1)
+
+        # Assert
+        self.assertEqual(self.endpoint.range_ceiling, 250)
+        self.assertEqual(self.endpoint.range_size, 250)
+
+    def test_probed_limit_and_learned_sizes_seed_the_endpoints(self):
+        # Act
+        scheduler = ChunkScheduler(
+            [make_client("probed"), make_client("learned"), make_client("new")],
+            None,
+            3,
+            initial_range_size=500,
+            range_sizes={"learned": {"range_size": 4_000, "range_ceiling": 8_000}},
+            endpoint_health={"probed": {"max_log_range": 100}},
+        )
+
+        # Assert
+        sizes = scheduler.range_sizes()
+        self.assertEqual(sizes["probed"], {"range_size": 100, "range_ceiling": 100})
+        self.assertEqual(sizes["learned"], {"range_size": 4_000, "range_ceiling": 8_000})
+        self.assertEqual(sizes["new"], {"range_size": 500, "range_ceiling": MAX_RANGE_SIZE})
+
+
+if __name__ == "__main__":
+    unittest.main()